@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Word-timing alignment: map Edge WordBoundary events onto character offsets
+in the submitted text, in one linear pass.
+
+The source is tokenized once into a SourceIndex: every token's span, its
+normalized key (lowercase, punctuation stripped), and for tokens Edge reads
+out differently, the word sequences it may speak instead:
+
+  numbers       "123"   -> one hundred twenty three / one hundred and twenty three
+  years         "2026"  -> twenty twenty six (as well as the cardinal readings)
+  decimals      "3.5"   -> three point five
+  ordinals      "21st"  -> twenty first
+  money, %      "$5"    -> five dollars        "50%" -> fifty percent
+  abbreviations "Dr."   -> doctor              "e.g." -> for example
+
+Spoken words are matched against that index with a forward-only cursor.
+The first word of an expansion anchors the source token; the rest of the
+expansion is consumed without moving the cursor past the next token. A word
+found in neither form falls back to a substring search, which covers CJK
+(whole runs are one token) and odd punctuation. Every lookup is confined to
+WINDOW characters past the cursor, so a word that cannot be placed costs a
+bounded amount of work, never a scan to the end of a book-length text.
+
+Per-key candidate lists are walked with pointers that only move forward,
+so a whole alignment is O(len(text) + len(boundaries)).
+"""
+import re
+from typing import Dict, List, Optional
+
+# How far past the cursor a spoken word may match. Keeps a normalized token
+# that we failed to expand from false-matching far ahead and derailing the
+# cursor for the rest of the text.
+WINDOW = 200
+
+_TOKEN_RE = re.compile(
+    r"\$?\d+(?:,\d{3})*(?:\.\d+)?(?:st|nd|rd|th)?%?"   # 1,234.5  21st  $5  50%
+    r"|(?:[^\W\d_]\.){2,}"                             # e.g.  U.S.
+    r"|[^\W_]+(?:['’][^\W_]+)*"                   # words, don't, CJK runs
+    r"|&"
+)
+_NUMBER_RE = re.compile(r"(\$)?(\d+(?:,\d{3})*)(?:\.(\d+))?(st|nd|rd|th)?(%)?")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_SPLIT_RE = re.compile(r"[\s\-‐‑–—]+")
+
+_ONES = ("zero one two three four five six seven eight nine ten eleven twelve thirteen "
+         "fourteen fifteen sixteen seventeen eighteen nineteen").split()
+_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+_SCALES = ((10 ** 12, "trillion"), (10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand"))
+_ORDINAL = {"one": "first", "two": "second", "three": "third", "five": "fifth",
+            "eight": "eighth", "nine": "ninth", "twelve": "twelfth"}
+
+ABBREVIATIONS = {
+    "dr": ("doctor", "drive"), "mr": ("mister",), "mrs": ("missus", "misses"),
+    "ms": ("miss", "mizz"), "st": ("saint", "street"), "jr": ("junior",),
+    "sr": ("senior",), "prof": ("professor",), "gen": ("general",), "capt": ("captain",),
+    "lt": ("lieutenant",), "sgt": ("sergeant",), "col": ("colonel",), "rev": ("reverend",),
+    "vs": ("versus",), "etc": ("et cetera", "etcetera"), "eg": ("for example",),
+    "ie": ("that is",), "approx": ("approximately",), "dept": ("department",),
+    "govt": ("government",), "inc": ("incorporated",), "ltd": ("limited",),
+    "corp": ("corporation",), "co": ("company",), "ave": ("avenue",), "blvd": ("boulevard",),
+    "rd": ("road",), "mt": ("mount",), "ft": ("feet", "foot", "fort"),
+    "km": ("kilometers", "kilometres"), "kg": ("kilograms",), "lb": ("pounds", "pound"),
+    "lbs": ("pounds",), "oz": ("ounces", "ounce"), "hr": ("hour", "hours"),
+    "hrs": ("hours",), "min": ("minutes", "minute"), "sec": ("seconds", "second"),
+}
+
+
+def key(word: str) -> str:
+    """Match key for a source token or spoken word."""
+    return _NON_WORD_RE.sub("", word.lower())
+
+
+def cardinal(n: int, british: bool = False) -> List[str]:
+    """English words for n >= 0, hyphenated tens split ("twenty", "three")."""
+    if n < 20:
+        return [_ONES[n]]
+    if n < 100:
+        return [_TENS[n // 10]] + ([_ONES[n % 10]] if n % 10 else [])
+    if n < 1000:
+        rest = n % 100
+        out = [_ONES[n // 100], "hundred"]
+        if rest:
+            out += (["and"] if british else []) + cardinal(rest, british)
+        return out
+    for value, name in _SCALES:
+        if n >= value:
+            rest = n % value
+            out = cardinal(n // value, british) + [name]
+            if rest:
+                out += (["and"] if british and rest < 100 else []) + cardinal(rest, british)
+            return out
+    raise AssertionError("unreachable")
+
+
+def ordinal(n: int) -> List[str]:
+    words = cardinal(n)
+    last = words[-1]
+    if last in _ORDINAL:
+        last = _ORDINAL[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return words[:-1] + [last]
+
+
+def _digits(s: str) -> List[str]:
+    return [_ONES[int(c)] for c in s]
+
+
+def expansions(token: str) -> List[List[str]]:
+    """Word sequences Edge may speak for a source token instead of the token
+    itself (match keys, hyphens split). Empty for ordinary words."""
+    if token == "&":
+        return [["and"]]
+    m = _NUMBER_RE.fullmatch(token)
+    if m is None:
+        words = ABBREVIATIONS.get(key(token))
+        return [w.split() for w in words] if words else []
+
+    dollar, whole, frac, suffix, percent = m.groups()
+    digits = whole.replace(",", "")
+    if len(digits) > 15:
+        return [_digits(digits)]
+    n = int(digits)
+    if suffix:
+        return [ordinal(n)]
+
+    alts = [cardinal(n), cardinal(n, british=True)]
+    if "," not in whole and len(digits) == 4 and 1000 <= n <= 2999 and n % 1000:
+        hi, lo = divmod(n, 100)      # year reading: "nineteen eighty four"
+        alts.append(cardinal(hi) + (["hundred"] if lo == 0 else
+                                    ["oh"] + cardinal(lo) if lo < 10 else cardinal(lo)))
+    if len(digits) > 1 and digits[0] == "0":
+        alts.append(_digits(digits))
+    if dollar:
+        unit = ["dollar" if n == 1 and not frac else "dollars"]
+        cents = cardinal(int(frac)) + ["cents"] if frac else []
+        alts = [a + unit + c for a in alts for c in ((cents, ["and"] + cents) if cents else ([],))]
+    elif frac:
+        alts = [a + ["point"] + _digits(frac) for a in alts]
+    if percent:
+        alts = [a + ["percent"] for a in alts]
+
+    unique = []
+    for a in alts:
+        if a not in unique:
+            unique.append(a)
+    return unique
+
+
+class SourceIndex:
+    """Tokenized source text; build once, align any number of times."""
+
+    def __init__(self, text: str):
+        self.text = text
+        lower = text.lower()
+        # Case folding can change length ("İ"); then offsets from the folded
+        # copy would drift, so the substring fallback searches case-sensitively.
+        self._lower = lower if len(lower) == len(text) else None
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.keys: List[str] = []
+        self._by_key: Dict[str, List[int]] = {}
+        self._by_first_spoken: Dict[str, List[int]] = {}
+        self._expansions: Dict[int, List[List[str]]] = {}
+
+        for i, m in enumerate(_TOKEN_RE.finditer(text)):
+            tok = m.group()
+            k = key(tok)
+            self.starts.append(m.start())
+            self.ends.append(m.end())
+            self.keys.append(k)
+            if k:
+                self._by_key.setdefault(k, []).append(i)
+            alts = expansions(tok) if (tok[0] in "$&" or tok[0].isdigit() or k in ABBREVIATIONS) else []
+            if alts:
+                self._expansions[i] = alts
+                for first in {a[0] for a in alts}:
+                    self._by_first_spoken.setdefault(first, []).append(i)
+
+    def align(self, boundaries: list, ticks_per_ms: int) -> list:
+        """boundaries: [(offset_ticks, duration_ticks, spoken_word), ...] in
+        spoken order. Returns [[t_ms, char_offset], ...], char offsets strictly
+        increasing, one anchor per placed boundary."""
+        out = []
+        n = len(self.starts)
+        ti = 0          # next source token that may be matched
+        cur = 0         # char cursor: end of the last matched text
+        pending = None  # remaining word sequences of the expansion being spoken
+        ptrs: Dict[tuple, int] = {}
+
+        for offset_ticks, _duration_ticks, spoken in boundaries:
+            parts = [k for k in (key(p) for p in _SPLIT_RE.split(spoken or "")) if k]
+            if not parts:
+                continue
+
+            if pending is not None:
+                pending = self._consume(pending, parts)
+                if pending is not None:
+                    if not any(pending):
+                        pending = None
+                    continue  # still inside the last anchored expansion
+                # fell out of the expansion: place this word normally
+
+            j, expanded = self._find(parts[0], ti, cur, ptrs)
+            if j is not None:
+                out.append([offset_ticks // ticks_per_ms, self.starts[j]])
+                cur = self.ends[j]
+                ti = j + 1
+                if expanded:
+                    rest = self._consume(self._expansions[j], parts)
+                    pending = rest if rest and any(rest) else None
+                else:
+                    for part in parts[1:]:  # "well-known" spoken as one boundary
+                        if ti < n and self.keys[ti] == part:
+                            cur = self.ends[ti]
+                            ti += 1
+                continue
+
+            idx = self._substring(spoken.strip(), cur)
+            if idx is not None:
+                out.append([offset_ticks // ticks_per_ms, idx])
+                cur = idx + len(spoken.strip())
+                while ti < n and self.starts[ti] < cur:
+                    ti += 1
+        return out
+
+    @staticmethod
+    def _consume(alts: List[List[str]], parts: List[str]) -> Optional[List[List[str]]]:
+        """Advance expansion alternatives over spoken parts; None if no
+        alternative continues with them."""
+        for part in parts:
+            alts = [a[1:] for a in alts if a and a[0] == part]
+            if not alts:
+                return None
+        return alts
+
+    def _find(self, word: str, ti: int, cur: int, ptrs: dict) -> tuple:
+        """(token index, via_expansion) of the first token at or after ti that
+        word can start, within WINDOW chars of cur; (None, False) if none."""
+        best, expanded = None, False
+        for table, via in ((self._by_key, False), (self._by_first_spoken, True)):
+            cands = table.get(word)
+            if not cands:
+                continue
+            p = ptrs.get((via, word), 0)
+            while p < len(cands) and cands[p] < ti:
+                p += 1
+            ptrs[(via, word)] = p
+            if p < len(cands):
+                j = cands[p]
+                if self.starts[j] - cur <= WINDOW and (best is None or j < best):
+                    best, expanded = j, via
+        return best, expanded
+
+    def _substring(self, spoken: str, cur: int) -> Optional[int]:
+        if not spoken:
+            return None
+        if self._lower is not None:
+            idx = self._lower.find(spoken.lower(), cur, cur + WINDOW + len(spoken))
+        else:
+            idx = self.text.find(spoken, cur, cur + WINDOW + len(spoken))
+        return idx if idx != -1 else None
+
+
+def align(text: str, boundaries: list, ticks_per_ms: int) -> list:
+    return SourceIndex(text).align(boundaries, ticks_per_ms)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: alignment.py against the previous windowed str.find mapper.
+
+Builds synthetic book-like corpora (prose with numbers, years, ordinals,
+money, percentages and abbreviations), turns each into the WordBoundary
+stream Edge would send (normalized tokens spoken as their expansions), and
+times both mappers. A second stream per corpus drops a few short passages,
+as Edge does with URLs or markup, to show what misses cost.
+
+    python api/bench_alignment.py                      # 10k .. 500k chars
+    python api/bench_alignment.py --sizes 1000000 --repeat 1
+
+Reports time per run and anchor coverage (anchors / boundaries, and source
+tokens that got an anchor) for each mapper.
+"""
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from alignment import _TOKEN_RE, SourceIndex, expansions  # noqa: E402
+
+TICKS_PER_MS = 10_000
+WORDS = ("the a an reader listened to every chapter of her long novel while morning light "
+         "fell across quiet room and she turned page after page without pause because "
+         "story kept its promise harbour winter letters brother garden window carriage "
+         "evening village river mountain journey captain soldiers silence memory question "
+         "answer kitchen station market doctor teacher student library history science "
+         "careful gentle sudden bitter golden narrow ancient modern distant familiar "
+         "remembered whispered carried followed wondered gathered promised returned "
+         "although however perhaps beneath between toward against during through before "
+         "children families neighbours strangers travellers merchants sailors farmers "
+         "bread salt candles lanterns blankets horses boats bridges walls towers roads "
+         "slowly quickly softly loudly nearly hardly simply finally suddenly clearly").split()
+SPECIAL = ["Dr.", "Mr.", "St.", "e.g.", "etc.", "&", "1984", "2026", "21st", "3rd",
+           "$5", "$12.50", "50%", "3.5", "1,200", "17", "404", "km"]
+
+
+def legacy_map_word_offsets(text: str, boundaries: list) -> list:
+    """The mapper tts_server used before alignment.py, verbatim."""
+    words = []
+    lower = text.lower()
+    cursor = 0
+    for offset_ticks, _duration_ticks, spoken in boundaries:
+        w = (spoken or "").strip().lower()
+        if not w:
+            continue
+        idx = lower.find(w, cursor)
+        if idx != -1 and idx - cursor <= 200:
+            words.append([offset_ticks // TICKS_PER_MS, idx])
+            cursor = idx + len(w)
+    return words
+
+
+def corpus(rng: random.Random, chars: int) -> str:
+    out, n = [], 0
+    while n < chars:
+        k = rng.randint(6, 20)
+        sentence = [rng.choice(SPECIAL) if rng.random() < 0.08 else rng.choice(WORDS)
+                    for _ in range(k)]
+        s = " ".join(sentence)
+        s = s[0].upper() + s[1:] + "."
+        out.append(s)
+        n += len(s) + 1
+    return " ".join(out)
+
+
+def speech(rng: random.Random, text: str, drop: float = 0.0) -> list:
+    """Boundary stream for text: expansions spoken word by word, and with
+    probability drop per token, a 5-15 token passage skipped entirely."""
+    boundaries = []
+    t = 0
+    skip = 0
+    for m in _TOKEN_RE.finditer(text):
+        if skip:
+            skip -= 1
+            continue
+        if drop and rng.random() < drop:
+            skip = rng.randint(5, 15)
+            continue
+        alts = expansions(m.group())
+        spoken = alts[0] if alts else [m.group()]
+        for w in spoken:
+            boundaries.append((t * TICKS_PER_MS, 200 * TICKS_PER_MS, w))
+            t += 250
+    return boundaries
+
+
+def _time(fn, repeat: int) -> tuple:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Alignment benchmark")
+    ap.add_argument("--sizes", default="10000,50000,200000,500000",
+                    help="corpus sizes in characters")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"{'chars':>9} {'stream':>7} {'bounds':>8} {'mapper':>7} {'ms':>9} "
+          f"{'anchors':>8} {'tokens anchored':>16}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(args.seed)
+        text = corpus(rng, size)
+        tokens = sum(1 for _ in _TOKEN_RE.finditer(text))
+        for label, drop in (("clean", 0.0), ("gaps", 0.002)):
+            b = speech(random.Random(args.seed), text, drop)
+            runs = (("legacy", lambda: legacy_map_word_offsets(text, b)),
+                    ("index", lambda: SourceIndex(text).align(b, TICKS_PER_MS)))
+            for name, fn in runs:
+                secs, words = _time(fn, args.repeat)
+                anchored = len({c for _, c in words})
+                print(f"{len(text):>9} {label:>7} {len(b):>8} {name:>7} {secs * 1000:>9.1f} "
+                      f"{len(words) / len(b):>8.1%} {anchored / tokens:>16.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the premium billing path.
+
+Drives billing.router's POST /api/tts/premium through the ASGI interface at
+increasing client concurrency against a throwaway license DB, with the
+ElevenLabs call replaced by a --provider-ms sleep (the one thing that must
+not leave the machine). Every request does the real work otherwise: license
+and daily-cap debit in SQLite, and a refund for every --fail-every'th
+request. Alongside, a reader polls GET /api/billing/status, and a ticker
+measures how long the event loop goes without running it (what free
+/api/tts traffic on the same loop would wait).
+
+Reports premium requests/s and latency per concurrency level, status reads
+completed, and the worst event-loop stall:
+
+    python api/bench_billing.py                          # 1, 4, 16, 32 clients
+    python api/bench_billing.py --concurrency 1 8 64 --requests 400
+    python api/bench_billing.py --provider-ms 0 --sync FULL   # DB cost only
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+
+def _configure(db: str, sync: str) -> None:
+    os.environ.update({
+        "STRIPE_SECRET_KEY": "sk_test_bench", "STRIPE_WEBHOOK_SECRET": "whsec_bench",
+        "LICENSE_DB": db, "LICENSE_DB_SYNC": sync,
+        "STRIPE_TIERS_JSON": json.dumps({"price_bench": {"plan": "bench", "cap": 10 ** 9}}),
+        "ELEVENLABS_API_KEY": "bench", "PREMIUM_DAILY_CHAR_CAP": str(10 ** 12),
+    })
+
+
+async def _call(app, method: str, path: str, body: bytes = b"", query: bytes = b"") -> int:
+    scope = {"type": "http", "method": method, "path": path, "raw_path": path.encode(),
+             "query_string": query, "headers": [(b"content-type", b"application/json")],
+             "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+             "client": ("127.0.0.1", 1), "root_path": ""}
+    sent, received = [], []
+
+    async def receive():
+        if received:    # StreamingResponse waits on this for a disconnect
+            await asyncio.Future()
+        received.append(True)
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def _level(app, keys: list, clients: int, requests: int) -> dict:
+    latencies, statuses = [], {}
+    todo = iter(range(requests))
+    stop = asyncio.Event()
+    reads = stall = 0.0
+
+    async def client(i: int):
+        for n in todo:
+            body = json.dumps({"text": "x" * 200, "voice_id": "bench",
+                               "license_key": keys[(i + n) % len(keys)]}).encode()
+            t0 = time.perf_counter()
+            status = await _call(app, "POST", "/api/tts/premium", body)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def reader():
+        nonlocal reads
+        while not stop.is_set():
+            await _call(app, "GET", "/api/billing/status", query=f"key={keys[0]}".encode())
+            reads += 1
+            await asyncio.sleep(0.01)
+
+    async def ticker():
+        nonlocal stall
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stall = max(stall, time.perf_counter() - t0 - 0.005)
+
+    side = [asyncio.create_task(reader()), asyncio.create_task(ticker())]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await asyncio.gather(*side)
+    latencies.sort()
+    return {"clients": clients, "rps": requests / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "status_reads_per_s": reads / elapsed, "max_loop_stall_ms": stall * 1000,
+            "statuses": statuses}
+
+
+async def _main(args, billing) -> list:
+    from fastapi import FastAPI
+    app = FastAPI()
+    app.include_router(billing.router)
+    keys = [billing.upsert_license_for_sub(
+        f"sub_bench_{i}", stripe_customer=f"cus_{i}", plan="bench", char_cap=10 ** 9,
+        status="active", email=None, checkout_session=None) for i in range(args.licenses)]
+    calls = itertools.count(1)
+
+    def provider(text: str, voice_id: str) -> bytes:
+        n = next(calls)
+        time.sleep(args.provider_ms / 1000)
+        if args.fail_every and n % args.fail_every == 0:
+            raise RuntimeError("provider failure (bench)")
+        return b"\xff\xf3" * 1024
+
+    billing._elevenlabs_tts = provider
+    await _level(app, keys, 1, 2)   # warm up: first connections, route setup
+    results = []
+    for clients in args.concurrency:
+        results.append(await _level(app, keys, clients, args.requests))
+        r = results[-1]
+        print(f"  {clients:>4} {r['rps']:9.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} "
+              f"{r['status_reads_per_s']:9.1f} {r['max_loop_stall_ms']:10.1f}  {r['statuses']}")
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Premium billing concurrency benchmark")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    ap.add_argument("--requests", type=int, default=200, help="premium requests per level")
+    ap.add_argument("--licenses", type=int, default=8)
+    ap.add_argument("--provider-ms", type=float, default=100,
+                    help="stand-in ElevenLabs latency per request")
+    ap.add_argument("--fail-every", type=int, default=20,
+                    help="every n-th provider call fails (refund path); 0 for never")
+    ap.add_argument("--sync", default="NORMAL", help="LICENSE_DB_SYNC for the run")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_billing_")
+    try:
+        _configure(os.path.join(tmp, "licenses.db"), args.sync)
+        import billing
+        print(f"provider {args.provider_ms:.0f} ms, {args.requests} requests per level, "
+              f"synchronous={args.sync}")
+        print(f"  {'clients':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'reads/s':>9} "
+              f"{'stall ms':>10}")
+        results = asyncio.run(_main(args, billing))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    base = results[0]["rps"]
+    print("scaling vs first level: "
+          + ", ".join(f"{r['clients']}: {r['rps'] / base:.1f}x" for r in results))
+
+
+if __name__ == "__main__":
+    main()
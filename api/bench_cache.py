@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Replay a cache access trace against each memory cache policy.
+
+A trace is one line per access, "<key> <bytes> <segment>", as the server
+writes it with TTS_CACHE_TRACE=/path (segment is "timed" or "plain"). Each
+access is replayed as a lookup and, on a miss, an insert of that size (as
+the fresh synthesis the server would put), into a fresh
+tts_server._AudioCache per policy:
+
+  lru-100        what the server used before: LRU, 100 entries, 64 MB, one pool
+  lru            LRU per segment, byte budgets only
+  gdsf           Greedy-Dual-Size-Frequency eviction
+  tinylfu-lru    TinyLFU admission in front of LRU
+  tinylfu-gdsf   TinyLFU admission in front of GDSF (the server default)
+
+Reports hit ratio (accesses served from memory), byte hit ratio (bytes
+served from memory) and evictions/rejections for each, per budget.
+
+Without --trace, a seeded synthetic trace stands in: a Zipf-popular set of
+pages read segment by segment (timed) and of short snippets (plain), mixed
+with scans of one-off long documents and bursts of junk-pitch one-offs.
+
+    python api/bench_cache.py                              # synthetic, 32 and 128 MB
+    python api/bench_cache.py --trace /var/lib/tts/cache.trace --mb 64 256
+    python api/bench_cache.py --events 50000 --write-trace synth.trace
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache_policy import read_trace  # noqa: E402
+from tts_server import MB, _AudioCache  # noqa: E402
+
+BYTES_PER_CHAR = 380          # 48 kbps MP3 at ~16 chars/s, plus timings
+POLICIES = ("lru-100", "lru", "gdsf", "tinylfu-lru", "tinylfu-gdsf")
+
+
+class _Blob:
+    """Stands in for a payload: only its size and segment matter here."""
+    __slots__ = ("n", "segment")
+
+    def __init__(self, n: int, segment: str):
+        self.n = n
+        self.segment = segment
+
+    def __len__(self):
+        return self.n
+
+
+def _key(*parts) -> str:
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def _zipf_picker(rng: random.Random, n: int, s: float = 1.0):
+    weights = [1 / (i + 1) ** s for i in range(n)]
+    items = list(range(n))
+    return lambda: rng.choices(items, weights)[0]
+
+
+def synthetic(events: int, seed: int) -> list:
+    rng = random.Random(seed)
+    pages = [[rng.randint(300, 1200) for _ in range(rng.randint(3, 12))] for _ in range(400)]
+    snippets = [rng.randint(20, 300) for _ in range(300)]
+    page, snippet = _zipf_picker(rng, len(pages)), _zipf_picker(rng, len(snippets))
+    trace = []
+    for e in range(events):
+        r = rng.random()
+        if r < 0.55:        # a reader plays a popular page, from the top
+            p = page()
+            for i, chars in enumerate(pages[p][:rng.randint(1, len(pages[p]))]):
+                trace.append((_key("page", p, i), chars * BYTES_PER_CHAR, "timed"))
+        elif r < 0.80:      # short clip via GET /api/tts
+            n = snippet()
+            trace.append((_key("snippet", n), snippets[n] * BYTES_PER_CHAR, "plain"))
+        elif r < 0.90:      # someone's own long document: every segment new
+            for i in range(rng.randint(10, 40)):
+                trace.append((_key("scan", e, i), rng.randint(800, 5000) * BYTES_PER_CHAR,
+                              "timed"))
+        else:               # junk pitch values, each a new key
+            for i in range(rng.randint(5, 30)):
+                trace.append((_key("junk", e, i), rng.randint(20, 200) * BYTES_PER_CHAR,
+                              "plain"))
+    return trace
+
+
+def _cache(policy: str, total: int, timed_share: float) -> _AudioCache:
+    if policy == "lru-100":
+        return _AudioCache(max_entries=100, max_bytes=64 * MB, policy="lru")
+    timed = int(total * timed_share)
+    return _AudioCache(policy=policy, budgets={"timed": timed, "plain": total - timed},
+                       classify=lambda blob: blob.segment)
+
+
+def replay(trace: list, cache: _AudioCache) -> dict:
+    hits = hit_bytes = total_bytes = 0
+    for key, size, segment in trace:
+        total_bytes += size
+        if cache.get(key) is not None:
+            hits += 1
+            hit_bytes += size
+        else:
+            cache.put(key, _Blob(size, segment), fresh=True)
+    return {"hit_ratio": hits / len(trace), "byte_hit_ratio": hit_bytes / total_bytes,
+            "evictions": cache.evictions, "rejections": cache.rejections}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Replay a cache trace against each policy")
+    ap.add_argument("--trace", action="append", help="trace file (repeatable, concatenated)")
+    ap.add_argument("--mb", type=int, nargs="+", default=[32, 128], help="total budgets to try")
+    ap.add_argument("--timed-share", type=float, default=0.6)
+    ap.add_argument("--policies", nargs="+", default=list(POLICIES), choices=POLICIES)
+    ap.add_argument("--events", type=int, default=20000, help="synthetic trace length")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--write-trace", help="save the synthetic trace here and exit")
+    args = ap.parse_args()
+
+    if args.trace:
+        trace = [row for path in args.trace for row in read_trace(path)]
+        source = ", ".join(args.trace)
+    else:
+        trace = synthetic(args.events, args.seed)
+        source = f"synthetic, {args.events} events, seed {args.seed}"
+    if args.write_trace:
+        with open(args.write_trace, "w") as f:
+            f.writelines(f"{k} {n} {seg}\n" for k, n, seg in trace)
+        print(f"wrote {len(trace)} accesses to {args.write_trace}")
+        return
+    keys = {k for k, _n, _s in trace}
+    print(f"trace: {source}: {len(trace)} accesses, {len(keys)} keys, "
+          f"{sum(n for _k, n, _s in trace) / MB:.0f} MB requested")
+
+    for mb in args.mb:
+        print(f"\nbudget {mb} MB ({args.timed_share:.0%} timed)")
+        print(f"  {'policy':<14} {'hit':>7} {'byte hit':>9} {'evicted':>8} {'refused':>8} "
+              f"{'us/access':>9}")
+        for policy in args.policies:
+            cache = _cache(policy, mb * MB, args.timed_share)
+            t0 = time.perf_counter()
+            r = replay(trace, cache)
+            us = (time.perf_counter() - t0) / len(trace) * 1e6
+            label = policy if policy != "lru-100" else "lru-100 (old)"
+            print(f"  {label:<14} {r['hit_ratio']:7.1%} {r['byte_hit_ratio']:9.1%} "
+                  f"{r['evictions']:8d} {r['rejections']:8d} {us:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Offline load test / benchmark for the TTS server.
+
+Starts fake_edge.FakeEdge (the Edge websocket stand-in: realistic audio
+chunks and WordBoundary events, configurable think time, jitter, per-word
+pacing and failure injection), starts tts_server against it in a subprocess
+(uvicorn, or serve.py with --workers), then drives POST /api/tts, POST
+/api/tts/timed and GET /api/tts from --concurrency closed-loop clients for
+--duration seconds.
+
+Reports, per endpoint and overall: requests/s, status counts, latency
+p50/p95/p99 (full body) and p50 time to first byte; the server's peak and
+final RSS (all workers); the fake's connection/turn counts; and, from the
+server's /metrics, the mean time per stage. --json writes the same numbers
+to a file so runs before and after a change can be diffed.
+
+Text comes from a fixed, seeded pool of --unique texts per length class, so
+the cache hit ratio is controlled by --unique (0 = every request is new).
+Each simulated client sends its own X-Forwarded-For, like distinct readers,
+so the per-IP rate limit behaves as in production.
+
+    python api/bench_load.py                                   # defaults
+    python api/bench_load.py -c 64 -d 30 --mix tts=5,timed=4,get=1 \\
+        --lengths 12=5,60=4,300=1 --unique 0 --first-byte-ms 150 --jitter-ms 80
+    python api/bench_load.py --pool 8 --workers 4 --fail-rate 0.02 --json after.json
+    python api/bench_load.py --url http://127.0.0.1:8000      # existing server
+
+Linux only for the memory numbers (/proc); everything else runs anywhere.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from fake_edge import FakeEdge  # noqa: E402
+
+ORIGIN = "http://localhost:8000"
+VOICE = "en-US-AriaNeural"
+WORDS = ("the quick brown fox jumps over a lazy dog while seven bright readers "
+         "listen closely to every page of their favourite long novel today and "
+         "tomorrow morning before lunch").split()
+
+
+def _weights(spec: str) -> list:
+    """"tts=5,timed=3" -> [("tts", 5.0), ("timed", 3.0)]"""
+    out = []
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        out.append((name.strip(), float(w or 1)))
+    return out
+
+
+def _text(rng: random.Random, words: int) -> str:
+    out, n = [], 0
+    while n < words:
+        k = min(words - n, rng.randint(6, 18))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(k))
+        out.append(sentence[0].upper() + sentence[1:] + ".")
+        n += k
+    return " ".join(out)
+
+
+def _pct(sorted_vals: list, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _tree_rss_kb(root: int) -> int:
+    """Resident KB of root and all its descendants (pre-forked workers)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+    pids, frontier = {root}, [root]
+    while frontier:
+        p = frontier.pop()
+        for child, parent in parents.items():
+            if parent == p and child not in pids:
+                pids.add(child)
+                frontier.append(child)
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                m = re.search(r"VmRSS:\s+(\d+)", f.read())
+            total += int(m.group(1)) if m else 0
+        except OSError:
+            pass
+    return total
+
+
+class Stats:
+    def __init__(self):
+        self.latency = []
+        self.ttfb = []
+        self.status = {}
+        self.bytes = 0
+
+    def report(self, elapsed: float) -> dict:
+        lat = sorted(self.latency)
+        ttfb = sorted(self.ttfb)
+        n = sum(self.status.values())
+        return {
+            "requests": n,
+            "rps": round(n / elapsed, 1) if elapsed else 0,
+            "status": dict(sorted(self.status.items())),
+            "p50_ms": round(_pct(lat, 0.50) * 1000, 1),
+            "p95_ms": round(_pct(lat, 0.95) * 1000, 1),
+            "p99_ms": round(_pct(lat, 0.99) * 1000, 1),
+            "ttfb_p50_ms": round(_pct(ttfb, 0.50) * 1000, 1),
+            "mb_received": round(self.bytes / 1e6, 1),
+        }
+
+
+async def _request(session, base: str, endpoint: str, text: str, ip: str) -> tuple:
+    headers = {"Origin": ORIGIN, "X-Forwarded-For": ip}
+    if endpoint == "tts":
+        call = session.post(f"{base}/api/tts", json={"text": text, "voice": VOICE},
+                            headers=headers)
+    elif endpoint == "timed":
+        call = session.post(f"{base}/api/tts/timed", json={"text": text, "voice": VOICE},
+                            headers=headers)
+    elif endpoint == "get":
+        call = session.get(f"{base}/api/tts", params={"text": text, "voice": VOICE},
+                           headers=headers)
+    else:
+        raise SystemExit(f"unknown endpoint in --mix: {endpoint}")
+    t0 = time.perf_counter()
+    async with call as resp:
+        ttfb = None
+        nbytes = 0
+        async for chunk in resp.content.iter_any():
+            if ttfb is None:
+                ttfb = time.perf_counter() - t0
+            nbytes += len(chunk)
+        return resp.status, time.perf_counter() - t0, ttfb, nbytes
+
+
+async def _load(args, base: str) -> tuple:
+    rng = random.Random(args.seed)
+    endpoints = _weights(args.mix)
+    lengths = [(int(n), w) for n, w in _weights(args.lengths)]
+    pools = {n: [_text(rng, n) for _ in range(args.unique)] for n, _ in lengths}
+    stats = {name: Stats() for name, _ in endpoints}
+    fresh = [0]
+
+    def pick_text(r: random.Random) -> str:
+        n = r.choices([n for n, _ in lengths], [w for _, w in lengths])[0]
+        if args.unique:
+            return r.choice(pools[n])
+        fresh[0] += 1
+        return f"Request {fresh[0]}. " + _text(r, n)
+
+    deadline = time.perf_counter() + args.duration
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    conn = aiohttp.TCPConnector(limit=0)
+
+    async def client(i: int, session) -> None:
+        r = random.Random(args.seed * 1000 + i)
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        while time.perf_counter() < deadline:
+            endpoint = r.choices([e for e, _ in endpoints], [w for _, w in endpoints])[0]
+            s = stats[endpoint]
+            try:
+                status, lat, ttfb, nbytes = await _request(session, base, endpoint,
+                                                           pick_text(r), ip)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                key = type(e).__name__
+                s.status[key] = s.status.get(key, 0) + 1
+                continue
+            s.status[str(status)] = s.status.get(str(status), 0) + 1
+            if status == 200:
+                s.latency.append(lat)
+                s.ttfb.append(ttfb or lat)
+                s.bytes += nbytes
+
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession(connector=conn, timeout=timeout) as session:
+        await asyncio.gather(*(client(i, session) for i in range(args.concurrency)))
+    return stats, time.perf_counter() - t0
+
+
+async def _stage_means(base: str) -> dict:
+    """Mean seconds per (endpoint, stage) from /metrics, if the server has it."""
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base}/metrics") as resp:
+                if resp.status != 200:
+                    return {}
+                text = await resp.text()
+    except aiohttp.ClientError:
+        return {}
+    sums, counts = {}, {}
+    for m in re.finditer(r'tts_stage_seconds_(sum|count)\{endpoint="([^"]*)",stage="([^"]*)"\} (\S+)',
+                         text):
+        (sums if m.group(1) == "sum" else counts)[(m.group(2), m.group(3))] = float(m.group(4))
+    return {f"{ep}/{stage}": round(sums[(ep, stage)] / n * 1000, 2)
+            for (ep, stage), n in sorted(counts.items()) if n}
+
+
+async def _wait_ready(base: str, proc, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if proc is not None and proc.poll() is not None:
+                raise SystemExit(f"server exited during startup ({proc.returncode})")
+            try:
+                async with session.get(f"{base}/") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("server did not come up")
+
+
+def _start_server(args, upstream: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, TTS_EDGE_WSS_URL=upstream, TTS_EDGE_POOL=str(args.pool),
+               TTS_METRICS="1")
+    env.pop("TTS_ADMIN_TOKEN", None)
+    if args.workers > 1:
+        cmd = [sys.executable, "serve.py", "--workers", str(args.workers),
+               "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "tts_server:app",
+               "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=HERE, env=env)
+
+
+async def _main(args) -> dict:
+    fake = proc = None
+    base = args.url.rstrip("/") if args.url else None
+    try:
+        if base is None:
+            fake = FakeEdge(args.handshake_ms, args.first_byte_ms, jitter_ms=args.jitter_ms,
+                            chunk_ms=args.chunk_ms, fail_rate=args.fail_rate, seed=args.seed)
+            upstream = await fake.start()
+            port = _free_port()
+            proc = _start_server(args, upstream, port)
+            base = f"http://127.0.0.1:{port}"
+        await _wait_ready(base, proc)
+
+        rss = {"peak_kb": 0, "start_kb": _tree_rss_kb(proc.pid) if proc else 0}
+
+        async def sample():
+            while True:
+                rss["peak_kb"] = max(rss["peak_kb"], _tree_rss_kb(proc.pid))
+                await asyncio.sleep(0.5)
+
+        sampler = asyncio.ensure_future(sample()) if proc and os.path.isdir("/proc") else None
+        try:
+            stats, elapsed = await _load(args, base)
+        finally:
+            if sampler is not None:
+                sampler.cancel()
+
+        total = Stats()
+        for s in stats.values():
+            total.latency += s.latency
+            total.ttfb += s.ttfb
+            total.bytes += s.bytes
+            for k, v in s.status.items():
+                total.status[k] = total.status.get(k, 0) + v
+        result = {
+            "config": {k: v for k, v in vars(args).items() if k != "json"},
+            "elapsed_s": round(elapsed, 2),
+            "overall": total.report(elapsed),
+            "endpoints": {name: s.report(elapsed) for name, s in stats.items()},
+            "stages_ms": await _stage_means(base),
+        }
+        if proc:
+            rss["end_kb"] = _tree_rss_kb(proc.pid)
+            result["server_rss_mb"] = {k.replace("_kb", ""): round(v / 1024, 1)
+                                       for k, v in rss.items()}
+        if fake:
+            result["upstream"] = {"connections": fake.connections, "turns": fake.turns,
+                                  "injected_failures": fake.failures}
+        return result
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if fake is not None:
+            await fake.stop()
+
+
+def _print(result: dict) -> None:
+    cols = ("requests", "rps", "p50_ms", "p95_ms", "p99_ms", "ttfb_p50_ms")
+    print(f"\n{'endpoint':<10}" + "".join(f"{c:>13}" for c in cols) + "  status")
+    rows = list(result["endpoints"].items()) + [("overall", result["overall"])]
+    for name, r in rows:
+        print(f"{name:<10}" + "".join(f"{r[c]:>13}" for c in cols) + f"  {r['status']}")
+    if "server_rss_mb" in result:
+        m = result["server_rss_mb"]
+        print(f"\nserver RSS MB: start {m['start']}  peak {m['peak']}  end {m['end']}")
+    if "upstream" in result:
+        u = result["upstream"]
+        print(f"upstream: {u['turns']} turns on {u['connections']} connections, "
+              f"{u['injected_failures']} injected failures")
+    if result["stages_ms"]:
+        print("mean stage ms: " + ", ".join(f"{k} {v}" for k, v in result["stages_ms"].items()))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Offline load test for the TTS server")
+    ap.add_argument("-c", "--concurrency", type=int, default=16)
+    ap.add_argument("-d", "--duration", type=float, default=10.0, help="seconds")
+    ap.add_argument("--mix", default="tts=5,timed=4,get=1",
+                    help="endpoint weights: tts, timed, get")
+    ap.add_argument("--lengths", default="12=5,60=4,300=1",
+                    help="text length in words = weight")
+    ap.add_argument("--unique", type=int, default=50,
+                    help="distinct texts per length (0 = never repeat, all misses)")
+    ap.add_argument("--timeout", type=float, default=90.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--url", help="benchmark this running server instead of starting one")
+    ap.add_argument("--workers", type=int, default=1, help=">1 runs serve.py")
+    ap.add_argument("--pool", type=int, default=0, help="TTS_EDGE_POOL for the server")
+    ap.add_argument("--handshake-ms", type=float, default=100)
+    ap.add_argument("--first-byte-ms", type=float, default=120)
+    ap.add_argument("--jitter-ms", type=float, default=60)
+    ap.add_argument("--chunk-ms", type=float, default=2,
+                    help="gap between words' audio chunks")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args()
+
+    result = asyncio.run(_main(args))
+    _print(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
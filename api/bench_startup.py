@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark and regression check for the TTS server.
+
+Starts tts_server under uvicorn --runs times, as a spun-down Render
+instance would, and for each run measures from spawn to:
+
+  live    first 200 from GET / (what the first reader waits for)
+  ready   first 200 from GET /ready (deferred init done, edge pool warm)
+
+and collects the server's own boot report from /ready (time before our
+import, import time per phase). Upstream is fake_edge.FakeEdge and the
+voice-list refresh is off, so nothing leaves the machine. --importtime
+adds the slowest modules tts_server imports, from python -X importtime.
+
+Exits 1 if the median time to live exceeds --target-ms, so it can gate a
+change that puts something slow back on the startup path:
+
+    python api/bench_startup.py                     # 5 runs, target 2500 ms
+    python api/bench_startup.py --runs 10 --pool 4 --importtime
+    python api/bench_startup.py --target-ms 1500 --json startup.json
+    TTS_FAST_START=0 python api/bench_startup.py    # the old, eager start
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from fake_edge import FakeEdge  # noqa: E402
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _poll(session, url: str, proc, timeout: float) -> float:
+    """perf_counter() at the first 200 from url."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited during startup ({proc.returncode})")
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    return time.perf_counter()
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.005)
+    raise SystemExit(f"no 200 from {url} within {timeout:.0f}s")
+
+
+async def _run_once(session, args, upstream: str) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, TTS_EDGE_WSS_URL=upstream, TTS_EDGE_POOL=str(args.pool),
+               TTS_VOICE_REFRESH_H="0")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "tts_server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL)
+    try:
+        live = await _poll(session, f"{base}/", proc, args.timeout)
+        ready = await _poll(session, f"{base}/ready", proc, args.timeout)
+        async with session.get(f"{base}/ready") as resp:
+            boot = (await resp.json())["boot"]
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {"live_ms": round((live - t0) * 1000, 1), "ready_ms": round((ready - t0) * 1000, 1),
+            "boot": boot}
+
+
+def _importtime(top: int) -> list:
+    """[(module, cumulative ms, self ms)] for the slowest imports under tts_server."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import tts_server"],
+                          cwd=HERE, capture_output=True, text=True,
+                          env=dict(os.environ, TTS_VOICE_REFRESH_H="0"))
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        # Depth 1 = imported by tts_server itself (or first by one of its
+        # siblings); deeper rows are already inside these.
+        if m and len(m.group(3)) <= 3:
+            rows.append((m.group(4), int(m.group(2)) / 1000, int(m.group(1)) / 1000))
+    rows.sort(key=lambda r: -r[1])
+    return rows[:top]
+
+
+async def _main(args) -> dict:
+    fake = FakeEdge(handshake_ms=args.handshake_ms, first_byte_ms=20)
+    upstream = await fake.start()
+    runs = []
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+            for i in range(args.runs):
+                runs.append(await _run_once(session, args, upstream))
+                r = runs[-1]
+                print(f"run {i + 1}: live {r['live_ms']:.0f} ms, ready {r['ready_ms']:.0f} ms "
+                      f"(import {r['boot']['import_ms']:.0f} ms)")
+    finally:
+        await fake.stop()
+    phases = {}
+    for r in runs:
+        for name, ms in r["boot"]["phases"].items():
+            phases.setdefault(name, []).append(ms)
+    before = [r["boot"]["before_import_ms"] for r in runs
+              if r["boot"]["before_import_ms"] is not None]
+    return {
+        "runs": len(runs),
+        "live_ms": {"median": statistics.median(r["live_ms"] for r in runs),
+                    "max": max(r["live_ms"] for r in runs)},
+        "ready_ms": {"median": statistics.median(r["ready_ms"] for r in runs),
+                     "max": max(r["ready_ms"] for r in runs)},
+        "before_import_ms": statistics.median(before) if before else None,
+        "import_phases_ms": {k: round(statistics.median(v), 1) for k, v in phases.items()},
+        "target_ms": args.target_ms,
+    }
+
+
+def _print(result: dict, imports: list) -> None:
+    live, ready = result["live_ms"], result["ready_ms"]
+    print(f"\nlive:  median {live['median']:.0f} ms, max {live['max']:.0f} ms "
+          f"(target {result['target_ms']:.0f} ms)")
+    print(f"ready: median {ready['median']:.0f} ms, max {ready['max']:.0f} ms")
+    if result["before_import_ms"] is not None:
+        print(f"before tts_server import (interpreter + uvicorn): "
+              f"{result['before_import_ms']:.0f} ms")
+    print("tts_server import, median ms per phase: "
+          + ", ".join(f"{k} {v:.0f}" for k, v in result["import_phases_ms"].items()))
+    if imports:
+        print("\nslowest imports (cumulative / self ms):")
+        for name, cum, own in imports:
+            print(f"  {name:<32} {cum:8.1f} {own:8.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Cold-start benchmark for the TTS server")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--target-ms", type=float, default=2500,
+                    help="fail if the median time to the first 200 from / exceeds this")
+    ap.add_argument("--pool", type=int, default=0, help="TTS_EDGE_POOL for the server")
+    ap.add_argument("--handshake-ms", type=float, default=150,
+                    help="fake upstream connect time (what warming the pool costs)")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--importtime", type=int, nargs="?", const=15, default=0, metavar="N",
+                    help="also list the N slowest imports (default 15)")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args()
+
+    result = asyncio.run(_main(args))
+    imports = _importtime(args.importtime) if args.importtime else []
+    result["slowest_imports"] = [{"module": n, "cumulative_ms": c, "self_ms": s}
+                                 for n, c, s in imports]
+    _print(result, imports)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    passed = result["live_ms"]["median"] <= args.target_ms
+    print("PASS" if passed else "FAIL: cold start over target")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
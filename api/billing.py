@@ -25,6 +25,7 @@ Required env vars (all must be set for billing to activate):
                             "price_def":{"plan":"pro","cap":60000}}
   SITE_URL                 e.g. https://read-aloud.com  (for success/cancel redirects)
 """
+import hashlib
 import io
 import json
 import os
@@ -42,6 +43,13 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.concurrency import run_in_threadpool
 
+try:
+    from . import billing_store as _billing_store  # loaded as the `api` package
+    from . import http_cache as _http_cache
+except ImportError:
+    import billing_store as _billing_store          # run directly from the api/ dir
+    import http_cache as _http_cache
+
 # ElevenLabs monthly plan fees (cents), by tier name, for the cost side of the P&L.
 ELEVENLABS_PLAN_FEES = {
     "free": 0, "starter": 500, "creator": 2200, "independent_publisher": 2200,
@@ -100,7 +108,16 @@ PREMIUM_TTS_ENABLED = (bool(BILLING_ENABLED and ELEVENLABS_API_KEY)
                        and os.environ.get("PREMIUM_TTS_ENABLED", "1") == "1")
 
 router = APIRouter()
-_db_lock = Lock()
+
+# License DB connections (billing_store.py): one writer plus up to
+# LICENSE_DB_READERS query-only readers, kept open. LICENSE_DB_SYNC=FULL
+# fsyncs every commit (default NORMAL: WAL, fsync at checkpoints).
+LICENSE_DB_READERS = int(os.environ.get("LICENSE_DB_READERS", "4"))
+LICENSE_DB_SYNC = os.environ.get("LICENSE_DB_SYNC", "NORMAL").upper()
+if LICENSE_DB_SYNC not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    LICENSE_DB_SYNC = "NORMAL"
+_store = None
+_store_lock = Lock()
 
 # Cache of public pricing (price amounts fetched from Stripe), refreshed hourly.
 _tiers_cache = {"data": None, "ts": 0.0}
@@ -175,11 +192,16 @@ def _now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 
-def _conn():
-    c = sqlite3.connect(LICENSE_DB, timeout=5)
-    c.execute("PRAGMA busy_timeout=4000")
-    c.row_factory = sqlite3.Row
-    return c
+def _db() -> "_billing_store.BillingStore":
+    """The process's license DB pool (billing_store.py), created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            # Concurrent first requests: one builds the pool, the rest use it.
+            if _store is None:
+                _store = _billing_store.BillingStore(LICENSE_DB, readers=LICENSE_DB_READERS,
+                                                     synchronous=LICENSE_DB_SYNC)
+    return _store
 
 
 def mint_key() -> str:
@@ -190,27 +212,19 @@ def mint_key() -> str:
 def get_license(key: str) -> Optional[dict]:
     if not LICENSE_DB or not key:
         return None
-    with _db_lock:
-        c = _conn()
-        try:
-            row = c.execute("SELECT * FROM licenses WHERE key=?", (key,)).fetchone()
-            return dict(row) if row else None
-        finally:
-            c.close()
+    with _db().reader() as c:
+        row = c.execute("SELECT * FROM licenses WHERE key=?", (key,)).fetchone()
+        return dict(row) if row else None
 
 
 def get_license_by_session(session_id: str) -> Optional[dict]:
     if not LICENSE_DB or not session_id:
         return None
-    with _db_lock:
-        c = _conn()
-        try:
-            row = c.execute(
-                "SELECT * FROM licenses WHERE checkout_session=?", (session_id,)
-            ).fetchone()
-            return dict(row) if row else None
-        finally:
-            c.close()
+    with _db().reader() as c:
+        row = c.execute(
+            "SELECT * FROM licenses WHERE checkout_session=?", (session_id,)
+        ).fetchone()
+        return dict(row) if row else None
 
 
 def upsert_license_for_sub(stripe_sub: str, *, stripe_customer: str, plan: str,
@@ -218,51 +232,75 @@ def upsert_license_for_sub(stripe_sub: str, *, stripe_customer: str, plan: str,
                            checkout_session: Optional[str]) -> str:
     """Create a license for a subscription, or update the existing one.
     Returns the license key. Idempotent on stripe_sub."""
-    with _db_lock:
-        c = _conn()
-        try:
-            existing = c.execute(
-                "SELECT key FROM licenses WHERE stripe_sub=?", (stripe_sub,)
-            ).fetchone()
-            now = _now()
-            if existing:
-                key = existing["key"]
-                c.execute(
-                    "UPDATE licenses SET plan=?, char_cap=?, status=?, "
-                    "stripe_customer=COALESCE(?, stripe_customer), "
-                    "email=COALESCE(?, email), "
-                    "checkout_session=COALESCE(?, checkout_session), "
-                    "updated_at=? WHERE key=?",
-                    (plan, char_cap, status, stripe_customer, email,
-                     checkout_session, now, key),
-                )
-            else:
-                key = mint_key()
-                c.execute(
-                    "INSERT INTO licenses (key, stripe_customer, stripe_sub, "
-                    "checkout_session, email, plan, char_cap, char_used, "
-                    "period_start, status, created_at, updated_at) "
-                    "VALUES (?,?,?,?,?,?,?,0,?,?,?,?)",
-                    (key, stripe_customer, stripe_sub, checkout_session, email,
-                     plan, char_cap, now, status, now, now),
-                )
-            c.commit()
-            return key
-        finally:
-            c.close()
+    with _db().writer() as c:
+        existing = c.execute(
+            "SELECT key FROM licenses WHERE stripe_sub=?", (stripe_sub,)
+        ).fetchone()
+        now = _now()
+        if existing:
+            key = existing["key"]
+            c.execute(
+                "UPDATE licenses SET plan=?, char_cap=?, status=?, "
+                "stripe_customer=COALESCE(?, stripe_customer), "
+                "email=COALESCE(?, email), "
+                "checkout_session=COALESCE(?, checkout_session), "
+                "updated_at=? WHERE key=?",
+                (plan, char_cap, status, stripe_customer, email,
+                 checkout_session, now, key),
+            )
+        else:
+            key = mint_key()
+            c.execute(
+                "INSERT INTO licenses (key, stripe_customer, stripe_sub, "
+                "checkout_session, email, plan, char_cap, char_used, "
+                "period_start, status, created_at, updated_at) "
+                "VALUES (?,?,?,?,?,?,?,0,?,?,?,?)",
+                (key, stripe_customer, stripe_sub, checkout_session, email,
+                 plan, char_cap, now, status, now, now),
+            )
+        return key
 
 
 def set_status_for_sub(stripe_sub: str, status: str) -> None:
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute(
-                "UPDATE licenses SET status=?, updated_at=? WHERE stripe_sub=?",
-                (status, _now(), stripe_sub),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute(
+            "UPDATE licenses SET status=?, updated_at=? WHERE stripe_sub=?",
+            (status, _now(), stripe_sub),
+        )
+
+
+def _debit(c, key: str, n: int) -> tuple:
+    """consume_chars() on an open write transaction."""
+    row = c.execute("SELECT * FROM licenses WHERE key=?", (key,)).fetchone()
+    if not row:
+        return (False, 0, "no_such_key")
+    lic = dict(row)
+    if lic["status"] != "active":
+        return (False, 0, f"status_{lic['status']}")
+    # Monthly period reset
+    try:
+        ps = datetime.fromisoformat(lic["period_start"])
+    except Exception:
+        ps = datetime.now(timezone.utc)
+    now = datetime.now(timezone.utc)
+    used = lic["char_used"]
+    period_start = lic["period_start"]
+    if (now - ps).days >= 30:
+        used = 0
+        period_start = _now()
+    if used + n > lic["char_cap"]:
+        # update reset state even on rejection
+        c.execute(
+            "UPDATE licenses SET char_used=?, period_start=?, updated_at=? WHERE key=?",
+            (used, period_start, _now(), key),
+        )
+        return (False, max(0, lic["char_cap"] - used), "cap_reached")
+    used += n
+    c.execute(
+        "UPDATE licenses SET char_used=?, period_start=?, updated_at=? WHERE key=?",
+        (used, period_start, _now(), key),
+    )
+    return (True, lic["char_cap"] - used, "ok")
 
 
 def consume_chars(key: str, n: int) -> tuple:
@@ -271,43 +309,8 @@ def consume_chars(key: str, n: int) -> tuple:
     Returns (ok: bool, remaining: int, reason: str)."""
     if not LICENSE_DB:
         return (False, 0, "billing_disabled")
-    with _db_lock:
-        c = _conn()
-        try:
-            row = c.execute("SELECT * FROM licenses WHERE key=?", (key,)).fetchone()
-            if not row:
-                return (False, 0, "no_such_key")
-            lic = dict(row)
-            if lic["status"] != "active":
-                return (False, 0, f"status_{lic['status']}")
-            # Monthly period reset
-            try:
-                ps = datetime.fromisoformat(lic["period_start"])
-            except Exception:
-                ps = datetime.now(timezone.utc)
-            now = datetime.now(timezone.utc)
-            used = lic["char_used"]
-            period_start = lic["period_start"]
-            if (now - ps).days >= 30:
-                used = 0
-                period_start = _now()
-            if used + n > lic["char_cap"]:
-                # update reset state even on rejection
-                c.execute(
-                    "UPDATE licenses SET char_used=?, period_start=?, updated_at=? WHERE key=?",
-                    (used, period_start, _now(), key),
-                )
-                c.commit()
-                return (False, max(0, lic["char_cap"] - used), "cap_reached")
-            used += n
-            c.execute(
-                "UPDATE licenses SET char_used=?, period_start=?, updated_at=? WHERE key=?",
-                (used, period_start, _now(), key),
-            )
-            c.commit()
-            return (True, lic["char_cap"] - used, "ok")
-        finally:
-            c.close()
+    with _db().writer() as c:
+        return _debit(c, key, n)
 
 
 def refund_chars(key: str, n: int) -> None:
@@ -315,16 +318,11 @@ def refund_chars(key: str, n: int) -> None:
     we've already debited the quota). Floors char_used at 0."""
     if not LICENSE_DB or n <= 0:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute(
-                "UPDATE licenses SET char_used = MAX(0, char_used - ?), updated_at=? WHERE key=?",
-                (n, _now(), key),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute(
+            "UPDATE licenses SET char_used = MAX(0, char_used - ?), updated_at=? WHERE key=?",
+            (n, _now(), key),
+        )
 
 
 def _today() -> str:
@@ -336,38 +334,65 @@ def daily_spend_check_and_add(n: int) -> tuple:
     PREMIUM_DAILY_CHAR_CAP and add n if under. Returns (ok, today_total)."""
     if not LICENSE_DB:
         return (False, 0)
-    with _db_lock:
-        c = _conn()
-        try:
-            day = _today()
-            row = c.execute("SELECT chars FROM premium_daily WHERE day=?", (day,)).fetchone()
-            cur_total = row["chars"] if row else 0
-            if cur_total + n > PREMIUM_DAILY_CHAR_CAP:
-                return (False, cur_total)
+    with _db().writer() as c:
+        day = _today()
+        row = c.execute("SELECT chars FROM premium_daily WHERE day=?", (day,)).fetchone()
+        cur_total = row["chars"] if row else 0
+        if cur_total + n > PREMIUM_DAILY_CHAR_CAP:
+            return (False, cur_total)
+        c.execute(
+            "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
+            (day, n, n),
+        )
+        return (True, cur_total + n)
+
+
+def daily_spend_refund(n: int) -> None:
+    if not LICENSE_DB or n <= 0:
+        return
+    with _db().writer() as c:
+        c.execute(
+            "UPDATE premium_daily SET chars = MAX(0, chars - ?) WHERE day=?",
+            (n, _today()),
+        )
+
+
+def charge_premium(key: str, n: int) -> tuple:
+    """daily_spend_check_and_add() + consume_chars() in one transaction (one
+    commit per premium request): the daily total only grows if the license
+    is debited. Returns (ok, remaining, reason); reason "daily_cap" when the
+    circuit breaker is what refused."""
+    if not LICENSE_DB:
+        return (False, 0, "billing_disabled")
+    with _db().writer() as c:
+        day = _today()
+        row = c.execute("SELECT chars FROM premium_daily WHERE day=?", (day,)).fetchone()
+        if (row["chars"] if row else 0) + n > PREMIUM_DAILY_CHAR_CAP:
+            return (False, 0, "daily_cap")
+        ok, remaining, reason = _debit(c, key, n)
+        if ok:
             c.execute(
                 "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
                 "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
                 (day, n, n),
             )
-            c.commit()
-            return (True, cur_total + n)
-        finally:
-            c.close()
+        return (ok, remaining, reason)
 
 
-def daily_spend_refund(n: int) -> None:
+def refund_premium(key: str, n: int) -> None:
+    """Undo charge_premium(): refund_chars() + daily_spend_refund(), one commit."""
     if not LICENSE_DB or n <= 0:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute(
-                "UPDATE premium_daily SET chars = MAX(0, chars - ?) WHERE day=?",
-                (n, _today()),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute(
+            "UPDATE licenses SET char_used = MAX(0, char_used - ?), updated_at=? WHERE key=?",
+            (n, _now(), key),
+        )
+        c.execute(
+            "UPDATE premium_daily SET chars = MAX(0, chars - ?) WHERE day=?",
+            (n, _today()),
+        )
 
 
 def daily_trial_check_and_add(n: int) -> tuple:
@@ -375,55 +400,40 @@ def daily_trial_check_and_add(n: int) -> tuple:
     trials can't exhaust the paying-customer cost ceiling. Returns (ok, total)."""
     if not LICENSE_DB:
         return (False, 0)
-    with _db_lock:
-        c = _conn()
-        try:
-            day = "trial:" + _today()
-            row = c.execute("SELECT chars FROM premium_daily WHERE day=?", (day,)).fetchone()
-            cur = row["chars"] if row else 0
-            if cur + n > PREMIUM_TRIAL_DAILY_CAP:
-                return (False, cur)
-            c.execute(
-                "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
-                "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
-                (day, n, n),
-            )
-            c.commit()
-            return (True, cur + n)
-        finally:
-            c.close()
+    with _db().writer() as c:
+        day = "trial:" + _today()
+        row = c.execute("SELECT chars FROM premium_daily WHERE day=?", (day,)).fetchone()
+        cur = row["chars"] if row else 0
+        if cur + n > PREMIUM_TRIAL_DAILY_CAP:
+            return (False, cur)
+        c.execute(
+            "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
+            (day, n, n),
+        )
+        return (True, cur + n)
 
 
 def daily_trial_refund(n: int) -> None:
     if not LICENSE_DB or n <= 0:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute(
-                "UPDATE premium_daily SET chars = MAX(0, chars - ?) WHERE day=?",
-                (n, "trial:" + _today()),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute(
+            "UPDATE premium_daily SET chars = MAX(0, chars - ?) WHERE day=?",
+            (n, "trial:" + _today()),
+        )
 
 
 def bump_event(name: str, n: int = 1) -> None:
     """Increment a Studio-funnel event counter for today."""
     if not LICENSE_DB or not name:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute(
-                "INSERT INTO events (day, name, count) VALUES (?,?,?) "
-                "ON CONFLICT(day, name) DO UPDATE SET count = count + ?",
-                (_today(), name, n, n),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute(
+            "INSERT INTO events (day, name, count) VALUES (?,?,?) "
+            "ON CONFLICT(day, name) DO UPDATE SET count = count + ?",
+            (_today(), name, n, n),
+        )
 
 
 def events_summary(names) -> dict:
@@ -431,18 +441,14 @@ def events_summary(names) -> dict:
     out = {n: {"today": 0, "all": 0} for n in names}
     if not LICENSE_DB:
         return out
-    with _db_lock:
-        c = _conn()
-        try:
-            for r in c.execute("SELECT name, SUM(count) total FROM events GROUP BY name"):
-                if r["name"] in out:
-                    out[r["name"]]["all"] = r["total"] or 0
-            for r in c.execute("SELECT name, count FROM events WHERE day=?", (_today(),)):
-                if r["name"] in out:
-                    out[r["name"]]["today"] = r["count"] or 0
-            return out
-        finally:
-            c.close()
+    with _db().reader() as c:
+        for r in c.execute("SELECT name, SUM(count) total FROM events GROUP BY name"):
+            if r["name"] in out:
+                out[r["name"]]["all"] = r["total"] or 0
+        for r in c.execute("SELECT name, count FROM events WHERE day=?", (_today(),)):
+            if r["name"] in out:
+                out[r["name"]]["today"] = r["count"] or 0
+        return out
 
 
 def daily_counter_add(prefix: str, n: int) -> None:
@@ -450,18 +456,13 @@ def daily_counter_add(prefix: str, n: int) -> None:
     Tracking only — no cap."""
     if not LICENSE_DB or n <= 0:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            day = prefix + _today()
-            c.execute(
-                "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
-                "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
-                (day, n, n),
-            )
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        day = prefix + _today()
+        c.execute(
+            "INSERT INTO premium_daily (day, chars) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET chars = chars + ?",
+            (day, n, n),
+        )
 
 
 def _elevenlabs_tts(text: str, voice_id: str) -> bytes:
@@ -487,30 +488,21 @@ def _elevenlabs_tts(text: str, voice_id: str) -> bytes:
 def get_active_license_by_email(email: str) -> Optional[dict]:
     if not LICENSE_DB or not email:
         return None
-    with _db_lock:
-        c = _conn()
-        try:
-            row = c.execute(
-                "SELECT * FROM licenses WHERE lower(email)=lower(?) AND status='active' "
-                "ORDER BY updated_at DESC LIMIT 1",
-                (email,),
-            ).fetchone()
-            return dict(row) if row else None
-        finally:
-            c.close()
+    with _db().reader() as c:
+        row = c.execute(
+            "SELECT * FROM licenses WHERE lower(email)=lower(?) AND status='active' "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (email,),
+        ).fetchone()
+        return dict(row) if row else None
 
 
 def mark_welcome_emailed(key: str) -> None:
     if not LICENSE_DB:
         return
-    with _db_lock:
-        c = _conn()
-        try:
-            c.execute("UPDATE licenses SET welcome_emailed=1, updated_at=? WHERE key=?",
-                      (_now(), key))
-            c.commit()
-        finally:
-            c.close()
+    with _db().writer() as c:
+        c.execute("UPDATE licenses SET welcome_emailed=1, updated_at=? WHERE key=?",
+                  (_now(), key))
 
 
 def _send_email(to_addr: str, subject: str, text_body: str, html_body: Optional[str] = None) -> bool:
@@ -655,29 +647,29 @@ async def stripe_webhook(request: Request):
     try:
         if etype == "checkout.session.completed":
             email = _sg(_sg(obj, "customer_details") or {}, "email")
-            key = _provision_subscription(
-                stripe, _sg(obj, "subscription"),
+            key = await run_in_threadpool(
+                _provision_subscription, stripe, _sg(obj, "subscription"),
                 customer=_sg(obj, "customer"),
                 email=email,
                 checkout_session=_sg(obj, "id"),
             )
             if key and email:
-                lic = get_license(key)
+                lic = await run_in_threadpool(get_license, key)
                 if lic and not lic.get("welcome_emailed"):
                     sent = await run_in_threadpool(
                         _send_license_email, email, key, lic["plan"], lic["char_cap"])
                     if sent:
-                        mark_welcome_emailed(key)
+                        await run_in_threadpool(mark_welcome_emailed, key)
 
         elif etype in ("customer.subscription.updated", "customer.subscription.created"):
-            _provision_subscription(
-                stripe, _sg(obj, "id"),
+            await run_in_threadpool(
+                _provision_subscription, stripe, _sg(obj, "id"),
                 customer=_sg(obj, "customer"),
                 email=None, checkout_session=None,
             )
 
         elif etype == "customer.subscription.deleted":
-            set_status_for_sub(_sg(obj, "id"), "canceled")
+            await run_in_threadpool(set_status_for_sub, _sg(obj, "id"), "canceled")
 
     except Exception as e:
         # Log full traceback but still 200 so Stripe doesn't hammer retries.
@@ -693,7 +685,12 @@ async def billing_status(key: Optional[str] = None, session_id: Optional[str] =
     success page to hand the freshly-minted key to the buyer)."""
     if not BILLING_ENABLED:
         raise HTTPException(status_code=404, detail="billing not enabled")
-    lic = get_license(key) if key else (get_license_by_session(session_id) if session_id else None)
+    if key:
+        lic = await run_in_threadpool(get_license, key)
+    elif session_id:
+        lic = await run_in_threadpool(get_license_by_session, session_id)
+    else:
+        lic = None
     if not lic:
         raise HTTPException(status_code=404, detail="license not found")
     return {
@@ -731,7 +728,7 @@ async def recover_key(request: Request):
     if now - _recover_guard.get(email.lower(), 0) < 60:
         return generic  # rate-limit repeated requests for the same email
     _recover_guard[email.lower()] = now
-    lic = get_active_license_by_email(email)
+    lic = await run_in_threadpool(get_active_license_by_email, email)
     if lic:
         await run_in_threadpool(_send_license_email, email, lic["key"], lic["plan"], lic["char_cap"])
     return generic
@@ -778,7 +775,7 @@ async def billing_tiers():
 # ----------------------------------------------------------------------
 # Premium TTS (ElevenLabs) — Phase 2
 # ----------------------------------------------------------------------
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import StreamingResponse
 
 # Free preview samples: one short fixed clip per voice, generated once and cached
 # to disk. Lets unlicensed visitors hear a Studio voice before paying. Bounded
@@ -836,11 +833,21 @@ async def premium_voices():
         raise HTTPException(status_code=502, detail=f"could not fetch voices: {e}")
 
 
+def _sample_etag(path: str) -> str:
+    """Strong ETag for a sample file: written once, so name + size + mtime
+    identify its bytes."""
+    st = os.stat(path)
+    return _http_cache.strong_etag(hashlib.sha256(
+        f"{path}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest())
+
+
 @router.get("/api/tts/premium/sample")
-async def premium_sample(voice_id: str):
+async def premium_sample(request: Request, voice_id: str):
     """Free, cached preview clip for one voice. Generated once on first request
     (validated against the real voice list so generation is bounded), then served
-    from disk forever — no per-play cost, no license required."""
+    from disk forever — no per-play cost, no license required.
+    Supports If-None-Match (304) and single byte ranges (206); only plays
+    that start at byte 0 are counted."""
     if not PREMIUM_TTS_ENABLED:
         raise HTTPException(status_code=404, detail="premium tts not enabled")
     if not voice_id:
@@ -851,9 +858,16 @@ async def premium_sample(voice_id: str):
         pass
     if _voices_cache["ids"] and voice_id not in _voices_cache["ids"]:
         raise HTTPException(status_code=400, detail="unknown voice")
-    bump_event("sample_play")  # counts every preview play, cached or not
     safe = voice_id.replace("/", "").replace("..", "").replace("\\", "")
     path = os.path.join(PREMIUM_SAMPLE_DIR, f"{safe}.mp3")
+    headers = {"Cache-Control": "public, max-age=86400"}
+    if os.path.exists(path):
+        etag = _sample_etag(path)
+        unchanged = _http_cache.not_modified(request, etag, headers)
+        if unchanged is not None:
+            return unchanged
+    if not _http_cache.wants_tail(request):
+        await run_in_threadpool(bump_event, "sample_play")  # counts every preview play, cached or not
     if not os.path.exists(path):
         try:
             audio = await run_in_threadpool(_elevenlabs_tts, PREMIUM_SAMPLE_TEXT, voice_id)
@@ -864,10 +878,9 @@ async def premium_sample(voice_id: str):
         os.makedirs(PREMIUM_SAMPLE_DIR, exist_ok=True)
         with open(path, "wb") as f:
             f.write(audio)
-        daily_counter_add("sample:", len(PREMIUM_SAMPLE_TEXT))
+        await run_in_threadpool(daily_counter_add, "sample:", len(PREMIUM_SAMPLE_TEXT))
         print(f"[billing] generated preview sample for voice {voice_id} ({len(audio)} bytes)")
-    return FileResponse(path, media_type="audio/mpeg",
-                        headers={"Cache-Control": "public, max-age=86400"})
+    return _http_cache.file_response(request, path, "audio/mpeg", headers, _sample_etag(path))
 
 
 @router.post("/api/tts/premium/trial")
@@ -902,7 +915,7 @@ async def premium_trial(request: Request):
         raise HTTPException(status_code=429,
                             detail="you've used your free Studio preview — subscribe to keep going")
 
-    ok_day, _total = daily_trial_check_and_add(len(text))
+    ok_day, _total = await run_in_threadpool(daily_trial_check_and_add, len(text))
     if not ok_day:
         raise HTTPException(status_code=503,
                             detail="free previews are at capacity today — try again tomorrow or subscribe")
@@ -910,14 +923,14 @@ async def premium_trial(request: Request):
     try:
         audio = await run_in_threadpool(_elevenlabs_tts, text, voice_id)
     except Exception as e:
-        daily_trial_refund(len(text))
+        await run_in_threadpool(daily_trial_refund, len(text))
         raise HTTPException(status_code=502, detail=f"trial generation failed: {e}")
     if not audio or len(audio) < 100:
-        daily_trial_refund(len(text))
+        await run_in_threadpool(daily_trial_refund, len(text))
         raise HTTPException(status_code=502, detail="empty audio from provider")
 
     _trial_ip_guard[ip] = now  # mark IP used only on a successful generation
-    bump_event("trial_play")
+    await run_in_threadpool(bump_event, "trial_play")
     return StreamingResponse(io.BytesIO(audio), media_type="audio/mpeg",
                              headers={"Content-Disposition": "inline"})
 
@@ -941,7 +954,7 @@ async def track_event(request: Request):
         body = {}
     name = (body.get("name") or "").strip()
     if name in _ALLOWED_EVENTS:
-        bump_event(name)
+        await run_in_threadpool(bump_event, name)
     return {"ok": True}
 
 
@@ -969,16 +982,13 @@ async def premium_tts(request: Request):
         raise HTTPException(status_code=413,
                             detail=f"text too long ({n}); max {PREMIUM_MAX_CHARS_PER_REQUEST} per request")
 
-    # 1) Global daily circuit breaker (protects against runaway cost)
-    ok_day, _total = daily_spend_check_and_add(n)
-    if not ok_day:
-        raise HTTPException(status_code=503,
-                            detail="premium temporarily unavailable (daily capacity reached)")
-
-    # 2) Per-license quota (atomic debit)
-    ok, remaining, reason = consume_chars(key, n)
+    # 1) Global daily circuit breaker (protects against runaway cost) and
+    # 2) per-license quota, debited together in one transaction
+    ok, remaining, reason = await run_in_threadpool(charge_premium, key, n)
     if not ok:
-        daily_spend_refund(n)  # undo the daily add — we're not generating
+        if reason == "daily_cap":
+            raise HTTPException(status_code=503,
+                                detail="premium temporarily unavailable (daily capacity reached)")
         if reason == "no_such_key":
             raise HTTPException(status_code=401, detail="invalid license key")
         if reason == "cap_reached":
@@ -987,16 +997,16 @@ async def premium_tts(request: Request):
 
     # 3) Generate. On failure, refund both counters so the user isn't charged.
     try:
-        audio = _elevenlabs_tts(text, voice_id)
+        audio = await run_in_threadpool(_elevenlabs_tts, text, voice_id)
     except urllib.error.HTTPError as e:
-        refund_chars(key, n); daily_spend_refund(n)
+        await run_in_threadpool(refund_premium, key, n)
         raise HTTPException(status_code=502, detail=f"elevenlabs error {e.code}")
     except Exception as e:
-        refund_chars(key, n); daily_spend_refund(n)
+        await run_in_threadpool(refund_premium, key, n)
         raise HTTPException(status_code=502, detail=f"premium generation failed: {e}")
 
     if not audio or len(audio) < 100:
-        refund_chars(key, n); daily_spend_refund(n)
+        await run_in_threadpool(refund_premium, key, n)
         raise HTTPException(status_code=502, detail="empty audio from provider")
 
     return StreamingResponse(
@@ -1102,8 +1112,7 @@ def _gather_finance() -> dict:
 
     # --- License DB aggregates ---
     try:
-        c = _conn()
-        try:
+        with _db().reader() as c:
             rows = c.execute(
                 "SELECT plan, status, COUNT(*) n, COALESCE(SUM(char_used),0) used "
                 "FROM licenses GROUP BY plan, status ORDER BY plan").fetchall()
@@ -1125,8 +1134,6 @@ def _gather_finance() -> dict:
             out["trials_all"] = tot["trial_all"]
             out["samples_all"] = tot["sample_all"]
             out["samples_today"] = d.get("sample:" + today, 0)
-        finally:
-            c.close()
     except Exception as e:
         out["lic_error"] = str(e)
 
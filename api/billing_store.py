@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Connection pool for the license DB (billing.py).
+
+billing.py used to open a fresh SQLite connection per call, under one
+process-wide lock, so a lookup waited behind every other lookup and behind
+any commit in flight. This keeps long-lived connections instead:
+
+  writer   one connection, used under a lock. SQLite allows one writer at a
+           time anyway; taking it in-process first means waiters queue on
+           the lock instead of spinning in busy_timeout. Every write is one
+           BEGIN IMMEDIATE .. COMMIT, so a read-check-update (quota debit,
+           daily cap) is atomic against other threads and other workers.
+  readers  up to `readers` query-only connections, checked out per read and
+           returned. In WAL mode they read the last committed state while a
+           write is in progress, without taking the writer lock.
+
+synchronous=NORMAL: in WAL mode a commit then doesn't fsync, so it is
+consistent after a crash but a power cut can lose the last few commits (at
+worst a quota debit nobody is charged for). LICENSE_DB_SYNC=FULL restores an
+fsync per commit.
+
+Blocking, like the rest of billing.py's DB helpers: async endpoints call them
+through run_in_threadpool. Connections are per process and opened lazily,
+so a store created before serve.py forks is safe to use in each worker.
+"""
+import contextlib
+import os
+import queue
+import sqlite3
+from threading import Lock
+from typing import Iterator, Optional
+
+
+class BillingStore:
+    def __init__(self, path: str, readers: int = 4, synchronous: str = "NORMAL",
+                 busy_timeout_ms: int = 4000):
+        self._path = path
+        self.readers = max(1, readers)
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self._write_lock = Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._opened = 0
+        self._open_lock = Lock()
+        self._pid = None
+
+    def _connect(self, query_only: bool = False) -> sqlite3.Connection:
+        c = sqlite3.connect(self._path, timeout=self.busy_timeout_ms / 1000,
+                            isolation_level=None, check_same_thread=False)
+        c.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        c.execute(f"PRAGMA synchronous={self.synchronous}")
+        if query_only:
+            c.execute("PRAGMA query_only=ON")
+        c.row_factory = sqlite3.Row
+        return c
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    # Forked child (or first use): the parent's handles are
+                    # not ours to use or close.
+                    self._writer = None
+                    self._idle = queue.LifoQueue()
+                    self._opened = 0
+                    self._pid = os.getpid()
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """A query-only connection; autocommit, so each statement sees the
+        latest commit. Waits for one to come back if all are checked out."""
+        self._check_pid()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._open_lock:
+                grow = self._opened < self.readers
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    conn = self._connect(query_only=True)
+                except Exception:
+                    with self._open_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextlib.contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """The write connection inside BEGIN IMMEDIATE; commits on a clean
+        exit, rolls back on an exception."""
+        self._check_pid()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        if self._pid != os.getpid():
+            return
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cold-start bookkeeping for tts_server.
+
+The free Render plan spins the service down when idle, so the first reader
+after a quiet spell waits for the whole start: interpreter, uvicorn, our
+imports, startup hooks. BootClock makes that path visible:
+
+  mark(phase)    time since the previous mark, called at the end of each
+                 import/init phase at module level ("edge_tts", "fastapi",
+                 "disk cache", ...)
+  event(name)    first time something happened after import (first
+                 response sent, deferred init done, edge pool warm)
+  report()       both, plus how long the process had already been running
+                 before tts_server started importing (interpreter + uvicorn),
+                 in ms; served by /ready and printed once at import
+
+bench_startup.py measures the same path from outside and fails on a
+regression against a target.
+"""
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def _process_age_s() -> Optional[float]:
+    """Seconds since this process started (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks after boot); the command
+            # name before it may contain spaces, so split after its ")".
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class BootClock:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.before_import_s = _process_age_s()
+        self._last = self.t0
+        self.phases: List[Tuple[str, float]] = []
+        self.events: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def event(self, name: str) -> None:
+        self.events.setdefault(name, (time.perf_counter() - self.t0) * 1000)
+
+    def since(self, name: str) -> Optional[float]:
+        """ms from the start of import to event name, or None if it hasn't happened."""
+        return self.events.get(name)
+
+    def import_ms(self) -> float:
+        return sum(ms for _p, ms in self.phases)
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{p} {ms:.0f}" for p, ms in self.phases)
+        return f"import {self.import_ms():.0f} ms ({parts})"
+
+    def report(self) -> dict:
+        return {
+            "before_import_ms": (round(self.before_import_s * 1000)
+                                 if self.before_import_s is not None else None),
+            "import_ms": round(self.import_ms(), 1),
+            "phases": {p: round(ms, 1) for p, ms in self.phases},
+            "events": {k: round(v, 1) for k, v in self.events.items()},
+            "uptime_s": round(time.perf_counter() - self.t0, 1),
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Admission and eviction policies for the in-memory audio cache.
+
+Entries range from a 2 KB snippet to a timed payload of several hundred KB,
+and most keys are seen once: a scan of one-off long texts, or junk pitch
+values that each make a new key. Plain LRU with an entry cap lets either
+flush the working set. The cache (tts_server._AudioCache) owns the bytes and
+the accounting; what lives here only ranks keys:
+
+  FrequencySketch  count-min sketch of recent access counts (TinyLFU): 4
+                   rows of 8-bit counters, all halved every 10 x width
+                   increments so old popularity fades. One per cache, fed by
+                   every lookup, hit or miss.
+  LRU              evict least recently used. Size-blind.
+  GDSF             Greedy-Dual-Size-Frequency: priority L + freq / size,
+                   evict the lowest; L rises to each evicted priority, so
+                   entries that stop being hit age out. Small, popular
+                   entries are kept over large, rarely used ones.
+  TinyLFU          admission: a new entry goes in only if the sketch says it
+                   is more popular than the entry it would evict first.
+                   One-off keys are refused once the budget is full instead
+                   of evicting entries that are being used. A refused fresh
+                   synthesis waits in the cache's small window instead
+                   (tts_server._AudioCache).
+
+POLICIES maps TTS_CACHE_POLICY names to (eviction, admission) pairs.
+memory_budget() derives the cache's byte budget from the container's cgroup
+memory limit. Trace files (TTS_CACHE_TRACE) record one line per access,
+"<key prefix> <bytes> <segment>", for bench_cache.py to replay.
+"""
+import heapq
+import itertools
+import os
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+_MASK64 = (1 << 64) - 1
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_HALVE = bytes(i >> 1 for i in range(256))
+_COUNTER_MAX = 255
+
+
+class FrequencySketch:
+    def __init__(self, width: int = 1 << 14):
+        self.bits = max(4, (width - 1).bit_length())
+        self.width = 1 << self.bits
+        self._rows = [bytearray(self.width) for _ in _SEEDS]
+        self.sample = 10 * self.width
+        self._added = 0
+        self.resets = 0
+
+    def _slots(self, key: str) -> Iterator[int]:
+        h = hash(key) & _MASK64
+        shift = 64 - self.bits
+        return (((h * seed) & _MASK64) >> shift for seed in _SEEDS)
+
+    def increment(self, key: str) -> None:
+        for row, i in zip(self._rows, self._slots(key)):
+            if row[i] < _COUNTER_MAX:
+                row[i] += 1
+        self._added += 1
+        if self._added >= self.sample:
+            self._rows = [row.translate(_HALVE) for row in self._rows]
+            self._added //= 2
+            self.resets += 1
+
+    def estimate(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._slots(key)))
+
+
+class LRU:
+    name = "lru"
+
+    def __init__(self, sketch: Optional[FrequencySketch] = None):
+        self._order: "OrderedDict[str, int]" = OrderedDict()
+
+    def add(self, key: str, size: int) -> None:
+        self._order[key] = size
+
+    def hit(self, key: str, size: int) -> None:
+        self._order[key] = size
+        self._order.move_to_end(key)
+
+    def remove(self, key: str, evicted: bool = False) -> None:
+        self._order.pop(key, None)
+
+    def victims(self, need: int) -> List[str]:
+        """Keys to evict, first to last, until at least need bytes are freed."""
+        out, freed = [], 0
+        for key, size in self._order.items():
+            if freed >= need:
+                break
+            out.append(key)
+            freed += size
+        return out
+
+
+class GDSF:
+    name = "gdsf"
+
+    def __init__(self, sketch: Optional[FrequencySketch] = None):
+        self._sketch = sketch
+        self._heap: List[Tuple[float, int, str]] = []
+        self._prio: dict = {}      # key -> current priority (heap rows that differ are stale)
+        self._meta: dict = {}      # key -> [freq, size]
+        self._seq = itertools.count()
+        self.inflation = 0.0
+
+    def _push(self, key: str) -> None:
+        freq, size = self._meta[key]
+        prio = self.inflation + freq / max(size, 1)
+        self._prio[key] = prio
+        heapq.heappush(self._heap, (prio, next(self._seq), key))
+        if len(self._heap) > 2 * len(self._prio) + 64:
+            self._heap = [(p, s, k) for p, s, k in self._heap if self._prio.get(k) == p]
+            heapq.heapify(self._heap)
+
+    def add(self, key: str, size: int) -> None:
+        # Seed with the sketch's count, so an entry that was refused before
+        # (or evicted and missed again) comes back with its history.
+        freq = max(1, self._sketch.estimate(key)) if self._sketch is not None else 1
+        self._meta[key] = [freq, size]
+        self._push(key)
+
+    def hit(self, key: str, size: int) -> None:
+        meta = self._meta[key]
+        meta[0] += 1
+        meta[1] = size
+        self._push(key)
+
+    def remove(self, key: str, evicted: bool = False) -> None:
+        prio = self._prio.pop(key, None)
+        self._meta.pop(key, None)
+        if evicted and prio is not None:
+            self.inflation = max(self.inflation, prio)
+
+    def victims(self, need: int) -> List[str]:
+        out, popped, freed = [], [], 0
+        while freed < need and self._heap:
+            row = heapq.heappop(self._heap)
+            prio, _seq, key = row
+            if self._prio.get(key) != prio:
+                continue   # stale
+            popped.append(row)
+            out.append(key)
+            freed += self._meta[key][1]
+        for row in popped:   # selection only: the cache calls remove()
+            heapq.heappush(self._heap, row)
+        return out
+
+
+class TinyLFU:
+    name = "tinylfu"
+
+    def __init__(self, sketch: FrequencySketch):
+        self._sketch = sketch
+
+    def admit(self, key: str, victims: List[str]) -> bool:
+        """Whether key beats the eviction candidate, victims[0] (the coldest)."""
+        return self._sketch.estimate(key) > self._sketch.estimate(victims[0])
+
+
+# TTS_CACHE_POLICY name -> (eviction class, admission class or None)
+POLICIES = {
+    "lru": (LRU, None),
+    "gdsf": (GDSF, None),
+    "tinylfu-lru": (LRU, TinyLFU),
+    "tinylfu-gdsf": (GDSF, TinyLFU),
+}
+
+
+def cgroup_memory_limit() -> Optional[int]:
+    """The container's memory limit in bytes (cgroup v2 or v1), or None if
+    there is none or it can't be read."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw == "max":
+            return None
+        try:
+            limit = int(raw)
+        except ValueError:
+            continue
+        # v1 reports "unlimited" as a page-rounded 2**63 - 1.
+        return limit if limit < 1 << 60 else None
+    return None
+
+
+def memory_budget(fraction: float, default: int, floor: int = 8 * 1024 * 1024) -> Tuple[int, str]:
+    """(bytes, where it came from): fraction of the cgroup limit, else default."""
+    limit = cgroup_memory_limit()
+    if limit is None:
+        return default, "default"
+    return max(floor, int(limit * fraction)), f"{fraction:g} of cgroup limit {limit // (1024 * 1024)} MB"
+
+
+class TraceWriter:
+    """Appends "<key[:16]> <bytes> <segment>" lines. One O_APPEND write per
+    line, so workers sharing the file never interleave within a line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def access(self, key: str, size: int, segment: str) -> None:
+        try:
+            os.write(self._fd, f"{key[:16]} {size} {segment}\n".encode())
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def read_trace(path: str) -> Iterator[Tuple[str, int, str]]:
+    with open(path, encoding="ascii", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[1].isdigit():
+                yield parts[0], int(parts[1]), parts[2]
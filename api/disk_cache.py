@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Persistent second-tier audio cache for the TTS server.
+
+Content-addressed: every entry is one file named by the sha256 cache_key the
+server already computes, sharded into 256 subdirectories by the first two hex
+digits. Sits behind the in-process _AudioCache so a deploy, restart or Render
+spin-down no longer throws away every synthesized segment.
+
+  - own byte budget, LRU eviction by file mtime (touched on every hit)
+  - writes are atomic: temp file in the same directory, then os.replace(), so
+    a reader never sees a half-written MP3 and a crash leaves only a *.tmp
+  - hits hand back a PATH, not bytes, so the server can stream the file
+    instead of loading it into a Python bytes object
+
+Blocking filesystem work; call put()/read() from a threadpool.
+"""
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+_HEX = frozenset("0123456789abcdef")
+
+
+def _valid_key(key: str) -> bool:
+    # Keys are sha256 hexdigests. Anything else never touches the filesystem.
+    return len(key) == 64 and all(c in _HEX for c in key)
+
+
+class DiskCache:
+    """Thread-safe content-addressed file cache, capped by total size."""
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._size = 0
+        self._lock = Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._root, key[:2], key)
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from what's on disk (oldest mtime first) and
+        sweep temp files left behind by a crash mid-write."""
+        found = []
+        for shard in os.scandir(self._root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                if not _valid_key(entry.name):
+                    continue
+                st = entry.stat()
+                found.append((st.st_mtime, entry.name, st.st_size))
+        found.sort()
+        with self._lock:
+            for _mtime, key, size in found:
+                self._index[key] = size
+                self._size += size
+            self._evict_locked()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def path_for(self, key: str) -> Optional[str]:
+        """Path of the cached file for key (marking it recently used), or None."""
+        with self._lock:
+            known = key in self._index
+            if known:
+                self._index.move_to_end(key)
+        if not known:
+            return self._adopt(key)
+        path = self._path(key)
+        try:
+            os.utime(path)  # mtime is the recency order across restarts
+        except FileNotFoundError:
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self._size -= size
+            return None
+        return path
+
+    def _adopt(self, key: str) -> Optional[str]:
+        """Pick up a file another process sharing this directory wrote (the
+        multi-worker mode in serve.py): each process keeps its own index."""
+        if not _valid_key(key):
+            return None
+        path = self._path(key)
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return None
+        with self._lock:
+            if key not in self._index:
+                self._index[key] = size
+                self._size += size
+                self._evict_locked()
+            if key not in self._index:
+                return None
+        return path
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: bytes) -> None:
+        if not _valid_key(key) or len(value) > self._max_bytes:
+            return
+        path = self._path(key)
+        shard = os.path.dirname(path)
+        os.makedirs(shard, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=shard, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._size -= old
+            self._index[key] = len(value)
+            self._size += len(value)
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        while self._size > self._max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Warm upstream websocket pool for Edge syntheses.
+
+edge_tts.Communicate opens a brand-new aiohttp session, TCP+TLS connection
+and websocket handshake for every stream() call and tears it down after one
+turn. On a short segment that handshake is a large share of time-to-first-
+byte. EdgePool keeps a few authenticated websockets open and runs each
+synthesis as one more turn (speech.config once, then ssml -> turn.end) on an
+idle socket, speaking the same wire protocol and yielding the same chunk
+dicts as Communicate.stream(), so callers can switch between the two.
+
+  - reuse: a socket goes back to the pool only after a clean turn.end; any
+    error or abandoned stream closes it, so no half-read turn can leak into
+    the next synthesis
+  - stale sockets: if a pooled socket fails before producing anything (the
+    service dropped it, or does not take a second turn), the turn is retried
+    once on a fresh connection. Repeated failures of that kind switch reuse
+    off and the pool degrades to pre-opened single-use sockets, which still
+    takes the handshake off the request path
+  - pre-warming: start() opens the idle sockets up front; a keeper task
+    drops sockets that sat idle or alive too long and tops the pool back up
+    while there has been recent traffic, so the first request after a quiet
+    spell does not pay the handshake either
+
+Built from edge_tts's own protocol helpers (mkssml, ssml_headers_plus_data,
+DRM), so it follows the library's token and header handling. The websocket
+URL can be pointed at fake_edge.py to measure and test this offline.
+"""
+import asyncio
+import json
+import ssl
+import time
+from collections import deque
+from typing import AsyncGenerator, Callable, Optional
+from xml.sax.saxutils import escape, unescape
+
+import aiohttp
+import certifi
+from edge_tts.communicate import (
+    connect_id,
+    date_to_string,
+    get_headers_and_data,
+    mkssml,
+    remove_incompatible_characters,
+    split_text_by_byte_length,
+    ssml_headers_plus_data,
+)
+from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+from edge_tts.data_classes import TTSConfig
+from edge_tts.drm import DRM
+from edge_tts.exceptions import NoAudioReceived, UnexpectedResponse, UnknownResponse, WebSocketError
+
+TICKS_PER_SECOND = 10_000_000
+MP3_BITRATE_BPS = 48_000
+
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+
+class _StaleConnection(Exception):
+    """A pooled socket died before its turn produced anything."""
+
+
+class _Conn:
+    __slots__ = ("ws", "created", "last_used", "turns", "config")
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.created = self.last_used = time.monotonic()
+        self.turns = 0
+        self.config = None  # boundary the last speech.config on this socket asked for
+
+
+class EdgePool:
+    """Pool of open Edge websockets. Single event loop only."""
+
+    def __init__(self, size: int = 4, url: Optional[str] = None,
+                 max_idle_s: float = 30.0, max_age_s: float = 300.0,
+                 max_turns: int = 100, keep_warm_s: float = 600.0,
+                 connect_timeout: int = 10, receive_timeout: int = 60,
+                 first_message_timeout: float = 5.0,
+                 on_connect: Optional[Callable[[float], None]] = None):
+        self.size = size
+        self.url = url or WSS_URL
+        self.max_idle_s = max_idle_s
+        self.max_age_s = max_age_s
+        self.max_turns = max_turns
+        self.keep_warm_s = keep_warm_s
+        self.receive_timeout = receive_timeout
+        # A pooled socket the service has silently stopped serving would
+        # otherwise hang for the full receive_timeout before we retry.
+        self.first_message_timeout = first_message_timeout
+        self.on_connect = on_connect  # called with each handshake's seconds
+        self._timeout = aiohttp.ClientTimeout(total=None, connect=None,
+                                              sock_connect=connect_timeout,
+                                              sock_read=receive_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._idle: "deque[_Conn]" = deque()
+        self._last_traffic = 0.0
+        self._keeper: Optional[asyncio.Task] = None
+        self._topping_up: Optional[asyncio.Task] = None
+        self._closing = set()
+        self.reuse = True
+        self._stale_strikes = 0
+        self.stats = {"connects": 0, "reused": 0, "stale": 0, "failed": 0}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(trust_env=True, timeout=self._timeout)
+        return self._session
+
+    async def start(self) -> None:
+        """Open the idle sockets now and start the keeper."""
+        self._ensure_session()
+        self._last_traffic = time.monotonic()
+        # Shared with the top-up a request may already have scheduled (the
+        # server warms in the background while it starts serving).
+        self._schedule_top_up()
+        await self._topping_up
+        if self._keeper is None:
+            self._keeper = asyncio.create_task(self._keep())
+
+    async def close(self) -> None:
+        if self._keeper is not None:
+            self._keeper.cancel()
+            self._keeper = None
+        while self._idle:
+            await self._idle.popleft().ws.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def _keep(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.max_idle_s / 2))
+            self._prune()
+            if time.monotonic() - self._last_traffic < self.keep_warm_s:
+                await self._top_up()
+
+    def _expired(self, conn: _Conn, now: float) -> bool:
+        return (conn.ws.closed
+                or now - conn.last_used > self.max_idle_s
+                or now - conn.created > self.max_age_s
+                or conn.turns >= self.max_turns)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        keep = deque()
+        while self._idle:
+            conn = self._idle.popleft()
+            if self._expired(conn, now):
+                self._discard(conn)
+            else:
+                keep.append(conn)
+        self._idle = keep
+
+    async def _top_up(self) -> None:
+        missing = self.size - len(self._idle)
+        if missing <= 0:
+            return
+        results = await asyncio.gather(*(self._connect() for _ in range(missing)),
+                                       return_exceptions=True)
+        for conn in results:
+            if isinstance(conn, BaseException):
+                print(f"[tts] edge pool prewarm failed: {conn}")
+            elif len(self._idle) < self.size:
+                self._idle.append(conn)
+            else:
+                self._discard(conn)
+
+    def _schedule_top_up(self) -> None:
+        if self._topping_up is None or self._topping_up.done():
+            self._topping_up = asyncio.create_task(self._top_up())
+
+    # -- connections -------------------------------------------------------
+
+    async def _connect(self) -> _Conn:
+        session = self._ensure_session()
+        t0 = time.perf_counter()
+        for attempt in (0, 1):
+            try:
+                ws = await session.ws_connect(
+                    f"{self.url}&ConnectionId={connect_id()}"
+                    f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+                    f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}",
+                    compress=15,
+                    headers=DRM.headers_with_muid(WSS_HEADERS),
+                    ssl=_SSL_CTX,
+                    receive_timeout=self.receive_timeout,
+                )
+            except aiohttp.ClientResponseError as e:
+                if e.status != 403 or attempt:
+                    raise
+                DRM.handle_client_response_error(e)  # clock skew: fix the token, retry once
+                continue
+            self.stats["connects"] += 1
+            if self.on_connect is not None:
+                self.on_connect(time.perf_counter() - t0)
+            return _Conn(ws)
+        raise AssertionError("unreachable")
+
+    async def _checkout(self) -> tuple:
+        """(conn, pooled): an idle socket if one is usable, else a fresh one."""
+        self._last_traffic = now = time.monotonic()
+        while self._idle:
+            conn = self._idle.pop()  # most recently used: least likely to be stale
+            if self._expired(conn, now):
+                self._discard(conn)
+                continue
+            if len(self._idle) < self.size // 2:
+                self._schedule_top_up()
+            return conn, True
+        self._schedule_top_up()
+        return await self._connect(), False
+
+    def _checkin(self, conn: _Conn) -> None:
+        conn.turns += 1
+        conn.last_used = time.monotonic()
+        if not self.reuse or len(self._idle) >= self.size or self._expired(conn, conn.last_used):
+            self._discard(conn)
+        else:
+            self._idle.append(conn)
+
+    def _discard(self, conn: _Conn) -> None:
+        if conn.ws.closed:
+            return
+        task = asyncio.ensure_future(conn.ws.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    # -- synthesis ---------------------------------------------------------
+
+    async def stream(self, text: str, voice: str, *, rate: str = "+0%", pitch: str = "+0Hz",
+                     volume: str = "+0%", boundary: str = "SentenceBoundary"
+                     ) -> AsyncGenerator[dict, None]:
+        """Drop-in for edge_tts.Communicate(...).stream()."""
+        tc = TTSConfig(voice, rate, volume, pitch, boundary)
+        compensation = 0  # ticks of audio already sent by earlier parts
+        for part in split_text_by_byte_length(escape(remove_incompatible_characters(text)), 4096):
+            audio_bytes = 0
+            async for chunk in self._turn(tc, part, compensation):
+                if chunk["type"] == "audio":
+                    audio_bytes += len(chunk["data"])
+                yield chunk
+            # Same CBR byte count edge_tts uses to line up multi-part offsets.
+            compensation += audio_bytes * 8 * TICKS_PER_SECOND // MP3_BITRATE_BPS
+
+    async def _turn(self, tc: TTSConfig, part: bytes, compensation: int):
+        for attempt in (0, 1):
+            conn, pooled = await self._checkout()
+            served_before = conn.turns > 0
+            produced = clean = False
+            try:
+                async for chunk in self._run_turn(conn, tc, part, compensation, pooled):
+                    produced = True
+                    yield chunk
+                clean = True
+            except (_StaleConnection, aiohttp.ClientConnectionError, ConnectionResetError):
+                if produced or not pooled or attempt:
+                    self.stats["failed"] += 1
+                    raise WebSocketError("Edge websocket closed mid-synthesis")
+                self.stats["stale"] += 1
+                if served_before:
+                    self._stale_strikes += 1
+                if self._stale_strikes >= 3 and self.reuse:
+                    print("[tts] edge pool: upstream drops reused sockets, reuse disabled")
+                    self.reuse = False
+                continue
+            finally:
+                if clean:
+                    self._checkin(conn)
+                else:
+                    self._discard(conn)
+            if served_before:
+                self.stats["reused"] += 1
+                self._stale_strikes = 0
+            return
+
+    async def _run_turn(self, conn: _Conn, tc: TTSConfig, part: bytes, compensation: int,
+                        pooled: bool):
+        ws = conn.ws
+        try:
+            if conn.config != tc.boundary:
+                word = tc.boundary == "WordBoundary"
+                await ws.send_str(
+                    f"X-Timestamp:{date_to_string()}\r\n"
+                    "Content-Type:application/json; charset=utf-8\r\n"
+                    "Path:speech.config\r\n\r\n"
+                    '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+                    f'"sentenceBoundaryEnabled":"{str(not word).lower()}",'
+                    f'"wordBoundaryEnabled":"{str(word).lower()}"'
+                    "},"
+                    '"outputFormat":"audio-24khz-48kbitrate-mono-mp3"'
+                    "}}}}\r\n"
+                )
+                conn.config = tc.boundary
+            await ws.send_str(ssml_headers_plus_data(connect_id(), date_to_string(),
+                                                     mkssml(tc, part)))
+        except (aiohttp.ClientConnectionError, ConnectionResetError, RuntimeError) as e:
+            raise _StaleConnection(str(e))
+
+        audio_was_received = False
+        first = True
+        while True:
+            timeout = self.first_message_timeout if (first and pooled) else None
+            try:
+                received = await ws.receive(timeout=timeout)
+            except asyncio.TimeoutError:
+                if first and pooled:
+                    raise _StaleConnection("no reply on pooled socket")
+                raise
+            first = False
+            if received.type == aiohttp.WSMsgType.TEXT:
+                encoded = received.data.encode("utf-8")
+                parameters, data = get_headers_and_data(encoded, encoded.find(b"\r\n\r\n"))
+                path = parameters.get(b"Path", None)
+                if path == b"audio.metadata":
+                    yield self._parse_metadata(data, compensation)
+                elif path == b"turn.end":
+                    break
+                elif path not in (b"response", b"turn.start"):
+                    raise UnknownResponse("Unknown path received")
+            elif received.type == aiohttp.WSMsgType.BINARY:
+                if len(received.data) < 2:
+                    raise UnexpectedResponse(
+                        "We received a binary message, but it is missing the header length.")
+                header_length = int.from_bytes(received.data[:2], "big")
+                if header_length > len(received.data):
+                    raise UnexpectedResponse(
+                        "The header length is greater than the length of the data.")
+                parameters, data = get_headers_and_data(received.data, header_length)
+                if parameters.get(b"Path") != b"audio":
+                    raise UnexpectedResponse("Received binary message, but the path is not audio.")
+                content_type = parameters.get(b"Content-Type", None)
+                if content_type not in (b"audio/mpeg", None):
+                    raise UnexpectedResponse(
+                        "Received binary message, but with an unexpected Content-Type.")
+                if content_type is None:
+                    if not data:
+                        continue
+                    raise UnexpectedResponse(
+                        "Received binary message with no Content-Type, but with data.")
+                if not data:
+                    raise UnexpectedResponse(
+                        "Received binary message, but it is missing the audio data.")
+                audio_was_received = True
+                yield {"type": "audio", "data": data}
+            elif received.type == aiohttp.WSMsgType.ERROR:
+                raise WebSocketError(str(received.data) if received.data else "Unknown error")
+            elif received.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                   aiohttp.WSMsgType.CLOSED):
+                raise _StaleConnection("socket closed")
+
+        if not audio_was_received:
+            raise NoAudioReceived(
+                "No audio was received. Please verify that your parameters are correct.")
+
+    @staticmethod
+    def _parse_metadata(data: bytes, compensation: int) -> dict:
+        for meta in json.loads(data)["Metadata"]:
+            kind = meta["Type"]
+            if kind in ("WordBoundary", "SentenceBoundary"):
+                return {
+                    "type": kind,
+                    "offset": meta["Data"]["Offset"] + compensation,
+                    "duration": meta["Data"]["Duration"],
+                    "text": unescape(meta["Data"]["text"]["Text"]),
+                }
+            if kind == "SessionEnd":
+                continue
+            raise UnknownResponse(f"Unknown metadata type: {kind}")
+        raise UnexpectedResponse("No WordBoundary metadata found")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Edge read-aloud websocket, for offline tests and
+benchmarks of edge_pool.py (and anything else that speaks the protocol).
+
+Speaks the subset of the wire protocol edge_tts uses: speech.config, then
+any number of ssml turns per connection, each answered with turn.start,
+interleaved audio / audio.metadata messages and turn.end. Audio is fake but
+shaped like the real thing: 1440 bytes (240 ms at 48 kbps) per word, and
+WordBoundary offsets that agree with that byte count.
+
+The handshake delay stands in for DNS + TCP + TLS + websocket upgrade, which
+is what a warm pool saves; first_byte_ms is the service's own think time,
+which it does not. For load tests (bench_load.py) the think time can be
+jittered, audio can be paced per word the way Edge streams it, and a
+fraction of turns can be failed by dropping the socket part-way through.
+
+    python api/fake_edge.py --port 8766 --handshake-ms 150
+    python api/fake_edge.py --first-byte-ms 150 --jitter-ms 100 --chunk-ms 5 --fail-rate 0.02
+    TTS_EDGE_WSS_URL='ws://127.0.0.1:8766/edge/v1?TrustedClientToken=x' TTS_EDGE_POOL=4 ...
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from xml.sax.saxutils import unescape
+
+from aiohttp import WSMsgType, web
+
+BYTES_PER_WORD = 1440
+TICKS_PER_WORD = BYTES_PER_WORD * 8 * 10_000_000 // 48_000
+
+_PROSODY_RE = re.compile(r"<prosody[^>]*>(.*)</prosody>", re.S)
+
+
+def _headers(raw: str) -> tuple:
+    head, _, body = raw.partition("\r\n\r\n")
+    headers = dict(line.split(":", 1) for line in head.split("\r\n") if ":" in line)
+    return headers, body
+
+
+def fake_audio(word: str) -> bytes:
+    """Deterministic stand-in audio for one word."""
+    seed = hashlib.sha256(word.encode()).digest()
+    return (seed * (BYTES_PER_WORD // len(seed) + 1))[:BYTES_PER_WORD]
+
+
+def _audio_message(request_id: str, data: bytes) -> bytes:
+    header = (f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\n"
+              "Path:audio\r\n").encode()
+    return len(header).to_bytes(2, "big") + header + data
+
+
+def _text_message(request_id: str, path: str, body: str = "") -> str:
+    return (f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+            f"Path:{path}\r\n\r\n{body}")
+
+
+class FakeEdge:
+    """aiohttp app plus counters. turns_per_connection=1 mimics a service that
+    closes the socket after every turn.
+
+    jitter_ms adds uniform(0, jitter_ms) to each turn's think time; chunk_ms
+    is the gap between successive words' audio; fail_rate is the fraction of
+    turns whose socket is closed after about half of their audio."""
+
+    def __init__(self, handshake_ms: float = 100, first_byte_ms: float = 20,
+                 turns_per_connection: int = 0, jitter_ms: float = 0,
+                 chunk_ms: float = 0, fail_rate: float = 0, seed: int = 0):
+        self.handshake_ms = handshake_ms
+        self.first_byte_ms = first_byte_ms
+        self.turns_per_connection = turns_per_connection
+        self.jitter_ms = jitter_ms
+        self.chunk_ms = chunk_ms
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self.connections = 0
+        self.turns = 0
+        self.failures = 0
+        self.app = web.Application()
+        self.app.router.add_get("/edge/v1", self._ws)
+        self._runner = None
+        self.port = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{self.port}/edge/v1?TrustedClientToken=fake"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        await asyncio.sleep(self.handshake_ms / 1000)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        word_boundary = False
+        served = 0
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            headers, body = _headers(msg.data)
+            path = headers.get("Path")
+            if path == "speech.config":
+                opts = json.loads(body)["context"]["synthesis"]["audio"]["metadataoptions"]
+                word_boundary = opts.get("wordBoundaryEnabled") == "true"
+            elif path == "ssml":
+                try:
+                    if not await self._turn(ws, headers.get("X-RequestId", ""), body,
+                                            word_boundary):
+                        break
+                except ConnectionResetError:   # client hung up mid-turn (a cancelled hedge)
+                    break
+                served += 1
+                if self.turns_per_connection and served >= self.turns_per_connection:
+                    await ws.close()
+                    break
+        return ws
+
+    async def _turn(self, ws, request_id: str, ssml: str, word_boundary: bool) -> bool:
+        """Serve one turn; False if it was failed on purpose (socket closed)."""
+        self.turns += 1
+        m = _PROSODY_RE.search(ssml)
+        words = unescape(m.group(1)).split() if m else []
+        fail_at = -1
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            fail_at = len(words) // 2
+        await asyncio.sleep((self.first_byte_ms + self._rng.uniform(0, self.jitter_ms)) / 1000)
+        await ws.send_str(_text_message(request_id, "turn.start", "{}"))
+        for i, word in enumerate(words):
+            if i == fail_at:
+                self.failures += 1
+                await ws.close()
+                return False
+            if i and self.chunk_ms:
+                await asyncio.sleep(self.chunk_ms / 1000)
+            if word_boundary:
+                meta = {"Metadata": [{"Type": "WordBoundary", "Data": {
+                    "Offset": i * TICKS_PER_WORD, "Duration": TICKS_PER_WORD,
+                    "text": {"Text": word, "Length": len(word), "BoundaryType": "WordBoundary"}}}]}
+                await ws.send_str(_text_message(request_id, "audio.metadata", json.dumps(meta)))
+            await ws.send_bytes(_audio_message(request_id, fake_audio(word)))
+        await ws.send_str(_text_message(request_id, "turn.end", "{}"))
+        return True
+
+
+async def _main(args) -> None:
+    fake = FakeEdge(args.handshake_ms, args.first_byte_ms, args.turns_per_connection,
+                    args.jitter_ms, args.chunk_ms, args.fail_rate, args.seed)
+    url = await fake.start(args.host, args.port)
+    print(f"fake edge listening: {url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--handshake-ms", type=float, default=100)
+    ap.add_argument("--first-byte-ms", type=float, default=20)
+    ap.add_argument("--turns-per-connection", type=int, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--chunk-ms", type=float, default=0)
+    ap.add_argument("--fail-rate", type=float, default=0)
+    ap.add_argument("--seed", type=int, default=0)
+    try:
+        asyncio.run(_main(ap.parse_args()))
+    except KeyboardInterrupt:
+        pass
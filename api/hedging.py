@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Phase deadlines and hedging for one upstream synthesis stream.
+
+A flat timeout around the whole synthesis lets a websocket that never sends
+audio hold the reader for the full minute. hedged_stream() instead watches
+the stream in phases:
+
+  first audio  the first audio chunk must arrive by first_deadline seconds
+               (the caller scales it with text length); FirstByteTimeout
+               otherwise
+  chunk gap    after that, each chunk must follow the previous one within
+               gap seconds; ChunkGapTimeout otherwise
+
+and, if hedge_after is given and no audio has arrived by then, opens a
+second stream for the same request (if may_hedge() agrees). Whichever
+stream delivers audio first is the one used; the other is cancelled, which
+closes its websocket. If one fails before audio the other carries on.
+
+Each candidate stream runs in its own task and feeds one queue, so the
+websocket generators are only ever driven by the task that opened them.
+Both timeouts subclass asyncio.TimeoutError, so callers that map timeouts
+to 504 keep doing so.
+
+LatencyWindow supplies hedge_after: the p95 of recent first-byte times.
+"""
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from typing import AsyncGenerator, Callable, Optional
+
+_END = object()
+
+
+class FirstByteTimeout(asyncio.TimeoutError):
+    pass
+
+
+class ChunkGapTimeout(asyncio.TimeoutError):
+    pass
+
+
+class LatencyWindow:
+    """Quantile of the last `size` samples, recomputed every `every`
+    observations; None until there are min_samples."""
+
+    def __init__(self, size: int = 200, q: float = 0.95, min_samples: int = 20, every: int = 10):
+        self._samples: "deque[float]" = deque(maxlen=size)
+        self.q = q
+        self.min_samples = min_samples
+        self.every = every
+        self._since = 0
+        self._value: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since += 1
+        if self._since >= self.every or (self._value is None
+                                         and len(self._samples) >= self.min_samples):
+            self._since = 0
+            if len(self._samples) >= self.min_samples:
+                ordered = sorted(self._samples)
+                self._value = ordered[min(len(ordered) - 1, math.ceil(self.q * len(ordered)) - 1)]
+
+    def quantile(self) -> Optional[float]:
+        return self._value
+
+
+async def _pump(index: int, open_stream: Callable, queue: asyncio.Queue) -> None:
+    try:
+        stream = open_stream()
+        async with contextlib.aclosing(stream):
+            async for chunk in stream:
+                queue.put_nowait((index, chunk))
+        queue.put_nowait((index, _END))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        queue.put_nowait((index, e))
+
+
+async def hedged_stream(open_stream: Callable[[], AsyncGenerator[dict, None]], *,
+                        first_deadline: float, gap: float,
+                        hedge_after: Optional[float] = None,
+                        may_hedge: Callable[[], bool] = lambda: True,
+                        on_hedge: Optional[Callable[[str], None]] = None,
+                        is_first: Callable[[dict], bool] = lambda c: c["type"] == "audio"
+                        ) -> AsyncGenerator[dict, None]:
+    """Chunks of open_stream(), under the deadlines above. on_hedge is called
+    with "launched" when a hedge starts, then with "hedge" or "primary" for
+    the stream that won (nothing more if both fail)."""
+    queue: asyncio.Queue = asyncio.Queue()
+    tasks = [asyncio.create_task(_pump(0, open_stream, queue))]
+    failed: dict = {}
+    pending = {0: []}           # candidate -> chunks received before its first audio
+    start = time.perf_counter()
+    hedge_at = start + hedge_after if hedge_after is not None else None
+    winner = None
+    try:
+        while winner is None:
+            now = time.perf_counter()
+            wake = start + first_deadline
+            if hedge_at is not None:
+                wake = min(wake, hedge_at)
+            try:
+                index, item = await asyncio.wait_for(queue.get(), max(0.0, wake - now))
+            except asyncio.TimeoutError:
+                if hedge_at is not None and time.perf_counter() >= hedge_at:
+                    hedge_at = None
+                    if may_hedge():
+                        tasks.append(asyncio.create_task(_pump(1, open_stream, queue)))
+                        pending[1] = []
+                        if on_hedge is not None:
+                            on_hedge("launched")
+                    continue
+                raise FirstByteTimeout(f"no audio from upstream within {first_deadline:.1f}s")
+            if isinstance(item, Exception):
+                failed[index] = item
+                pending.pop(index, None)
+                if not pending:
+                    raise failed[0] if 0 in failed else item
+                continue
+            if item is _END or is_first(item):
+                winner = index
+            if item is not _END:
+                pending[index].append(item)
+        if len(tasks) > 1 and on_hedge is not None:
+            on_hedge("hedge" if winner == 1 else "primary")
+        for index, task in enumerate(tasks):
+            if index != winner:
+                task.cancel()
+        for chunk in pending[winner]:
+            yield chunk
+        if item is _END:
+            return
+
+        while True:
+            try:
+                index, item = await asyncio.wait_for(queue.get(), gap)
+            except asyncio.TimeoutError:
+                raise ChunkGapTimeout(f"upstream stalled for {gap:.1f}s mid-synthesis") from None
+            if index != winner:
+                continue        # left over from the cancelled stream
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+HTTP validators and byte ranges for audio served as a plain resource
+(GET /api/tts as an <audio src>, /api/tts/premium/sample).
+
+A synthesis is addressed by its cache key (a hash of everything that went
+into it), so the key makes a strong ETag: the same key always names the same
+clip. With it:
+
+  - If-None-Match that matches answers 304 without touching any cache.
+  - Range: bytes=... answers 206 with that slice of the cached bytes (or
+    of the disk-cache file, read from an offset, never loaded whole), so
+    media elements can seek without refetching the clip. One range per
+    request; multiple ranges get the whole body, which RFC 9110 allows.
+  - If-Range with a different validator gets the whole body.
+
+Every response carries ETag, Accept-Ranges and (for bodies we hold) a
+Content-Length.
+"""
+import os
+import re
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+_FILE_CHUNK = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def strong_etag(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, etag: str, headers: dict) -> Optional[Response]:
+    """304 if If-None-Match matches etag (weak comparison), else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() != "*" and _opaque(etag) not in (_opaque(t) for t in header.split(",")):
+        return None
+    keep = {k: v for k, v in headers.items()
+            if k.lower() in ("cache-control", "vary", "content-location", "expires")}
+    return Response(status_code=304, headers={**keep, "ETag": etag})
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """(start, end) inclusive for a single satisfiable byte range, or None to
+    send the whole body. Raises RangeNotSatisfiable."""
+    if not header:
+        return None
+    m = _RANGE_RE.fullmatch(header.replace(" ", ""))
+    if m is None:
+        return None   # other units, multiple ranges or garbage: whole body
+    first, last = m.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    elif last:
+        start, end = max(0, size - int(last)), size - 1
+        if int(last) == 0:
+            raise RangeNotSatisfiable()
+    else:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def requested_range(request: Request, etag: str, size: int) -> Optional[tuple]:
+    """parse_range for this request, honouring If-Range."""
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    return parse_range(request.headers.get("range"), size)
+
+
+def wants_tail(request: Request) -> bool:
+    """True if the request asks for anything but the whole body from byte 0
+    (media elements open with "bytes=0-", which a streamed 200 satisfies)."""
+    header = request.headers.get("range")
+    return bool(header) and header.replace(" ", "") != "bytes=0-"
+
+
+def _unsatisfiable(size: int, etag: str) -> Response:
+    return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", "ETag": etag,
+                                              "Accept-Ranges": "bytes"})
+
+
+def bytes_response(request: Request, data: bytes, media_type: str, headers: dict,
+                   etag: str) -> Response:
+    """Whole body or a 206 slice of data."""
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    try:
+        rng = requested_range(request, etag, len(data))
+    except RangeNotSatisfiable:
+        return _unsatisfiable(len(data), etag)
+    if rng is None:
+        return Response(data, media_type=media_type, headers=headers)
+    start, end = rng
+    return Response(data[start:end + 1], status_code=206, media_type=media_type,
+                    headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(data)}"})
+
+
+def file_response(request: Request, path: str, media_type: str, headers: dict, etag: str,
+                  background=None) -> Response:
+    """Whole file or a 206 slice read from an offset (never loaded whole)."""
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    size = os.stat(path).st_size
+    try:
+        rng = requested_range(request, etag, size)
+    except RangeNotSatisfiable:
+        return _unsatisfiable(size, etag)
+    if rng is None:
+        # Our ETag overrides FileResponse's mtime-based one, so newer
+        # Starlette's own If-Range/multi-range handling agrees with ours.
+        return FileResponse(path, media_type=media_type, headers=headers, background=background)
+    start, end = rng
+
+    def _slice():
+        with open(path, "rb") as f:
+            f.seek(start)
+            left = end + 1 - start
+            while left > 0:
+                chunk = f.read(min(_FILE_CHUNK, left))
+                if not chunk:
+                    break
+                left -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(
+        _slice(), status_code=206, media_type=media_type, background=background,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}",
+                 "Content-Length": str(end + 1 - start)})
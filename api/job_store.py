@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+SQLite store for long-document synthesis jobs (/api/tts/jobs).
+
+A job is one submitted document split into segments with absolute
+[start, end) character offsets. Each segment row holds its state and, once
+synthesized, the binary timed payload (the same bytes audio_cache keeps for
+/api/tts/timed). Results survive until the job expires, so a client can
+re-poll, resume a stream, or fetch from another worker under serve.py.
+
+The document text itself is never written here (same rule as the usage
+telemetry: no text content on disk); it lives only in the memory of the
+worker running the job. A job that was running when its process died is
+marked "interrupted" at the next startup; resubmitting it is cheap because
+every finished segment is a cache hit.
+
+Blocking sqlite calls; run them from a threadpool. Each process opens its own
+connection lazily, so an instance can be created before fork.
+"""
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Optional
+
+# Job states. Segment states are "pending", "done" and "failed".
+RUNNING, DONE, FAILED, CANCELLED, INTERRUPTED = (
+    "running", "done", "failed", "cancelled", "interrupted")
+
+
+class JobStore:
+    def __init__(self, path: str, ttl_s: float = 24 * 3600):
+        self._path = path
+        self.ttl_s = ttl_s
+        self._conn_ = None
+        self._conn_pid = None
+        self._lock = Lock()
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tts_jobs ("
+                "id TEXT PRIMARY KEY, created REAL NOT NULL, updated REAL NOT NULL, "
+                "pid INTEGER NOT NULL, state TEXT NOT NULL, voice TEXT NOT NULL, "
+                "chars INTEGER NOT NULL, segments INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tts_job_segments ("
+                "job_id TEXT NOT NULL, idx INTEGER NOT NULL, start INTEGER NOT NULL, "
+                "end INTEGER NOT NULL, state TEXT NOT NULL, error TEXT, payload BLOB, "
+                "PRIMARY KEY (job_id, idx))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tts_jobs_created ON tts_jobs(created)")
+            conn.commit()
+        finally:
+            conn.close()  # never carry an open sqlite handle across fork
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._conn_pid != os.getpid():
+            self._conn_ = sqlite3.connect(self._path, timeout=5.0, isolation_level=None,
+                                          check_same_thread=False)
+            self._conn_.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn_
+
+    def create(self, job_id: str, voice: str, chars: int, spans: list) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN")
+            try:
+                conn.execute("INSERT INTO tts_jobs (id, created, updated, pid, state, voice, "
+                             "chars, segments) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (job_id, now, now, os.getpid(), RUNNING, voice, chars, len(spans)))
+                conn.executemany(
+                    "INSERT INTO tts_job_segments (job_id, idx, start, end, state) "
+                    "VALUES (?, ?, ?, ?, 'pending')",
+                    [(job_id, i, s, e) for i, (s, e) in enumerate(spans)])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def job(self, job_id: str) -> Optional[dict]:
+        """Job row plus done/failed counts, or None if unknown or expired."""
+        with self._lock:
+            conn = self._conn()
+            row = conn.execute("SELECT created, updated, pid, state, voice, chars, segments "
+                               "FROM tts_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_s:
+                return None
+            counts = dict(conn.execute(
+                "SELECT state, COUNT(*) FROM tts_job_segments WHERE job_id = ? GROUP BY state",
+                (job_id,)).fetchall())
+        created, updated, pid, state, voice, chars, segments = row
+        return {"id": job_id, "state": state, "voice": voice, "chars": chars,
+                "segments": segments, "done": counts.get("done", 0),
+                "failed": counts.get("failed", 0), "created": created, "updated": updated,
+                "pid": pid}
+
+    def segments(self, job_id: str, first: int = 0) -> list:
+        """[(idx, start, end, state, error)] from index `first` on, no payloads."""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT idx, start, end, state, error FROM tts_job_segments "
+                "WHERE job_id = ? AND idx >= ? ORDER BY idx", (job_id, first)).fetchall()
+
+    def segment(self, job_id: str, idx: int) -> Optional[tuple]:
+        """(start, end, state, error, payload) or None."""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT start, end, state, error, payload FROM tts_job_segments "
+                "WHERE job_id = ? AND idx = ?", (job_id, idx)).fetchone()
+
+    def finish_segment(self, job_id: str, idx: int, payload: bytes) -> None:
+        self._set_segment(job_id, idx, "done", None, payload)
+
+    def fail_segment(self, job_id: str, idx: int, error: str) -> None:
+        self._set_segment(job_id, idx, "failed", error, None)
+
+    def _set_segment(self, job_id, idx, state, error, payload) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN")
+            try:
+                conn.execute("UPDATE tts_job_segments SET state = ?, error = ?, payload = ? "
+                             "WHERE job_id = ? AND idx = ?", (state, error, payload, job_id, idx))
+                conn.execute("UPDATE tts_jobs SET updated = ? WHERE id = ?", (now, job_id))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def set_state(self, job_id: str, state: str, only_if: Optional[str] = None) -> bool:
+        """Move the job to state (only from state only_if, if given)."""
+        sql = "UPDATE tts_jobs SET state = ?, updated = ? WHERE id = ?"
+        args = [state, time.time(), job_id]
+        if only_if is not None:
+            sql += " AND state = ?"
+            args.append(only_if)
+        with self._lock:
+            return self._conn().execute(sql, args).rowcount > 0
+
+    def interrupt_orphans(self, alive) -> int:
+        """At startup: mark running jobs whose owner process is gone as
+        interrupted. alive(pid) -> bool. Returns how many were marked."""
+        with self._lock:
+            conn = self._conn()
+            rows = conn.execute("SELECT id, pid FROM tts_jobs WHERE state = ?",
+                                (RUNNING,)).fetchall()
+            # Our own pid can only show up here as a leftover from an earlier
+            # process that had it (containers restart as the same pid).
+            dead = [(INTERRUPTED, time.time(), job_id) for job_id, pid in rows
+                    if pid == os.getpid() or not alive(pid)]
+            conn.executemany("UPDATE tts_jobs SET state = ?, updated = ? WHERE id = ?", dead)
+            return len(dead)
+
+    def sweep(self) -> int:
+        """Delete expired jobs and their segments. Returns jobs deleted."""
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM tts_job_segments WHERE job_id IN "
+                             "(SELECT id FROM tts_jobs WHERE created < ?)", (cutoff,))
+                n = conn.execute("DELETE FROM tts_jobs WHERE created < ?", (cutoff,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return n
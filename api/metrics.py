@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process metrics registry, rendered in the Prometheus text format
+(version 0.0.4) for the server's /metrics endpoint.
+
+No prometheus_client dependency: the server needs three metric kinds and
+the hot path should cost a dict lookup and an integer add.
+
+  Counter    monotonically increasing, per label set
+  Histogram  fixed upper bounds; observe() is one bisect + two adds
+  Gauge      read at scrape time from a callback, so values that already
+             live somewhere (cache bytes, queue depth) are never duplicated
+
+Updates are plain Python arithmetic meant for the event-loop thread; a
+scrape that races an update may be off by one observation, never corrupt.
+Each process keeps its own registry (under serve.py every worker reports
+only its own traffic).
+"""
+import bisect
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Seconds. Covers a sub-millisecond memory hit up to SYNTH_TIMEOUT_S.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        registry.register(self)
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, registry, name, help, labels=()):
+        super().__init__(registry, name, help, labels)
+        self._values: Dict[tuple, float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, *labels, n: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + n
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> str:
+        return self.header() + "".join(
+            f"{self.name}{_labels(self.labelnames, k)} {_num(v)}\n"
+            for k, v in sorted(self._values.items()))
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self._bounds = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # labels -> [per-bucket counts..., +Inf, sum]
+
+    def observe(self, value: float, *labels) -> None:
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [0] * (len(self._bounds) + 1) + [0.0]
+        s[bisect.bisect_left(self._bounds, value)] += 1
+        s[-1] += value
+
+    def time(self, *labels) -> "_Timer":
+        """Context manager observing the block's wall time in seconds."""
+        return _Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        s = self._series.get(labels)
+        return sum(s[:-1]) if s else 0
+
+    def render(self) -> str:
+        out = [self.header()]
+        for k, s in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self._bounds + (float("inf"),), s[:-1]):
+                cumulative += n
+                le = 'le="%s"' % _num(bound)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le)} {cumulative}\n")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {s[-1]!r}\n")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {cumulative}\n")
+        return "".join(out)
+
+
+class _Timer:
+    __slots__ = ("_h", "_labels", "_t0")
+
+    def __init__(self, h: Histogram, labels: tuple):
+        self._h = h
+        self._labels = labels
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._h.observe(time.perf_counter() - self._t0, *self._labels)
+        return False
+
+
+class Gauge(_Metric):
+    """Read at scrape time. fn returns a number, or {label tuple: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, registry, name, help, fn: Callable, labels=(), kind: Optional[str] = None):
+        super().__init__(registry, name, help, labels)
+        self._fn = fn
+        if kind:
+            self.kind = kind  # "counter" for totals that are kept elsewhere
+
+    def render(self) -> str:
+        try:
+            v = self._fn()
+        except Exception:
+            return ""  # a broken callback must not take /metrics down
+        if v is None:
+            return ""
+        items = v.items() if isinstance(v, dict) else [((), v)]
+        return self.header() + "".join(
+            f"{self.name}{_labels(self.labelnames, k)} {_num(n)}\n" for k, n in items)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return Counter(self, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return Histogram(self, name, help, labels, buckets)
+
+    def gauge(self, name, help, fn, labels=(), kind=None) -> Gauge:
+        return Gauge(self, name, help, fn, labels, kind)
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Offline bulk synthesis: pre-render documents to MP3 plus word timings.
+
+Runs the server's own synthesis path in-process (tts_server._timed_payload:
+segment cache, disk cache, Edge pool, scheduler, _map_word_offsets), so no
+HTTP, origin check or rate limit is involved and everything it synthesizes
+lands in the server's cache.
+
+    python api/prerender.py articles/ -o audio/
+    python api/prerender.py guide-*.html -o audio/guides --voice en-GB-SoniaNeural
+    python api/prerender.py docs/ -o audio/ --cache-dir /var/cache/tts -j 4 -c 6
+
+Inputs are files or directories (searched recursively) of .txt, .md/.markdown
+and .html/.htm. HTML is reduced to its <main> content when there is one,
+without scripts, styles, navigation or site header/footer; Markdown loses its
+front matter, code blocks and markup. For every input, OUT/<relative path>
+gets:
+
+    <name>.mp3    the whole document, segment audio concatenated (CBR frames)
+    <name>.json   {"source", "hash", "voice", "text", "duration_ms",
+                   "words": [[t_ms, char_offset], ...],
+                   "segments": [{"start", "end", "t_ms"}, ...]}
+
+Char offsets index "text", the extracted speakable text. Segments follow
+segmentTextWithOffsets in readaloud.js at --segment-chars (default
+SEGMENT_CHARS, 1200), so the reader's own requests for that text are cache
+hits once the cache is shared with the server.
+
+Resumable: the .json is written last, and records a hash of the extracted
+text, voice and segment size; an input whose hash matches is skipped
+(--force re-renders). Within an interrupted document, finished segments
+come back from the cache.
+
+Parallelism: -j worker processes, each with -c segments in flight (also its
+upstream concurrency limit). --cache-dir (default TTS_DISK_CACHE_DIR) is the
+disk cache to fill; point the server at the same directory. Without one,
+results only live in this process's memory cache.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+FORMAT = 1
+EXTENSIONS = (".txt", ".md", ".markdown", ".html", ".htm")
+
+# ----------------------------------------------------------------------
+# Text extraction
+# ----------------------------------------------------------------------
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+              "form", "button", "select", "iframe", "head"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+              "source", "track", "wbr"}
+_BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "dl", "dt", "dd", "h1", "h2", "h3", "h4", "h5",
+               "h6", "blockquote", "pre", "table", "tr", "td", "th", "section", "article",
+               "main", "aside", "figure", "figcaption", "details", "summary", "br", "hr"}
+_TERMINAL = ".!?:;…。！？"
+
+
+class _HTMLText(HTMLParser):
+    """Collects block-separated text, skipping non-content elements. <main>
+    inside <header>/<footer> is unusual enough to ignore; a page header
+    inside <main> (the guides' title block) is kept."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = {False: [], True: []}   # outside / inside <main>
+        self._buf = []
+        self._skip = 0
+        self._main = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            if tag in _BLOCK_TAGS:
+                self._flush()
+            return
+        if self._skip or (tag in _SKIP_TAGS and not (tag == "header" and self._main)):
+            self._skip += 1
+            return
+        if tag == "main":
+            self._flush()
+            self._main += 1
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        if self._skip:
+            self._skip -= 1
+            return
+        if tag in _BLOCK_TAGS or tag == "main":
+            self._flush()
+        if tag == "main" and self._main:
+            self._main -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def _flush(self):
+        block = " ".join("".join(self._buf).split())
+        self._buf = []
+        if block:
+            self.blocks[self._main > 0].append(block)
+
+
+def _join_blocks(blocks: list) -> str:
+    """One paragraph per block; blocks without closing punctuation (headings,
+    list items) get a period so they are read, and segmented, as sentences."""
+    return "\n\n".join(b if b[-1] in _TERMINAL else b + "." for b in blocks)
+
+
+def html_text(source: str) -> str:
+    parser = _HTMLText()
+    parser.feed(source)
+    parser.close()
+    parser._flush()
+    return _join_blocks(parser.blocks[True] or parser.blocks[False])
+
+
+_MD_FRONT_MATTER = re.compile(r"\A---\s*\n.*?\n---\s*\n", re.S)
+_MD_FENCE = re.compile(r"^(```|~~~).*?^\1[^\n]*$", re.S | re.M)
+_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)|\[([^\]]+)\]\[[^\]]*\]")
+_MD_REF = re.compile(r"^\s*\[[^\]]+\]:\s+\S.*$", re.M)
+_MD_TAG = re.compile(r"<[^>]+>")
+_MD_QUOTE = re.compile(r"^\s{0,3}(?:>\s?)+", re.M)
+_MD_BLOCK_START = re.compile(r"^\s*(?:#{1,6}\s+|[-*+]\s+|\d+[.)]\s+)", re.M)
+_MD_EMPHASIS = re.compile(r"(\*\*|\*|~~|`)(?=\S)(.+?)(?<=\S)\1"
+                          r"|(?<!\w)(__|_)(?=\S)(.+?)(?<=\S)\3(?!\w)")   # not snake_case
+_MD_RULE = re.compile(r"^\s*(?:[-*_]\s*){3,}$", re.M)
+
+
+def markdown_text(source: str) -> str:
+    s = _MD_FRONT_MATTER.sub("", source)
+    s = _MD_FENCE.sub("", s)
+    s = _MD_IMAGE.sub("", s)
+    s = _MD_LINK.sub(lambda m: m.group(1) or m.group(2), s)
+    s = _MD_REF.sub("", s)
+    s = _MD_TAG.sub("", s)
+    s = _MD_RULE.sub("", s)
+    s = _MD_QUOTE.sub("", s)
+    s = _MD_BLOCK_START.sub("\n", s)   # headings and list items are blocks of their own
+    s = _MD_EMPHASIS.sub(lambda m: m.group(2) or m.group(4), s)
+    # Paragraphs: blank-line separated; lines inside one are re-flowed.
+    blocks = [" ".join(p.split()) for p in re.split(r"\n\s*\n", s)]
+    return _join_blocks([b for b in blocks if b])
+
+
+def extract_text(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        source = f.read()
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".html", ".htm"):
+        return html_text(source)
+    if ext in (".md", ".markdown"):
+        return markdown_text(source)
+    return source.strip()
+
+
+def find_inputs(paths: list) -> list:
+    """[(path, relative output name)] for every supported file under paths."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+                for name in sorted(files):
+                    if name.lower().endswith(EXTENSIONS):
+                        full = os.path.join(root, name)
+                        out.append((full, os.path.relpath(full, p)))
+        elif os.path.isfile(p):
+            out.append((p, os.path.basename(p)))
+        else:
+            print(f"[prerender] no such file or directory: {p}", file=sys.stderr)
+    return out
+
+
+def content_hash(text: str, voice: str, segment_chars: int) -> str:
+    return hashlib.sha256(f"{FORMAT}|{voice}|{segment_chars}|{text}".encode("utf-8")).hexdigest()
+
+
+def _up_to_date(json_path: str, mp3_path: str, digest: str) -> bool:
+    try:
+        with open(json_path, encoding="utf-8") as f:
+            return json.load(f).get("hash") == digest and os.path.exists(mp3_path)
+    except (OSError, ValueError):
+        return False
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------------------------
+# Synthesis (inside a worker: tts_server is imported there, after the
+# environment has been set up for it)
+# ----------------------------------------------------------------------
+async def _render(tts, path, rel, out_dir, voice, segment_chars, force, sem) -> tuple:
+    """Render one input. Returns (rel, status, detail)."""
+    text = extract_text(path)
+    base = os.path.join(out_dir, os.path.splitext(rel)[0])
+    json_path, mp3_path = base + ".json", base + ".mp3"
+    digest = content_hash(text, voice, segment_chars)
+    if not force and _up_to_date(json_path, mp3_path, digest):
+        return rel, "skipped", "unchanged"
+    spans = tts._segment_document(text, segment_chars)
+    if not spans:
+        return rel, "skipped", "no speakable text"
+
+    t0 = time.perf_counter()
+
+    async def _one(start, end):
+        async with sem:
+            return await tts._timed_payload_retrying(text[start:end], voice)
+
+    try:
+        results = await asyncio.gather(*(_one(s, e) for s, e in spans))
+    except Exception as e:
+        return rel, "failed", tts._synthesis_error(e)
+
+    words, segments, audio, nbytes, duration_ms = [], [], [], 0, None
+    for (start, end), (payload, _state) in zip(spans, results):
+        part_words, part_duration, part_audio = tts._timed_decode(payload)
+        t_off = tts._mp3_duration_ms(nbytes)
+        segments.append({"start": start, "end": end, "t_ms": t_off})
+        words.extend([t + t_off, c + start] for t, c in part_words)
+        duration_ms = t_off + (part_duration if part_duration is not None
+                               else tts._mp3_duration_ms(len(part_audio)))
+        audio.append(part_audio)
+        nbytes += len(part_audio)
+
+    os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+    _write_atomic(mp3_path, b"".join(audio))
+    doc = {"source": rel, "hash": digest, "voice": voice, "text": text,
+           "duration_ms": duration_ms, "words": words, "segments": segments}
+    _write_atomic(json_path, json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+    hits = sum(1 for _p, state in results if state == "hit")
+    return rel, "rendered", (f"{len(spans)} segments ({hits} cached), "
+                             f"{duration_ms / 1000:.0f}s audio in {time.perf_counter() - t0:.1f}s")
+
+
+async def _render_all(inputs, out_dir, voice, segment_chars, concurrency, force) -> list:
+    try:
+        from . import tts_server as tts
+    except ImportError:
+        import tts_server as tts
+
+    if voice not in tts.voice_catalog:
+        raise SystemExit(f"[prerender] unknown voice {voice}")
+    tts._endpoint.set("prerender")
+    tts._scheduler.request_priority.set("bulk")
+    if tts.edge_pool is not None:
+        await tts.edge_pool.start()
+    sem = asyncio.Semaphore(concurrency)
+    files = asyncio.Semaphore(concurrency)   # documents held in memory at once
+
+    async def _bounded(path, rel):
+        async with files:
+            result = await _render(tts, path, rel, out_dir, voice, segment_chars, force, sem)
+        print(f"[prerender] {result[1]:>8} {result[0]}: {result[2]}", flush=True)
+        return result
+
+    try:
+        return await asyncio.gather(*(_bounded(p, r) for p, r in inputs))
+    finally:
+        if tts.edge_pool is not None:
+            await tts.edge_pool.close()
+
+
+def _worker(inputs, out_dir, voice, segment_chars, concurrency, force) -> list:
+    return asyncio.run(_render_all(inputs, out_dir, voice, segment_chars, concurrency, force))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Pre-render documents to MP3 + word timings")
+    ap.add_argument("inputs", nargs="+", help="files or directories (.txt, .md, .html)")
+    ap.add_argument("-o", "--out", required=True, help="output directory")
+    ap.add_argument("--voice", default="en-US-AriaNeural")
+    ap.add_argument("--segment-chars", type=int, default=1200,
+                    help="segment size; keep equal to SEGMENT_CHARS in readaloud.js")
+    ap.add_argument("-j", "--processes", type=int, default=1, help="worker processes")
+    ap.add_argument("-c", "--concurrency", type=int, default=4,
+                    help="segments in flight per process")
+    ap.add_argument("--cache-dir", default=os.environ.get("TTS_DISK_CACHE_DIR"),
+                    help="server disk cache to read and fill (default: TTS_DISK_CACHE_DIR)")
+    ap.add_argument("--force", action="store_true", help="re-render unchanged inputs")
+    args = ap.parse_args(argv)
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        print("[prerender] nothing to do", file=sys.stderr)
+        return 1
+
+    # Read by tts_server at import time, in this process or the workers.
+    if args.cache_dir:
+        os.environ["TTS_DISK_CACHE_DIR"] = args.cache_dir
+    os.environ["TTS_SYNTH_CONCURRENCY"] = str(args.concurrency)
+
+    t0 = time.perf_counter()
+    processes = max(1, min(args.processes, len(inputs)))
+    if processes == 1:
+        results = _worker(inputs, args.out, args.voice, args.segment_chars,
+                          args.concurrency, args.force)
+    else:
+        shards = [inputs[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_worker, shard, args.out, args.voice, args.segment_chars,
+                                   args.concurrency, args.force) for shard in shards]
+            results = [r for f in futures for r in f.result()]
+
+    counts = {}
+    for _rel, status, _detail in results:
+        counts[status] = counts.get(status, 0) + 1
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"[prerender] {len(results)} inputs: {summary} in {time.perf_counter() - t0:.1f}s")
+    return 1 if counts.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
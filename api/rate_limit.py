@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Per-client rate limiter for the TTS server: GCRA on two budgets at once.
+
+GCRA (the "generic cell rate algorithm", a token bucket stored as a single
+timestamp) keeps one theoretical arrival time (TAT) per client and budget.
+A request of cost c is allowed when TAT + c * interval - now stays within
+the window; allowing it moves TAT forward by c * interval. That is O(1) time
+and O(1) memory per client, on a monotonic clock, with no per-request lists.
+
+Two budgets per client, both of which must have room:
+  - requests per window (burst = the whole window's allowance)
+  - characters per window, because upstream cost scales with text length:
+    one 5,000-char request is 50 x the Edge time of a 100-char one. A single
+    request larger than the whole character burst is admitted when the
+    client's bucket is full, and drains it.
+
+Idle clients expire through a hashed timing wheel of one-second slots: each
+update files the key under the second its state goes back to "fresh", and
+advancing the wheel drops the keys whose slot came due. Expiry work is
+amortized O(1) per request and never a full sweep under the request path.
+
+RateLimiter is per process (single event loop only). SharedRateLimiter runs
+the same algorithm on a fixed-size hash table in a shared memory-mapped file,
+so pre-forked workers (serve.py) enforce one budget per client between them.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the per-process RateLimiter is available
+    fcntl = None
+
+
+def _gcra(state_req: Optional[float], state_chars: Optional[float], now: float, chars: int,
+          window_s: float, req_interval: float, char_interval: float, char_cap: int) -> tuple:
+    """(wait, new_tat_requests, new_tat_chars); wait > 0 means refused."""
+    tat_req = max(state_req, now) if state_req is not None else now
+    tat_chars = max(state_chars, now) if state_chars is not None else now
+    new_req = tat_req + req_interval
+    wait = new_req - window_s - now
+    new_chars = tat_chars
+    if char_interval and chars > 0:
+        new_chars = tat_chars + min(chars, char_cap) * char_interval
+        wait = max(wait, new_chars - window_s - now)
+    return wait, new_req, new_chars
+
+
+class RateLimiter:
+    """Two-budget GCRA limiter keyed by client (normally the IP)."""
+
+    def __init__(self, requests: int = 50, chars: Optional[int] = None,
+                 window_s: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.window_s = float(window_s)
+        self._req_interval = self.window_s / requests
+        self._char_interval = self.window_s / chars if chars else 0.0
+        self._char_cap = chars or 0
+        self._clock = clock
+        # key -> [tat_requests, tat_chars, expiry_tick]
+        self._state: dict = {}
+        # TATs never run more than one window ahead of now, so a ring of
+        # window + 2 one-second slots can hold every pending expiry.
+        self._slots = [set() for _ in range(int(math.ceil(self.window_s)) + 2)]
+        self._tick = int(clock())
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def check(self, key: str, chars: int = 0) -> float:
+        """Charge one request of `chars` characters to key.
+
+        Returns 0.0 when allowed, else the seconds until it would be.
+        """
+        now = self._clock()
+        self._advance(now)
+        state = self._state.get(key)
+        wait, new_req, new_chars = _gcra(
+            state[0] if state else None, state[1] if state else None, now, chars,
+            self.window_s, self._req_interval, self._char_interval, self._char_cap)
+        if wait > 0:
+            return wait
+
+        tick = int(math.ceil(max(new_req, new_chars)))
+        if state is None:
+            self._state[key] = [new_req, new_chars, tick]
+        else:
+            state[0], state[1], state[2] = new_req, new_chars, tick
+        self._slots[tick % len(self._slots)].add(key)
+        return 0.0
+
+    def _advance(self, now: float) -> None:
+        target = int(now)
+        if target <= self._tick:
+            return
+        # After a long idle spell every slot is due; one lap covers them all.
+        start = max(self._tick + 1, target - len(self._slots) + 1)
+        for tick in range(start, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            for key in slot:
+                state = self._state.get(key)
+                # A key re-filed under a later tick since is not due yet.
+                if state is not None and state[2] <= tick:
+                    del self._state[key]
+            slot.clear()
+        self._tick = target
+
+
+_SLOT = struct.Struct("<Qdd")  # key hash (0 = never used), tat_requests, tat_chars
+
+
+class SharedRateLimiter:
+    """RateLimiter's budgets, shared by every process that maps the same file.
+
+    Open-addressed table of SLOT entries in a MAP_SHARED mmap, guarded by an
+    flock that each process takes on its own descriptor (so a worker that
+    dies mid-check releases it). A slot whose TATs are both in the past is
+    indistinguishable from a fresh client and is simply reused; that is the
+    expiry. When a probe run finds neither the client nor a free slot, the
+    least-loaded slot in the run is recycled, which can only make the limiter
+    more lenient, never lock anyone out.
+
+    TATs are monotonic-clock readings, which mean nothing to another boot
+    (or to a clock that restarted near zero, where they would read as a
+    lockout of days), so creating the limiter clears the table the file
+    held. Create it once, in the parent, before forking; POSIX only.
+    """
+
+    PROBES = 32
+
+    def __init__(self, path: str, requests: int = 50, chars: Optional[int] = None,
+                 window_s: float = 60.0, slots: int = 65536,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window_s = float(window_s)
+        self._req_interval = self.window_s / requests
+        self._char_interval = self.window_s / chars if chars else 0.0
+        self._char_cap = chars or 0
+        self._clock = clock
+        self._path = path
+        self._slots = slots
+        size = slots * _SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, size)
+            self._buf = mmap.mmap(fd, size, mmap.MAP_SHARED)
+        finally:
+            os.close(fd)
+        self._lock_fd = None
+        self._lock_pid = None
+
+    def _lock(self) -> int:
+        # flock is per open file description: a descriptor inherited across
+        # fork would be shared with the parent, so each process opens its own.
+        if self._lock_pid != os.getpid():
+            self._lock_fd = os.open(self._path, os.O_RDWR)
+            self._lock_pid = os.getpid()
+        return self._lock_fd
+
+    def __len__(self) -> int:
+        now = self._clock()
+        live = 0
+        for j in range(self._slots):
+            h, tr, tc = _SLOT.unpack_from(self._buf, j * _SLOT.size)
+            live += h != 0 and max(tr, tc) > now
+        return live
+
+    def check(self, key: str, chars: int = 0) -> float:
+        """Same contract as RateLimiter.check."""
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        base = h % self._slots
+        fd = self._lock()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            now = self._clock()
+            slot = free = None
+            state = (None, None)
+            coldest, coldest_tat = base, math.inf
+            for i in range(self.PROBES):
+                j = (base + i) % self._slots
+                kh, tr, tc = _SLOT.unpack_from(self._buf, j * _SLOT.size)
+                if kh == h:
+                    slot, state = j, (tr, tc)
+                    break
+                if free is None and (kh == 0 or max(tr, tc) <= now):
+                    free = j
+                if kh == 0:
+                    break  # end of the probe chain: key is not further along
+                if max(tr, tc) < coldest_tat:
+                    coldest, coldest_tat = j, max(tr, tc)
+            if slot is None:
+                slot = free if free is not None else coldest
+            wait, new_req, new_chars = _gcra(
+                state[0], state[1], now, chars,
+                self.window_s, self._req_interval, self._char_interval, self._char_cap)
+            if wait > 0:
+                return wait
+            _SLOT.pack_into(self._buf, slot * _SLOT.size, h, new_req, new_chars)
+            return 0.0
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
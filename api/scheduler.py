@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Synthesis scheduler for the TTS server: one bounded, priority-ordered gate in
+front of every upstream Edge synthesis.
+
+  - priority lanes: "interactive" (the segment a reader is waiting on right
+    now) > "prefetch" (the next segment, fetched while this one plays) >
+    "bulk" (MP3 downloads, batches). Free slots always go to the best lane.
+  - admission control: each lane has a bounded queue; past it, or after
+    waiting too long, the request is shed with Overloaded (-> 503 +
+    Retry-After) instead of piling up until everything hits SYNTH_TIMEOUT_S.
+    Bulk sheds first, interactive last.
+  - adaptive concurrency: AIMD on the slot limit. Upstream errors, or
+    latency well above the best recently seen, cut the limit by 20%; healthy
+    completions while saturated grow it by ~1 per "limit" completions.
+
+The caller's lane travels in the request_priority context variable, so tasks
+spawned for a request (in-flight syntheses, sentence parts) inherit it.
+"""
+import asyncio
+import contextvars
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+PRIORITIES = ("interactive", "prefetch", "bulk")
+
+request_priority: "contextvars.ContextVar[str]" = contextvars.ContextVar(
+    "request_priority", default="interactive")
+
+
+def parse_priority(value: str, default: str = "interactive") -> str:
+    value = (value or "").strip().lower()
+    return value if value in PRIORITIES else default
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the scheduler is shedding load."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"synthesis queue full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SynthScheduler:
+    """Priority-ordered, adaptively sized semaphore. Single event loop only."""
+
+    def __init__(self, min_limit: int = 2, max_limit: int = 16, initial_limit: int = 8,
+                 max_queue: int = 32, max_wait_s: float = 20.0,
+                 latency_tolerance: float = 2.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.active = 0
+        self.max_wait_s = max_wait_s
+        self.latency_tolerance = latency_tolerance
+        # Bulk sheds first: its queue is the shortest.
+        self._max_queue = {"interactive": max_queue * 2, "prefetch": max_queue,
+                           "bulk": max(1, max_queue // 2)}
+        self._queues = {p: deque() for p in PRIORITIES}
+        self._best_latency = None      # seconds per normalized request, decays upward
+        self._avg_service_s = 2.0      # EWMA of slot hold time, for Retry-After
+        self._last_decrease = 0.0
+        self.shed = {p: 0 for p in PRIORITIES}
+        self.completed = 0
+        self.failed = 0
+
+    def queued(self, priority: str = None) -> int:
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum(len(q) for q in self._queues.values())
+
+    def retry_after(self) -> int:
+        backlog = self.queued() + self.active
+        return max(1, math.ceil(backlog * self._avg_service_s / max(self.limit, 1)))
+
+    def _has_capacity(self) -> bool:
+        return self.active < int(self.limit)
+
+    async def _acquire(self, priority: str) -> None:
+        rank = PRIORITIES.index(priority)
+        ahead = sum(len(self._queues[p]) for p in PRIORITIES[:rank + 1])
+        if self._has_capacity() and ahead == 0:
+            self.active += 1
+            return
+        if len(self._queues[priority]) >= self._max_queue[priority]:
+            self.shed[priority] += 1
+            raise Overloaded(self.retry_after())
+        fut = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.max_wait_s)
+        except asyncio.TimeoutError:
+            self._abandon(priority, fut)
+            self.shed[priority] += 1
+            raise Overloaded(self.retry_after())
+        except BaseException:
+            self._abandon(priority, fut)
+            raise
+
+    def _abandon(self, priority: str, fut) -> None:
+        if fut.done() and not fut.cancelled():
+            self._release()  # the slot was granted just as we gave up: hand it on
+        else:
+            fut.cancel()
+            try:
+                self._queues[priority].remove(fut)
+            except ValueError:
+                pass
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for p in PRIORITIES:
+            q = self._queues[p]
+            while q and self._has_capacity():
+                fut = q.popleft()
+                if fut.done():
+                    continue
+                self.active += 1
+                fut.set_result(None)
+            if q:
+                return
+
+    def _observe(self, elapsed: float, chars: int, ok: bool) -> None:
+        self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * elapsed
+        # Longer texts legitimately take longer; compare like with like.
+        norm = elapsed / (1.0 + chars / 1000.0)
+        if self._best_latency is None or norm < self._best_latency:
+            self._best_latency = norm
+        else:
+            # Let the baseline drift up slowly so one lucky fast call doesn't
+            # pin the limit low forever after upstream gets permanently slower.
+            self._best_latency *= 1.01
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if not ok or norm > self._best_latency * self.latency_tolerance:
+            # At most one cut per service time, so a burst of slow replies that
+            # all started under the old limit counts as one congestion signal.
+            if now - self._last_decrease > self._avg_service_s:
+                self.limit = max(float(self.min_limit), self.limit * 0.8)
+                self._last_decrease = now
+        elif self.active >= int(self.limit):  # only grow while saturated
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    @asynccontextmanager
+    async def slot(self, chars: int = 0, priority: str = None):
+        """Hold one upstream synthesis slot for the duration of the block."""
+        await self._acquire(priority or request_priority.get())
+        t0 = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise  # the reader left; says nothing about upstream health
+        except BaseException:
+            self._observe(time.monotonic() - t0, chars, False)
+            raise
+        else:
+            self._observe(time.monotonic() - t0, chars, True)
+        finally:
+            self._release()
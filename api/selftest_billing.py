@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Self-test for the license DB layer (billing_store.py and the billing.py
+helpers on it): atomic debits under concurrent threads, reads that don't
+wait for the writer, rollback, refunds, and the premium endpoint keeping
+its blocking work off the event loop. Throwaway DB, no Stripe, no network.
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_billing.py
+
+bench_billing.py measures throughput. Same no-pytest convention as
+selftest_timed.py.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+TMP = tempfile.mkdtemp(prefix="selftest_billing_")
+os.environ.update({
+    "STRIPE_SECRET_KEY": "sk_test_selftest", "STRIPE_WEBHOOK_SECRET": "whsec_selftest",
+    "LICENSE_DB": os.path.join(TMP, "licenses.db"),
+    "STRIPE_TIERS_JSON": json.dumps({"price_t": {"plan": "t", "cap": 3000}}),
+    "ELEVENLABS_API_KEY": "selftest",
+})
+
+import billing  # noqa: E402
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def _license(sub: str, cap: int = 3000) -> str:
+    return billing.upsert_license_for_sub(sub, stripe_customer="cus_" + sub, plan="t",
+                                          char_cap=cap, status="active", email=None,
+                                          checkout_session=None)
+
+
+def _daily() -> int:
+    with billing._db().reader() as c:
+        row = c.execute("SELECT chars FROM premium_daily WHERE day=?",
+                        (billing._today(),)).fetchone()
+    return row["chars"] if row else 0
+
+
+def store_checks():
+    print("Store")
+    real = billing._billing_store.BillingStore
+    built = []
+
+    class SlowStore(real):
+        def __init__(self, *args, **kw):
+            time.sleep(0.05)           # widen the first-use race
+            super().__init__(*args, **kw)
+            built.append(self)
+
+    billing._billing_store.BillingStore = SlowStore
+    try:
+        stores = []
+        threads = [threading.Thread(target=lambda: stores.append(billing._db()))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        billing._billing_store.BillingStore = real
+    ok = check("concurrent first use builds one pool",
+               len(built) == 1 and all(s is built[0] for s in stores), f"{len(built)} built")
+
+    key = _license("sub_concurrent")
+    results = []
+
+    def worker():
+        for _ in range(50):
+            results.append(billing.charge_premium(key, 10)[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lic = billing.get_license(key)
+    ok &= check("16 threads x 50 debits: exactly the cap is granted",
+                results.count(True) == 300 and lic["char_used"] == 3000,
+                f"{results.count(True)} granted, used {lic['char_used']}")
+    ok &= check("daily total counts granted debits only", _daily() == 3000, str(_daily()))
+
+    billing.refund_premium(key, 100)
+    ok &= check("refund_premium returns both counters",
+                billing.get_license(key)["char_used"] == 2900 and _daily() == 2900)
+
+    store = billing._db()
+    holding, release = threading.Event(), threading.Event()
+
+    def slow_write():
+        with store.writer() as c:
+            c.execute("UPDATE licenses SET char_used=0 WHERE key=?", (key,))
+            holding.set()
+            release.wait(5)
+
+    t = threading.Thread(target=slow_write)
+    t.start()
+    holding.wait(5)
+    t0 = time.perf_counter()
+    seen = billing.get_license(key)["char_used"]
+    waited = time.perf_counter() - t0
+    release.set()
+    t.join()
+    ok &= check("a read doesn't wait for a write in progress",
+                waited < 0.5 and seen == 2900, f"{waited:.2f}s, saw {seen}")
+    ok &= check("...and sees it once committed", billing.get_license(key)["char_used"] == 0)
+
+    try:
+        with store.writer() as c:
+            c.execute("UPDATE licenses SET char_used=999 WHERE key=?", (key,))
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    ok &= check("exception inside writer() rolls back",
+                billing.get_license(key)["char_used"] == 0)
+
+    cap = billing.PREMIUM_DAILY_CHAR_CAP
+    billing.PREMIUM_DAILY_CHAR_CAP = _daily() + 5
+    try:
+        other = _license("sub_daily")
+        ok &= check("daily circuit breaker refuses without debiting",
+                    billing.charge_premium(other, 10) == (False, 0, "daily_cap")
+                    and billing.get_license(other)["char_used"] == 0)
+    finally:
+        billing.PREMIUM_DAILY_CHAR_CAP = cap
+    ok &= check("readers bounded by the pool size", store._opened <= store.readers,
+                f"{store._opened} > {store.readers}")
+    return ok
+
+
+async def endpoint_checks():
+    print("Premium endpoint")
+    from fastapi import FastAPI
+    app = FastAPI()
+    app.include_router(billing.router)
+    key = _license("sub_endpoint", cap=100_000)
+    billing.PREMIUM_TTS_ENABLED = True
+
+    def provider(text, voice_id):
+        time.sleep(0.2)
+        return b"\xff\xf3" * 100
+
+    billing._elevenlabs_tts = provider
+
+    async def post():
+        body = json.dumps({"text": "hello there", "voice_id": "v", "license_key": key}).encode()
+        scope = {"type": "http", "method": "POST", "path": "/api/tts/premium",
+                 "raw_path": b"/api/tts/premium", "query_string": b"",
+                 "headers": [(b"content-type", b"application/json")], "http_version": "1.1",
+                 "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1),
+                 "root_path": ""}
+        sent, received = [], []
+
+        async def receive():
+            if received:
+                await asyncio.Future()
+            received.append(True)
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        return sent[0]["status"]
+
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stall = max(stall, time.perf_counter() - t0 - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    t0 = time.perf_counter()
+    statuses = await asyncio.gather(*(post() for _ in range(8)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await tick
+    ok = check("8 concurrent requests overlap (provider 0.2 s each)",
+               statuses == [200] * 8 and elapsed < 1.0, f"{statuses} {elapsed:.2f}s")
+    ok &= check("event loop not blocked meanwhile", stall < 0.1, f"stalled {stall * 1000:.0f} ms")
+    ok &= check("charged once per request", billing.get_license(key)["char_used"] == 8 * 11)
+    return ok
+
+
+if __name__ == "__main__":
+    try:
+        passed = store_checks()
+        passed = asyncio.run(endpoint_checks()) and passed
+    finally:
+        billing._db().close()
+        shutil.rmtree(TMP, ignore_errors=True)
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
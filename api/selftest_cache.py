@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Self-test for the audio cache tiers (no network, no server).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_cache.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from disk_cache import DiskCache
+
+
+def k(s):
+    return hashlib.sha256(s.encode()).hexdigest()
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def disk_checks():
+    print("Unit checks: DiskCache")
+    ok = True
+    root = tempfile.mkdtemp(prefix="ra-disk-")
+
+    dc = DiskCache(root, max_bytes=1000)
+    dc.put(k("a"), b"A" * 400)
+    dc.put(k("b"), b"B" * 400)
+    ok &= check("read round-trips", dc.read(k("b")) == b"B" * 400)
+    path = dc.path_for(k("a"))
+    ok &= check("hit returns a path", path is not None and path.endswith(k("a")), str(path))
+    ok &= check("miss returns None", dc.path_for(k("zzz")) is None)
+
+    # "a" was touched last, so adding "c" must evict "b", not "a".
+    dc.put(k("c"), b"C" * 400)
+    ok &= check("LRU eviction by size", dc.path_for(k("b")) is None and dc.path_for(k("a")) is not None,
+                f"{len(dc)} entries, {dc.size} bytes")
+    ok &= check("evicted file removed", not os.path.exists(os.path.join(root, k("b")[:2], k("b"))))
+    ok &= check("budget respected", dc.size <= 1000, str(dc.size))
+
+    ok &= check("non-key names rejected", dc.put("../escape", b"x") is None
+                and not os.path.exists(os.path.join(root, "..", "escape")))
+
+    # Restart: the index is rebuilt from disk and stray temp files are swept.
+    with open(os.path.join(root, k("a")[:2], "junk.tmp"), "wb") as f:
+        f.write(b"partial")
+    dc2 = DiskCache(root, max_bytes=1000)
+    ok &= check("index survives restart", dc2.read(k("a")) == b"A" * 400 and len(dc2) == 2, str(len(dc2)))
+    ok &= check("temp files swept", not os.path.exists(os.path.join(root, k("a")[:2], "junk.tmp")))
+
+    # Budget shrinks across a restart: oldest entries go first.
+    dc3 = DiskCache(root, max_bytes=500)
+    ok &= check("restart enforces smaller budget", len(dc3) == 1 and dc3.size <= 500, str(len(dc3)))
+
+    # Two processes sharing the directory: each picks up the other's writes.
+    other = DiskCache(root, max_bytes=1000)
+    dc3.put(k("d"), b"D" * 300)
+    ok &= check("file written elsewhere is adopted", other.read(k("d")) == b"D" * 300,
+                f"{len(other)} entries")
+    return ok
+
+
+def memory_checks():
+    print("Unit checks: _AudioCache variants / Accept-Encoding")
+    import gzip
+    import json
+
+    from starlette.requests import Request
+
+    from tts_server import (_AudioCache, _compressed_timed_json, _negotiate_encoding,
+                            _timed_encode)
+
+    ok = True
+    c = _AudioCache(max_entries=10, max_bytes=900)
+    c.put("a", b"A" * 300)
+    c.put_variant("a", "json+gzip", b"z" * 100)
+    ok &= check("variant stored alongside its entry",
+                c.get_variant("a", "json+gzip") == b"z" * 100 and len(c) == 1 and c.size == 400,
+                f"{len(c)} entries, {c.size} bytes")
+    c.put_variant("gone", "json+gzip", b"z")
+    ok &= check("variant of a missing entry is not kept", c.get_variant("gone", "json+gzip") is None
+                and c.size == 400)
+    c.put("b", b"B" * 300)
+    c.get_variant("a", "json+gzip")   # a variant hit refreshes the entry
+    c.put("c", b"C" * 300)
+    ok &= check("variants count toward the byte budget",
+                c.get("b") is None and c.get("a") is not None and c.size == 700, str(c.size))
+    c.put("a", b"a" * 300)
+    ok &= check("replacing an entry drops its stale variants",
+                c.get_variant("a", "json+gzip") is None and c.size == 600, str(c.size))
+    c.put_variant("c", "json+gzip", b"z" * 200)
+    c.put("d", b"D" * 300)
+    ok &= check("eviction takes the variants with it", c.get("a") is None
+                and c.get_variant("c", "json+gzip") == b"z" * 200 and c.size == 800, str(c.size))
+
+    def req(accept_encoding):
+        headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+        return Request({"type": "http", "headers": headers})
+
+    ok &= check("gzip negotiated", _negotiate_encoding(req("gzip, deflate")) == "gzip")
+    ok &= check("q=0 and absent header mean identity",
+                _negotiate_encoding(req("gzip;q=0, identity")) is None
+                and _negotiate_encoding(req("")) is None)
+    ok &= check("wildcard", _negotiate_encoding(req("*")) is not None)
+
+    words = [[i * 240, i * 6] for i in range(400)]
+    payload = _timed_encode(words, 96000, os.urandom(20000))
+    body = _compressed_timed_json(payload, "gzip")
+    doc = json.loads(gzip.decompress(body))
+    plain = len(json.dumps(doc).encode())
+    ok &= check("gzip variant decodes to the JSON rendering", doc["words"] == words
+                and len(body) < plain * 0.85, f"{len(body)} of {plain} bytes")
+    print(f"  timed JSON {plain} bytes -> gzip {len(body)} ({len(body) / plain:.0%})")
+    return ok
+
+
+def policy_checks():
+    print("Unit checks: admission / eviction policies")
+    import cache_policy
+    from cache_policy import FrequencySketch
+
+    from tts_server import _AudioCache
+
+    ok = True
+    sk = FrequencySketch(1024)
+    for _ in range(5):
+        sk.increment("hot")
+    sk.increment("cold")
+    ok &= check("sketch counts", sk.estimate("hot") >= 5 and 1 <= sk.estimate("cold") < 5
+                and sk.estimate("never") <= 1)
+    before = sk.estimate("hot")
+    sk._added = sk.sample - 1          # the next increment completes a sample
+    sk.increment("other")
+    ok &= check("sketch ages (counters halved)", sk.resets == 1
+                and sk.estimate("hot") == before // 2, f"{before} -> {sk.estimate('hot')}")
+
+    c = _AudioCache(policy="gdsf", max_bytes=1000)
+    c.put("big", b"B" * 600)
+    c.put("small", b"s" * 100)
+    for _ in range(3):
+        c.get("small")
+        c.get("big")
+    c.put("new", b"n" * 400)
+    ok &= check("GDSF evicts the large entry before the small popular one",
+                c.get("big") is None and c.get("small") is not None and c.size == 500)
+
+    c = _AudioCache(policy="tinylfu-gdsf", max_bytes=1000)
+    for i in range(10):
+        c.put(f"hot{i}", b"h" * 100)
+    for _ in range(3):
+        for i in range(10):
+            c.get(f"hot{i}")
+    for i in range(50):                # a scan of one-off keys
+        c.get(f"scan{i}")
+        c.put(f"scan{i}", b"x" * 100)
+    ok &= check("TinyLFU keeps the working set through a scan",
+                all(c.get(f"hot{i}") is not None for i in range(10)) and c.rejections == 50,
+                f"{c.rejections} refused")
+    for _ in range(5):
+        c.get("rising")
+    c.put("rising", b"r" * 100)
+    ok &= check("a key seen often enough is admitted", c.get("rising") is not None)
+
+    # Segment full of entries read 4x: a one-off synthesis is refused but kept
+    # in the window for the caller's next request (Range, the /api/tts download).
+    c.get("synth")
+    c.put("synth", b"y" * 300, fresh=True)
+    ok &= check("a fresh synthesis is readable right after a full segment",
+                c.get("synth") is not None and c.segment_bytes()["all"] <= 1000,
+                str(c.segment_bytes()))
+    c.get("promoted")
+    c.put("promoted", b"p" * 100)
+    ok &= check("...while a one-off promotion is still refused", c.get("promoted") is None)
+
+    c = _AudioCache(policy="tinylfu-lru", max_bytes=300)
+    for name, reads in (("cold", 1), ("warm", 3), ("hot", 3)):
+        c.put(name, b"w" * 100)
+        for _ in range(reads):
+            c.get(name)
+    for _ in range(2):
+        c.get("newer")
+    c.put("newer", b"n" * 200)
+    ok &= check("admission weighs the coldest victim, not the sum",
+                c.get("newer") is not None and c.get("hot") is not None
+                and c.get("cold") is None, f"{c.rejections} refused")
+
+    c = _AudioCache(policy="tinylfu-lru", budgets={"timed": 500, "plain": 300},
+                    classify=lambda v: "timed" if v[:1] == b"T" else "plain")
+    c.put("p", b"p" * 200)
+    for i in range(8):
+        c.put(f"t{i}", b"T" * 100)
+        c.get(f"t{i}")
+    ok &= check("segments have separate budgets", c.get("p") is not None
+                and c.segment_bytes() == {"timed": 500, "plain": 200}, str(c.segment_bytes()))
+    c.put("huge", b"p" * 301)
+    ok &= check("entry over its segment budget refused", c.get("huge") is None)
+
+    real = cache_policy.cgroup_memory_limit
+    try:
+        cache_policy.cgroup_memory_limit = lambda: 512 * 1024 * 1024
+        budget, _src = cache_policy.memory_budget(0.25, 64 * 1024 * 1024)
+        ok &= check("budget from the cgroup limit", budget == 128 * 1024 * 1024)
+        cache_policy.cgroup_memory_limit = lambda: None
+        ok &= check("no limit: default budget",
+                    cache_policy.memory_budget(0.25, 64)[0] == 64)
+    finally:
+        cache_policy.cgroup_memory_limit = real
+
+    path = os.path.join(tempfile.mkdtemp(prefix="ra-trace-"), "cache.trace")
+    c = _AudioCache(trace=cache_policy.TraceWriter(path))
+    c.put(k("a"), b"A" * 10)
+    c.get(k("a"))
+    c.get(k("missing"))
+    ok &= check("trace: one line per access", list(cache_policy.read_trace(path))
+                == [(k("a")[:16], 10, "all")] * 2)
+    return ok
+
+
+def http_checks():
+    print("Unit checks: ETag / Range (http_cache)")
+    from starlette.requests import Request
+
+    from http_cache import (RangeNotSatisfiable, bytes_response, file_response, not_modified,
+                            parse_range, strong_etag)
+
+    def req(**headers):
+        return Request({"type": "http", "headers": [(n.replace("_", "-").encode(), v.encode())
+                                                     for n, v in headers.items()]})
+
+    def unsatisfiable(header, size):
+        try:
+            parse_range(header, size)
+        except RangeNotSatisfiable:
+            return True
+        return False
+
+    ok = True
+    ok &= check("range forms", parse_range("bytes=0-", 100) == (0, 99)
+                and parse_range("bytes=10-19", 100) == (10, 19)
+                and parse_range("bytes=90-500", 100) == (90, 99)
+                and parse_range("bytes=-30", 100) == (70, 99)
+                and parse_range("bytes=-300", 100) == (0, 99))
+    ok &= check("ignored ranges mean the whole body", parse_range("bytes=0-1,5-6", 100) is None
+                and parse_range("items=0-1", 100) is None and parse_range("bytes=9-2", 100) is None)
+    ok &= check("unsatisfiable ranges", unsatisfiable("bytes=100-", 100)
+                and unsatisfiable("bytes=-0", 100))
+
+    etag = strong_etag(k("clip"))
+    headers = {"Cache-Control": "public, max-age=3600", "Content-Disposition": "inline"}
+    r = not_modified(req(if_none_match=f'"x", W/{etag}'), etag, headers)
+    ok &= check("If-None-Match (weak comparison) -> 304",
+                r is not None and r.status_code == 304 and r.headers["etag"] == etag
+                and "content-disposition" not in r.headers)
+    ok &= check("other validators -> None", not_modified(req(if_none_match='"x"'), etag, headers)
+                is None and not_modified(req(), etag, headers) is None)
+
+    data = bytes(range(256)) * 4
+    r = bytes_response(req(range="bytes=1000-"), data, "audio/mpeg", headers, etag)
+    ok &= check("206 slice from memory", r.status_code == 206 and r.body == data[1000:]
+                and r.headers["content-range"] == "bytes 1000-1023/1024"
+                and r.headers["content-length"] == "24")
+    r = bytes_response(req(range="bytes=0-9", if_range='"old"'), data, "audio/mpeg", headers, etag)
+    ok &= check("stale If-Range -> whole body", r.status_code == 200 and len(r.body) == 1024
+                and r.headers["accept-ranges"] == "bytes")
+    r = bytes_response(req(range="bytes=5000-"), data, "audio/mpeg", headers, etag)
+    ok &= check("416 with the size", r.status_code == 416
+                and r.headers["content-range"] == "bytes */1024")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="ra-range-"), "clip")
+    with open(path, "wb") as f:
+        f.write(data)
+    r = file_response(req(range="bytes=-100"), path, "audio/mpeg", headers, etag)
+    ok &= check("206 slice from disk", r.status_code == 206
+                and r.headers["content-range"] == "bytes 924-1023/1024"
+                and r.headers["content-length"] == "100")
+
+    async def _drain(it):
+        return b"".join([chunk async for chunk in it])
+
+    ok &= check("disk slice bytes", asyncio.run(_drain(r.body_iterator)) == data[924:])
+    r = file_response(req(), path, "audio/mpeg", headers, etag)
+    ok &= check("whole file keeps our ETag", r.status_code == 200 and r.headers["etag"] == etag)
+    return ok
+
+
+if __name__ == "__main__":
+    passed = disk_checks()
+    passed = memory_checks() and passed
+    passed = policy_checks() and passed
+    passed = http_checks() and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Self-test for the warm Edge websocket pool, against the local fake_edge.py
+stand-in (no network).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_edge_pool.py          # correctness + offline speedup
+    python api/selftest_edge_pool.py --live   # + a few turns on the real service
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+import edge_tts
+import edge_tts.communicate
+
+from edge_pool import EdgePool
+from fake_edge import FakeEdge
+
+TEXTS = [f"Segment number {i} of the sequential read, with a few more words." for i in range(8)]
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+async def collect(stream):
+    audio, marks = bytearray(), []
+    async for chunk in stream:
+        if chunk["type"] == "audio":
+            audio += chunk["data"]
+        else:
+            marks.append((chunk["type"], chunk["offset"], chunk["duration"], chunk["text"]))
+    return bytes(audio), marks
+
+
+def communicate(text, boundary="WordBoundary"):
+    return edge_tts.Communicate(text=text, voice="en-US-AriaNeural", boundary=boundary).stream()
+
+
+async def pool_checks():
+    print("Pool checks (fake upstream)")
+    ok = True
+    fake = FakeEdge(handshake_ms=60, first_byte_ms=5)
+    url = await fake.start()
+    edge_tts.communicate.WSS_URL = url  # point the stock client at the fake too
+    pool = EdgePool(size=2, url=url)
+    try:
+        await pool.start()
+        ok &= check("prewarm opens the pool", pool.idle() == 2 and fake.connections == 2,
+                    f"idle={pool.idle()} conns={fake.connections}")
+
+        # Same bytes and boundaries as the stock client, including across the
+        # 4096-byte parts edge_tts splits long text into.
+        long_text = " ".join(f"word{i}" for i in range(1200))
+        for label, text in (("short", TEXTS[0]), ("multi-part", long_text)):
+            want = await collect(communicate(text))
+            got = await collect(pool.stream(text, "en-US-AriaNeural", boundary="WordBoundary"))
+            ok &= check(f"{label}: matches edge_tts.Communicate", got == want,
+                        f"{len(got[0])}/{len(want[0])} bytes, {len(got[1])}/{len(want[1])} marks")
+
+        # Sequential syntheses ride the warm sockets: no new handshakes.
+        before = fake.connections
+        for text in TEXTS:
+            await collect(pool.stream(text, "en-US-AriaNeural"))
+        ok &= check("sequential turns reuse sockets", fake.connections == before,
+                    f"{fake.connections - before} new connections")
+        ok &= check("reuse counted", pool.stats["reused"] >= len(TEXTS), str(pool.stats))
+
+        # Abandoning a stream mid-turn must not hand a half-read socket back.
+        agen = pool.stream(TEXTS[1], "en-US-AriaNeural").__aiter__()
+        await agen.__anext__()
+        await agen.aclose()
+        audio, _ = await collect(pool.stream(TEXTS[2], "en-US-AriaNeural"))
+        want, _ = await collect(communicate(TEXTS[2], "SentenceBoundary"))
+        ok &= check("abandoned turn does not leak into the next", audio == want)
+    finally:
+        await pool.close()
+        await fake.stop()
+
+    # A service that closes after every turn: stale sockets are retried on a
+    # fresh connection, then reuse switches itself off.
+    fake = FakeEdge(handshake_ms=5, first_byte_ms=1, turns_per_connection=1)
+    url = await fake.start()
+    pool = EdgePool(size=1, url=url)
+    try:
+        await pool.start()
+        results = [await collect(pool.stream(t, "en-US-AriaNeural")) for t in TEXTS]
+        ok &= check("one-turn service: every synthesis succeeds",
+                    all(len(a) > 0 for a, _ in results))
+        ok &= check("one-turn service: reuse disabled", not pool.reuse, str(pool.stats))
+    finally:
+        await pool.close()
+        await fake.stop()
+    return ok
+
+
+async def speedup_check():
+    print("Offline speedup: 8 sequential short syntheses, 150 ms handshake")
+    fake = FakeEdge(handshake_ms=150, first_byte_ms=20)
+    url = await fake.start()
+    edge_tts.communicate.WSS_URL = url
+    pool = EdgePool(size=2, url=url)
+    try:
+        t0 = time.perf_counter()
+        for text in TEXTS:
+            await collect(communicate(text, "SentenceBoundary"))
+        cold = time.perf_counter() - t0
+        await pool.start()
+        t0 = time.perf_counter()
+        for text in TEXTS:
+            await collect(pool.stream(text, "en-US-AriaNeural"))
+        warm = time.perf_counter() - t0
+    finally:
+        await pool.close()
+        await fake.stop()
+    print(f"  per synthesis: Communicate {cold / len(TEXTS) * 1000:.0f} ms, "
+          f"pool {warm / len(TEXTS) * 1000:.0f} ms ({cold / warm:.1f}x)")
+    return check("pool is faster than a handshake per synthesis", warm < cold * 0.6)
+
+
+async def live_check():
+    print("Live check: 3 sequential turns on the real service")
+    pool = EdgePool(size=1)
+    try:
+        await pool.start()
+        for text in TEXTS[:3]:
+            audio, marks = await collect(pool.stream(text, "en-US-AriaNeural",
+                                                     boundary="WordBoundary"))
+            if not check("audio and boundaries", len(audio) > 1000 and marks):
+                return False
+        print("  stats:", pool.stats, "reuse:", pool.reuse)
+        return True
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    passed = asyncio.run(pool_checks())
+    passed = asyncio.run(speedup_check()) and passed
+    if "--live" in sys.argv:
+        passed = asyncio.run(live_check()) and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Self-test for upstream phase deadlines and hedged synthesis (hedging.py),
+with scripted streams, then through tts_server._edge_stream against the local
+fake_edge.py stand-in (no network).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_hedging.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+os.environ["TTS_VOICE_REFRESH_H"] = "0"
+os.environ.pop("TTS_EDGE_POOL", None)
+
+from hedging import ChunkGapTimeout, FirstByteTimeout, LatencyWindow, hedged_stream  # noqa: E402
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+class Script:
+    """open_stream() factory: the n-th stream opened follows scripts[n], a list
+    of (delay_s, chunk-or-exception). Records which streams were closed."""
+
+    def __init__(self, *scripts):
+        self.scripts = scripts
+        self.opened = 0
+        self.closed = []
+
+    def __call__(self):
+        n = self.opened
+        self.opened += 1
+        return self._stream(n)
+
+    async def _stream(self, n):
+        try:
+            for delay, item in self.scripts[n]:
+                await asyncio.sleep(delay)
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.closed.append(n)
+
+
+def audio(tag):
+    return {"type": "audio", "data": tag}
+
+
+def mark(tag):
+    return {"type": "WordBoundary", "offset": 0, "duration": 0, "text": tag}
+
+
+async def run(script, **kw):
+    kw.setdefault("first_deadline", 2.0)
+    kw.setdefault("gap", 2.0)
+    outcomes = []
+    out, error = [], None
+    t0 = time.perf_counter()
+    try:
+        async for chunk in hedged_stream(script, on_hedge=outcomes.append, **kw):
+            out.append(chunk.get("data") or chunk.get("text"))
+    except Exception as e:
+        error = e
+    await asyncio.sleep(0.02)     # let cancelled streams close
+    return out, error, outcomes, time.perf_counter() - t0
+
+
+async def deadline_checks():
+    print("Phase deadlines")
+    ok = True
+    out, error, _, elapsed = await run(Script([(5, audio("a"))]), first_deadline=0.1)
+    ok &= check("no first audio -> FirstByteTimeout at the deadline",
+                isinstance(error, FirstByteTimeout) and elapsed < 0.5, f"{error!r} {elapsed:.2f}s")
+    ok &= check("...which is still an asyncio.TimeoutError (504 path)",
+                isinstance(error, asyncio.TimeoutError))
+
+    script = Script([(0, mark("w")), (0.01, audio("a")), (0.01, audio("b")), (5, audio("c"))])
+    out, error, _, elapsed = await run(script, gap=0.1)
+    ok &= check("stall mid-stream -> ChunkGapTimeout after the chunks so far",
+                isinstance(error, ChunkGapTimeout) and out == ["w", "a", "b"] and elapsed < 0.5,
+                f"{out} {error!r} {elapsed:.2f}s")
+    ok &= check("stalled stream closed", script.closed == [0], str(script.closed))
+
+    slow_steady = [(0.05, audio(str(i))) for i in range(6)]
+    out, error, _, _ = await run(Script(slow_steady), first_deadline=0.2, gap=0.2)
+    ok &= check("long stream with steady chunks is not cut off (0.3 s > both deadlines)",
+                error is None and len(out) == 6, f"{out} {error!r}")
+
+    boom = RuntimeError("socket dropped")
+    out, error, _, _ = await run(Script([(0, audio("a")), (0, boom)]))
+    ok &= check("upstream error passes through unchanged", error is boom, repr(error))
+    return ok
+
+
+async def hedge_checks():
+    print("Hedging")
+    ok = True
+    script = Script([(0.5, audio("slow"))], [(0.01, audio("hedge"))])
+    out, error, outcomes, elapsed = await run(script, hedge_after=0.05)
+    ok &= check("late first byte -> hedge launched and wins",
+                out == ["hedge"] and outcomes == ["launched", "hedge"] and elapsed < 0.3,
+                f"{out} {outcomes} {elapsed:.2f}s")
+    ok &= check("losing stream cancelled (closed)", 0 in script.closed, str(script.closed))
+
+    script = Script([(0.1, mark("p")), (0, audio("primary")), (0, audio("p2"))],
+                    [(1.0, audio("hedge"))])
+    out, error, outcomes, _ = await run(script, hedge_after=0.05)
+    ok &= check("primary first -> primary kept, marks before its audio replayed",
+                out == ["p", "primary", "p2"] and outcomes == ["launched", "primary"],
+                f"{out} {outcomes}")
+    ok &= check("losing hedge cancelled", 1 in script.closed, str(script.closed))
+
+    script = Script([(0.1, RuntimeError("primary failed"))], [(0.2, audio("hedge"))])
+    out, error, outcomes, _ = await run(script, hedge_after=0.05)
+    ok &= check("primary fails before audio -> hedge carries on",
+                out == ["hedge"] and error is None, f"{out} {error!r}")
+
+    script = Script([(0.1, RuntimeError("first"))], [(0.1, RuntimeError("second"))])
+    out, error, outcomes, _ = await run(script, hedge_after=0.05)
+    ok &= check("both fail -> the primary's error", str(error) == "first"
+                and outcomes == ["launched"], f"{error!r} {outcomes}")
+
+    script = Script([(0.3, audio("slow"))], [(0, audio("hedge"))])
+    out, error, outcomes, _ = await run(script, hedge_after=0.05, may_hedge=lambda: False)
+    ok &= check("may_hedge() refusing -> no hedge",
+                out == ["slow"] and script.opened == 1 and outcomes == [], f"{out} {outcomes}")
+
+    script = Script([(0.01, audio("fast"))])
+    out, error, outcomes, _ = await run(script, hedge_after=0.05)
+    ok &= check("fast first byte -> never hedged", script.opened == 1 and outcomes == [])
+    return ok
+
+
+def window_checks():
+    print("First-byte p95")
+    ok = True
+    w = LatencyWindow(size=100, min_samples=20, every=10)
+    for _ in range(19):
+        w.observe(0.1)
+    ok &= check("no quantile before min_samples", w.quantile() is None)
+    w.observe(0.1)
+    ok &= check("quantile once there are enough", w.quantile() == 0.1, str(w.quantile()))
+    for i in range(100):
+        w.observe((i + 1) / 100)
+    ok &= check("p95 of 0.01..1.00 is 0.95", abs(w.quantile() - 0.95) < 1e-9, str(w.quantile()))
+    return ok
+
+
+async def server_checks():
+    print("tts_server._edge_stream")
+    from fake_edge import FakeEdge
+    import edge_tts.communicate
+
+    fake = FakeEdge(handshake_ms=5, first_byte_ms=200)
+    url = await fake.start()
+    edge_tts.communicate.WSS_URL = url
+    import tts_server
+    ok = True
+    try:
+        for _ in range(30):
+            tts_server.first_byte_window.observe(0.01)
+        tts_server.HEDGE_MIN_S = 0.02
+        text = "Hedged read of a single sentence."
+        won = {w: tts_server.HEDGES.value(w) for w in ("primary", "hedge", "none")}
+        chunks = [c async for c in tts_server._edge_stream(text, "en-US-AriaNeural")]
+        after = {w: tts_server.HEDGES.value(w) for w in won}
+        ok &= check("slow upstream hedged; one winner counted",
+                    sum(after.values()) - sum(won.values()) == 1 and after["none"] == won["none"],
+                    f"{won} -> {after}")
+        ok &= check("audio intact", any(c["type"] == "audio" for c in chunks))
+        ok &= check("hedge slot released", tts_server._hedges_running == 0)
+
+        tts_server._scheduler.request_priority.set("bulk")
+        ok &= check("bulk work never hedged", tts_server._hedge_after() is None)
+        tts_server._scheduler.request_priority.set("interactive")
+        ok &= check("interactive hedged at p95 (floored)",
+                    tts_server._hedge_after() == max(tts_server.HEDGE_MIN_S,
+                                                     tts_server.first_byte_window.quantile()))
+        ok &= check("first-audio deadline grows with text",
+                    tts_server._first_audio_deadline(5000) > tts_server._first_audio_deadline(50))
+    finally:
+        await fake.stop()
+    return ok
+
+
+async def main():
+    ok = await deadline_checks()
+    ok = await hedge_checks() and ok
+    ok = window_checks() and ok
+    ok = await server_checks() and ok
+    return ok
+
+
+if __name__ == "__main__":
+    passed = asyncio.run(main())
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Self-test for long-document jobs: server-side segmentation, the SQLite job
+store, and a whole job run against the local fake_edge.py stand-in (no
+network).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_jobs.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+_TMP = tempfile.mkdtemp(prefix="ra-jobs-")
+os.environ["TTS_JOB_DB"] = os.path.join(_TMP, "jobs.db")
+os.environ["TTS_JOB_CONCURRENCY"] = "6"
+
+import edge_tts.communicate  # noqa: E402
+
+import job_store  # noqa: E402
+import tts_server  # noqa: E402
+from fake_edge import FakeEdge  # noqa: E402
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def segmentation_checks():
+    print("Unit checks: _segment_document")
+    ok = True
+    seg = tts_server._segment_document
+
+    text = "  First sentence here. Second one!  Third?\n\nFourth and last.  "
+    spans = seg(text, 40)
+    ok &= check("offsets index the original text, trimmed",
+                all(text[s:e] == text[s:e].strip() and text[s:e] for s, e in spans), str(spans))
+    ok &= check("whole sentences packed up to max_len",
+                [text[s:e] for s, e in spans]
+                == ["First sentence here. Second one!", "Third?\n\nFourth and last."],
+                str([text[s:e] for s, e in spans]))
+
+    long_sentence = " ".join(f"word{i}" for i in range(200)) + "."
+    spans = seg(long_sentence, 100)
+    ok &= check("oversized sentence split at whitespace",
+                all(e - s <= 100 for s, e in spans)
+                and all(long_sentence[e - 1] != " " and not long_sentence[e:e + 1].isalnum()
+                        for s, e in spans),
+                str(spans[:3]))
+    joined = " ".join(long_sentence[s:e] for s, e in spans)
+    ok &= check("nothing lost or duplicated", joined == long_sentence)
+
+    cjk = "这是一个没有空格的很长的句子" * 20
+    spans = seg(cjk, 50)
+    ok &= check("no whitespace: hard cut at max_len",
+                all(e - s <= 50 for s, e in spans) and "".join(cjk[s:e] for s, e in spans) == cjk,
+                str(spans[:3]))
+    ok &= check("blank document has no segments", seg(" \n\t ", 100) == [])
+    return ok
+
+
+def store_checks():
+    print("Unit checks: JobStore")
+    ok = True
+    store = job_store.JobStore(os.path.join(_TMP, "store.db"), ttl_s=60)
+    store.create("j1", "en-US-AriaNeural", 30, [(0, 10), (11, 30)])
+    job = store.job("j1")
+    ok &= check("created running, nothing done",
+                job["state"] == job_store.RUNNING and job["segments"] == 2 and job["done"] == 0,
+                str(job))
+    store.finish_segment("j1", 0, b"payload")
+    store.fail_segment("j1", 1, "boom")
+    job = store.job("j1")
+    ok &= check("segment states counted", (job["done"], job["failed"]) == (1, 1), str(job))
+    ok &= check("segment rows", store.segments("j1") == [(0, 0, 10, "done", None),
+                                                         (1, 11, 30, "failed", "boom")])
+    ok &= check("payload kept", store.segment("j1", 0)[4] == b"payload")
+    ok &= check("set_state only_if guards the transition",
+                store.set_state("j1", job_store.CANCELLED, job_store.RUNNING)
+                and not store.set_state("j1", job_store.INTERRUPTED, job_store.RUNNING)
+                and store.job("j1")["state"] == job_store.CANCELLED)
+
+    store.create("j2", "en-US-AriaNeural", 5, [(0, 5)])
+    ok &= check("orphans of dead workers are interrupted",
+                store.interrupt_orphans(lambda pid: False) == 1
+                and store.job("j2")["state"] == job_store.INTERRUPTED)
+
+    try:
+        store.finish_segment("j2", 0, object())     # unbindable: fails mid-transaction
+        failed = False
+    except Exception:
+        failed = True
+    try:
+        store.finish_segment("j2", 0, b"later")
+        store.sweep()
+        recovered = store.segment("j2", 0)[4] == b"later"
+    except Exception as e:
+        recovered = repr(e)
+    ok &= check("a failed write is rolled back; the next one goes through",
+                failed and recovered is True, str(recovered))
+
+    store.ttl_s = 0
+    time.sleep(0.01)
+    ok &= check("expired jobs are invisible", store.job("j1") is None)
+    ok &= check("sweep deletes them and their segments",
+                store.sweep() == 2 and store.segments("j1") == [])
+    return ok
+
+
+async def job_checks():
+    print("Job run (fake upstream)")
+    ok = True
+    fake = FakeEdge(handshake_ms=5, first_byte_ms=150)
+    edge_tts.communicate.WSS_URL = await fake.start()
+    try:
+        sentence = "Chapter {} opens on a quiet street where nothing much happens at all."
+        text = " ".join(sentence.format(i) for i in range(24))
+        spans = tts_server._segment_document(text, 150)
+        n = len(spans)
+        tts_server.job_store.create("doc", "en-US-AriaNeural", len(text), spans)
+
+        t0 = time.perf_counter()
+        await tts_server._run_job("doc", text, spans, "en-US-AriaNeural")
+        elapsed = time.perf_counter() - t0
+        serial = n * fake.first_byte_ms / 1000
+        job = tts_server.job_store.job("doc")
+        ok &= check("every segment synthesized",
+                    job["state"] == job_store.DONE and job["done"] == n, str(job))
+        ok &= check("segments run in parallel", elapsed < serial / 2,
+                    f"{elapsed:.2f}s for {n} segments, serial >= {serial:.2f}s")
+        print(f"  {n} segments: {elapsed:.2f}s (serial would be >= {serial:.2f}s)")
+
+        start, end, _state, _err, payload = tts_server.job_store.segment("doc", n - 1)
+        seg = tts_server._job_segment_json(n - 1, start, end, payload)
+        chars = [c for _t, c in seg["words"]]
+        ok &= check("word offsets are absolute",
+                    chars and chars[0] == start and all(start <= c < end for c in chars)
+                    and text[chars[2]:].startswith("opens"), str(chars[:4]))
+    finally:
+        await fake.stop()
+    return ok
+
+
+async def stream_gone_checks():
+    print("Stream of a job deleted mid-stream")
+    spans = [(0, 10), (10, 20), (20, 30)]
+    store = tts_server.job_store
+    store.create("gone", "en-US-AriaNeural", 30, spans)
+    _s, _e, _st, _err, payload = store.segment("doc", 0)
+    store.finish_segment("gone", 0, payload)
+    scope = {"type": "http", "method": "GET", "path": "/api/tts/jobs/gone/stream",
+             "raw_path": b"/api/tts/jobs/gone/stream", "query_string": b"",
+             "headers": [(b"origin", tts_server.ALLOWED_ORIGIN_PREFIXES[0].encode())],
+             "http_version": "1.1", "scheme": "http", "server": ("test", 80),
+             "client": ("127.0.0.1", 1), "root_path": ""}
+    sent, first_record = [], asyncio.Event()
+    received = []
+
+    async def receive():
+        if received:
+            await asyncio.Future()
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_record.set()
+
+    app = asyncio.create_task(tts_server.app(scope, receive, send))
+    await asyncio.wait_for(first_record.wait(), 5)
+    ttl, store.ttl_s = store.ttl_s, -60     # expire everything
+    store.sweep()
+    store.ttl_s = ttl
+    error = None
+    try:
+        await asyncio.wait_for(app, 5)
+    except Exception as e:
+        error = e
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    ok = check("stream finishes cleanly", error is None and sent[0]["status"] == 200
+               and not sent[-1].get("more_body"), repr(error))
+    ok &= check("remaining segments reported as gone",
+                [r["index"] for r in records] == [0, 1, 2] and "audio" in records[0]
+                and all(r.get("error") == "job gone" for r in records[1:]),
+                str([{k: v for k, v in r.items() if k != "audio"} for r in records]))
+    return ok
+
+
+if __name__ == "__main__":
+    passed = segmentation_checks()
+    passed = store_checks() and passed
+    passed = asyncio.run(job_checks()) and passed
+    passed = asyncio.run(stream_gone_checks()) and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
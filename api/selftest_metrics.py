@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Self-test for the /metrics registry (no network, no server).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_metrics.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import re
+import sys
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from metrics import Registry
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def main():
+    print("Unit checks: metrics registry")
+    ok = True
+
+    reg = Registry()
+    h = reg.histogram("t_seconds", "test", ("stage",), buckets=(0.01, 0.1, 1.0))
+    for v in (0.005, 0.01, 0.05, 0.5, 5.0):
+        h.observe(v, "a")
+    text = reg.render()
+    buckets = re.findall(r't_seconds_bucket\{stage="a",le="([^"]+)"\} (\d+)', text)
+    ok &= check("histogram buckets are cumulative, le inclusive",
+                buckets == [("0.01", "2"), ("0.1", "3"), ("1", "4"), ("+Inf", "5")], str(buckets))
+    total = re.search(r't_seconds_sum\{stage="a"\} (\S+)', text)
+    ok &= check("histogram count and sum",
+                't_seconds_count{stage="a"} 5' in text and total
+                and abs(float(total.group(1)) - 5.565) < 1e-9, text)
+    ok &= check("TYPE line", "# TYPE t_seconds histogram" in text)
+
+    c = reg.counter("t_total", "test", ("type",))
+    c.inc('Bad "quote"\\')
+    c.inc('Bad "quote"\\', n=2)
+    ok &= check("label values escaped",
+                't_total{type="Bad \\"quote\\"\\\\"} 3' in reg.render(), reg.render())
+
+    plain = reg.counter("t_plain_total", "test")
+    ok &= check("unlabelled counter renders 0 before first inc",
+                "\nt_plain_total 0\n" in reg.render())
+    plain.inc()
+    ok &= check("unlabelled counter inc", plain.value() == 1)
+
+    reg.gauge("t_gauge", "test", lambda: {("x",): 2, ("y",): 3}, ("lane",))
+    reg.gauge("t_none", "test", lambda: None)
+    reg.gauge("t_broken", "test", lambda: 1 / 0)
+    text = reg.render()
+    ok &= check("callback gauge with labels",
+                't_gauge{lane="x"} 2' in text and 't_gauge{lane="y"} 3' in text)
+    ok &= check("None and failing callbacks are skipped",
+                "t_none" not in text and "t_broken" not in text)
+
+    with h.time("timed"):
+        time.sleep(0.002)
+    ok &= check("timer observes", h.count("timed") == 1)
+
+    # Hot path: the server observes a handful of stages per request.
+    n = 200_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        h.observe(0.003, "hot")
+    per_observe_us = (time.perf_counter() - t0) / n * 1e6
+    ok &= check("observe overhead", per_observe_us < 5,
+                f"{per_observe_us:.2f} us/observe")
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with h.time("hot"):
+            pass
+    per_timer_us = (time.perf_counter() - t0) / n * 1e6
+    ok &= check("timed block overhead", per_timer_us < 10, f"{per_timer_us:.2f} us/block")
+    print(f"  observe {per_observe_us:.2f} us, timed block {per_timer_us:.2f} us")
+
+    print()
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
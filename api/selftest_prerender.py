@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Self-test for the bulk pre-render CLI: text extraction, output files,
+skip-by-hash and cache fill, against the local fake_edge.py stand-in (no
+network).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_prerender.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+_TMP = tempfile.mkdtemp(prefix="ra-prerender-")
+os.environ["TTS_DISK_CACHE_DIR"] = os.path.join(_TMP, "cache")
+
+import edge_tts.communicate  # noqa: E402
+
+import prerender  # noqa: E402
+from fake_edge import FakeEdge  # noqa: E402
+
+HTML = """<!DOCTYPE html><html><head><title>T</title><script>var x = 1;</script></head>
+<body><header class="site-header"><nav><a href="/">Home</a></nav></header>
+<main><header class="page-head"><h1>Listening &amp; Reading</h1></header>
+<article><p>First paragraph, with a <a href="/x">link</a> inside.</p>
+<ul><li>Item one</li><li>Item two</li></ul><style>p { color: red }</style></article></main>
+<footer>Copyright</footer></body></html>"""
+
+MARKDOWN = """---
+title: Notes
+---
+# Chapter one
+
+Some **bold** text and a [link](http://example.com).
+It continues here.
+
+```
+print("not spoken")
+```
+
+- first point
+- second_point_name
+"""
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def extraction_checks():
+    print("Unit checks: text extraction")
+    ok = True
+    text = prerender.html_text(HTML)
+    ok &= check("HTML: <main> content only, blocks punctuated",
+                text == "Listening & Reading.\n\nFirst paragraph, with a link inside."
+                        "\n\nItem one.\n\nItem two.", repr(text))
+    text = prerender.markdown_text(MARKDOWN)
+    ok &= check("Markdown: front matter, code and markup dropped",
+                text == "Chapter one.\n\nSome bold text and a link. It continues here."
+                        "\n\nfirst point.\n\nsecond_point_name.", repr(text))
+    return ok
+
+
+async def render_checks():
+    print("Render (fake upstream)")
+    ok = True
+    src, out = os.path.join(_TMP, "src"), os.path.join(_TMP, "out")
+    os.makedirs(os.path.join(src, "sub"))
+    with open(os.path.join(src, "page.html"), "w", encoding="utf-8") as f:
+        f.write(HTML)
+    with open(os.path.join(src, "sub", "notes.md"), "w", encoding="utf-8") as f:
+        f.write(MARKDOWN)
+    with open(os.path.join(src, "long.txt"), "w", encoding="utf-8") as f:
+        f.write(" ".join(f"Sentence number {i} of a long plain text file." for i in range(60)))
+    inputs = prerender.find_inputs([src])
+    ok &= check("inputs found recursively",
+                sorted(r for _p, r in inputs) == ["long.txt", "page.html",
+                                                  os.path.join("sub", "notes.md")], str(inputs))
+
+    fake = FakeEdge(handshake_ms=5, first_byte_ms=20)
+    edge_tts.communicate.WSS_URL = await fake.start()
+    try:
+        results = await prerender._render_all(inputs, out, "en-US-AriaNeural", 300, 4, False)
+        ok &= check("every input rendered", [s for _r, s, _d in results] == ["rendered"] * 3,
+                    str(results))
+        with open(os.path.join(out, "long.json"), encoding="utf-8") as f:
+            doc = json.load(f)
+        text, words = doc["text"], doc["words"]
+        chars = [c for _t, c in words]
+        times = [t for t, _c in words]
+        ok &= check("several segments, joined",
+                    len(doc["segments"]) > 3 and doc["segments"][1]["t_ms"] > 0,
+                    str(doc["segments"][:2]))
+        ok &= check("word offsets absolute and increasing",
+                    chars == sorted(set(chars)) and text[chars[-1]:].startswith("file")
+                    and times == sorted(times), str(words[-3:]))
+        mp3 = os.path.getsize(os.path.join(out, "long.mp3"))
+        ok &= check("audio covers the timings", mp3 * 8 * 1000 // 48000 >= doc["duration_ms"],
+                    f"{mp3} bytes for {doc['duration_ms']} ms")
+        ok &= check("nested outputs mirror the input tree",
+                    os.path.exists(os.path.join(out, "sub", "notes.mp3")))
+
+        turns = fake.turns
+        again = await prerender._render_all(inputs, out, "en-US-AriaNeural", 300, 4, False)
+        ok &= check("unchanged inputs skipped", [s for _r, s, _d in again] == ["skipped"] * 3
+                    and fake.turns == turns, str(again))
+        forced = await prerender._render_all(inputs, out, "en-US-AriaNeural", 300, 4, True)
+        ok &= check("--force re-renders from the cache",
+                    [s for _r, s, _d in forced] == ["rendered"] * 3 and fake.turns == turns,
+                    f"{fake.turns - turns} upstream turns")
+        cached = os.listdir(os.environ["TTS_DISK_CACHE_DIR"])
+        ok &= check("server disk cache filled", len(cached) >= len(doc["segments"]) + 2,
+                    str(len(cached)))
+    finally:
+        await fake.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    passed = extraction_checks()
+    passed = asyncio.run(render_checks()) and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Self-test for the GCRA rate limiter (no network, no server, fake clock).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_rate_limit.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from rate_limit import RateLimiter, SharedRateLimiter
+from shared_inflight import SharedInflight
+
+
+class Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def limiter_checks():
+    print("Unit checks: RateLimiter")
+    ok = True
+
+    clock = Clock()
+    rl = RateLimiter(requests=5, window_s=60, clock=clock)
+    allowed = [rl.check("a") == 0 for _ in range(6)]
+    ok &= check("full burst allowed, then refused", allowed == [True] * 5 + [False], str(allowed))
+    wait = rl.check("a")
+    ok &= check("retry-after is one emission interval", abs(wait - 12.0) < 1e-6, str(wait))
+    ok &= check("other clients unaffected", rl.check("b") == 0)
+    clock.t += 12
+    ok &= check("one slot back after the interval", rl.check("a") == 0 and rl.check("a") > 0)
+
+    # Character budget: cost scales with text length, independently of count.
+    clock = Clock()
+    rl = RateLimiter(requests=50, chars=10_000, window_s=60, clock=clock)
+    ok &= check("big request fits the char burst", rl.check("a", 6_000) == 0)
+    wait = rl.check("a", 6_000)
+    ok &= check("second big request refused", wait > 0, str(wait))
+    ok &= check("small request still fits", rl.check("a", 3_000) == 0)
+    ok &= check("refused requests are not charged", rl.check("a", 1_000) == 0)
+    clock.t += 60
+    ok &= check("oversized request admitted on a full bucket", rl.check("a", 50_000) == 0)
+    ok &= check("...and drains it", rl.check("a", 100) > 0)
+
+    # Timing-wheel expiry: idle clients are dropped without any sweep call.
+    clock = Clock()
+    rl = RateLimiter(requests=50, chars=10_000, window_s=60, clock=clock)
+    for i in range(1000):
+        rl.check(f"ip{i}", 100)
+    ok &= check("state per client", len(rl) == 1000, str(len(rl)))
+    clock.t += 0.5
+    rl.check("late", 100)
+    ok &= check("live state kept", len(rl) == 1001, str(len(rl)))
+    clock.t += 500  # more than a full lap of the wheel
+    rl.check("late")
+    ok &= check("idle clients expired", len(rl) == 1, str(len(rl)))
+
+    # Keys re-filed under a later slot survive their old slot coming due.
+    clock = Clock()
+    rl = RateLimiter(requests=2, window_s=10, clock=clock)
+    rl.check("a")
+    clock.t += 4
+    rl.check("a")
+    rl.check("a")  # refused: TAT stays 10s ahead
+    clock.t += 2
+    rl.check("b")
+    ok &= check("re-filed key not expired early", rl.check("a") == 0 and rl.check("a") > 0)
+
+    # O(1): cost per call must not grow with the number of tracked clients.
+    rl = RateLimiter(requests=50, chars=60_000, window_s=60)
+    t0 = time.perf_counter()
+    for i in range(100_000):
+        rl.check(f"10.0.{i % 256}.{i // 256 % 256}", 400)
+    per_call_us = (time.perf_counter() - t0) / 100_000 * 1e6
+    print(f"  {per_call_us:.2f} us/check over {len(rl)} clients")
+    ok &= check("check is cheap", per_call_us < 50, f"{per_call_us:.1f} us")
+    return ok
+
+
+def shared_checks():
+    print("Unit checks: SharedRateLimiter / SharedInflight (forked workers)")
+    ok = True
+    root = tempfile.mkdtemp(prefix="ra-shared-")
+
+    # Three forked workers, one budget: 10 requests total get through, not 30.
+    rl = SharedRateLimiter(os.path.join(root, "rl.bin"), requests=10, window_s=60, slots=1024)
+    pids = []
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(sum(rl.check("1.2.3.4") == 0 for _ in range(10)))
+        pids.append(pid)
+    allowed = sum(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in pids)
+    ok &= check("one budget across workers", allowed == 10, f"{allowed} allowed")
+    ok &= check("parent sees the same table", rl.check("1.2.3.4") > 0 and rl.check("5.6.7.8") == 0)
+
+    # Expired slots are reused rather than filling the table.
+    clock = Clock()
+    rl = SharedRateLimiter(os.path.join(root, "rl2.bin"), requests=5, window_s=10, slots=64,
+                           clock=clock)
+    for i in range(64):
+        rl.check(f"ip{i}")
+    clock.t += 11
+    for i in range(64, 128):
+        rl.check(f"ip{i}")
+    ok &= check("expired slots recycled", len(rl) == 64, str(len(rl)))
+    full = all(rl.check(f"ip{i}") == 0 for i in range(128, 200))
+    ok &= check("full table stays lenient", full)
+
+    # Same file after a reboot: the monotonic clock starts near zero again.
+    clock = Clock(500_000)
+    path = os.path.join(root, "rl3.bin")
+    rl = SharedRateLimiter(path, requests=5, chars=1000, window_s=60, slots=64, clock=clock)
+    rl.check("9.9.9.9", 1000)
+    clock.t = 30
+    rl = SharedRateLimiter(path, requests=5, chars=1000, window_s=60, slots=64, clock=clock)
+    wait = rl.check("9.9.9.9", 100)
+    ok &= check("table from an earlier clock doesn't lock clients out", wait == 0, f"wait {wait:.0f}s")
+
+    reg = SharedInflight(os.path.join(root, "inflight.db"))
+    ok &= check("first claim wins", reg.claim("k") is True)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if reg.claim("k") is False and reg.result("k")[0] == "running" else 1)
+    ok &= check("other worker sees it running", os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0)
+    reg.finish("k", b"payload")
+    ok &= check("result handed over", reg.result("k") == ("done", b"payload"))
+    pid = os.fork()
+    if pid == 0:
+        reg.claim("orphan")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    ok &= check("dead owner's claim is reclaimable", reg.result("orphan")[0] == "gone"
+                and reg.claim("orphan") is True)
+    return ok
+
+
+if __name__ == "__main__":
+    passed = limiter_checks()
+    if hasattr(os, "fork"):
+        passed = shared_checks() and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Self-test for the fast cold-start path: what stays off the import, lazy
+billing, deferred init after the first response, and /ready. Drives the
+ASGI app directly (no server, no network).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_startup.py
+
+bench_startup.py measures the real thing (uvicorn, timings, target).
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+os.environ["TTS_VOICE_REFRESH_H"] = "0"
+os.environ.pop("TTS_FAST_START", None)
+os.environ.pop("TTS_EDGE_POOL", None)
+
+import tts_server  # noqa: E402
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+async def _get(path: str) -> tuple:
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+             "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+             "server": ("test", 80), "client": ("127.0.0.1", 1), "root_path": ""}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await tts_server.app(scope, receive, send)
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], body
+
+
+def import_checks():
+    print("Import")
+    ok = True
+    ok &= check("billing not imported", "billing" not in sys.modules
+                and not tts_server._billing_loaded)
+    ok &= check("NumPy not imported", "numpy" not in sys.modules)
+    report = tts_server.boot_clock.report()
+    ok &= check("import phases recorded",
+                {"edge_tts", "fastapi", "routes"} <= set(report["phases"])
+                and report["import_ms"] > 0, str(report["phases"]))
+    return ok
+
+
+async def lifecycle_checks():
+    print("Deferred init and /ready")
+    ok = True
+    tts_server.DEFER_S = 30   # only the first response may start it here
+    await tts_server._schedule_deferred_init()
+    status, body = await _get("/ready")
+    ok &= check("/ready 503 before the deferred init", status == 503
+                and json.loads(body)["checks"]["deferred_init"] is False, body[:120])
+
+    status, body = await _get("/api/billing/tiers")
+    # Billing is unconfigured here: its own route answers 404 "billing not
+    # enabled", where a request that beat the import would get "Not Found".
+    ok &= check("first billing request is routed to billing",
+                tts_server._billing_loaded and json.loads(body)["detail"] == "billing not enabled",
+                f"{status} {body[:80]}")
+    routes = len(tts_server.app.routes)
+    await _get("/api/billing/status")
+    ok &= check("billing routes mounted once", len(tts_server.app.routes) == routes)
+
+    status, _ = await _get("/")
+    ok &= check("/ serves", status == 200)
+    await asyncio.wait_for(tts_server._deferred_task, 5)
+    status, body = await _get("/ready")
+    report = json.loads(body)
+    events = report["boot"]["events"]
+    ok &= check("/ready 200 after the first response",
+                status == 200 and report["ready"] is True, body[:200])
+    ok &= check("deferred init ran after the first response",
+                events["first_response"] <= events["deferred_init"], str(events))
+    if tts_server.TEMPO_ENABLED:
+        ok &= check("NumPy preloaded by the deferred init",
+                    "numpy" in sys.modules or not tts_server._tempo.HAVE_NUMPY)
+    await tts_server._stop_deferred_init()
+    return ok
+
+
+if __name__ == "__main__":
+    passed = import_checks()
+    passed = asyncio.run(lifecycle_checks()) and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
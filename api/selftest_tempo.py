@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Self-test for server-side tempo rendering (no network, no server).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_tempo.py
+
+WSOLA checks need NumPy and the MP3 round trip needs ffmpeg (TTS_FFMPEG, on
+PATH, or imageio-ffmpeg's); whatever is missing is reported as skipped, the same way the
+server falls back without them.
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import base64
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+import tempo
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE = os.path.join(HERE, "..", "scripts", "timed_payload.json")
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def unit_checks():
+    print("Unit checks: rates")
+    ok = True
+    ok &= check("Edge rate strings", tempo.parse_rate("+50%") == 1.5
+                and tempo.parse_rate("-20%") == 0.8 and tempo.parse_rate("+0%") == 1.0)
+    try:
+        tempo.parse_rate("+500%")
+        ok &= check("out-of-range rate rejected", False)
+    except ValueError:
+        ok &= check("out-of-range rate rejected", True)
+    ok &= check("atempo chain stays within 0.5..2 per stage",
+                tempo._atempo_chain(3.0) == "atempo=2.000000,atempo=1.500000"
+                and tempo._atempo_chain(0.3) == "atempo=0.500000,atempo=0.600000")
+    return ok
+
+
+def wsola_checks():
+    print("Unit checks: WSOLA")
+    if not tempo.HAVE_NUMPY:
+        print("  skipped — NumPy not installed (server would use ffmpeg atempo)")
+        return True
+    np = tempo._numpy()
+    ok = True
+    sr = tempo.SAMPLE_RATE
+    t = np.arange(sr * 2) / sr
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    for rate in (0.75, 1.5, 2.0):
+        y = tempo.wsola(tone, rate)
+        spectrum = np.abs(np.fft.rfft(y * np.hanning(len(y))))
+        peak = np.argmax(spectrum) * sr / len(y)
+        ok &= check(f"{rate}x: length scaled, pitch kept",
+                    len(y) == int(len(tone) / rate) and abs(peak - 440) < 5,
+                    f"{len(y)} samples, peak {peak:.1f} Hz")
+    y = tempo.wsola(tone, 1.5)
+    body = y[tempo.FRAME:-tempo.FRAME]
+    ok &= check("steady level (windows sum to 1)",
+                abs(float(np.sqrt(np.mean(body ** 2))) - 0.5 / np.sqrt(2)) < 0.02)
+    return ok
+
+
+def engine_checks():
+    print("Engine selection (deploy)")
+    ok = True
+    with open(os.path.join(HERE, "requirements.txt"), encoding="utf-8") as f:
+        reqs = {line.split(">")[0].split("=")[0].strip().lower() for line in f if line.strip()}
+    ok &= check("requirements.txt installs NumPy and a bundled ffmpeg",
+                {"numpy", "imageio-ffmpeg"} <= reqs, str(sorted(reqs)))
+    if tempo.HAVE_NUMPY and tempo.available():
+        ok &= check("NumPy + ffmpeg -> WSOLA, not atempo", tempo.engine() == "wsola",
+                    str(tempo.engine()))
+    else:
+        print("  skipped engine() == wsola — NumPy or ffmpeg missing here")
+    if importlib.util.find_spec("imageio_ffmpeg") is None:
+        print("  skipped bundled ffmpeg — imageio-ffmpeg not installed")
+        return ok
+    # What a pip-only host sees: no TTS_FFMPEG, no ffmpeg on PATH.
+    env = {k: v for k, v in os.environ.items() if k != "TTS_FFMPEG"}
+    env["PATH"] = ""
+    out = subprocess.run([sys.executable, "-c", "import tempo; print(tempo.engine())"],
+                         cwd=HERE, env=env, capture_output=True, text=True, timeout=60)
+    expect = "wsola" if tempo.HAVE_NUMPY else "atempo"
+    ok &= check(f"no ffmpeg on PATH -> imageio-ffmpeg's binary, engine {expect}",
+                out.stdout.strip() == expect, out.stdout.strip() or out.stderr[-200:])
+    return ok
+
+
+def mp3_checks():
+    print("MP3 round trip (ffmpeg)")
+    if not tempo.available():
+        print("  skipped — ffmpeg not found (server would ask Edge for the rate)")
+        return True
+    ok = True
+    with open(SAMPLE, encoding="utf-8") as f:
+        mp3 = base64.b64decode(json.load(f)["audio"])
+    natural_s = len(mp3) * 8 / 48000
+    for rate in (0.8, 1.5):
+        out = tempo.stretch_mp3(mp3, rate)
+        seconds = len(out) * 8 / 48000
+        ok &= check(f"{rate}x ({tempo.engine()}): duration scaled",
+                    abs(seconds - natural_s / rate) < 0.25, f"{seconds:.2f}s vs {natural_s / rate:.2f}s")
+        ok &= check(f"{rate}x: bare MPEG-2 frames like Edge's (concatenable)",
+                    out[:2] == b"\xff\xf3" and b"ID3" not in out[:10] and b"Xing" not in out[:200])
+    try:
+        tempo.stretch_mp3(b"not audio" * 100, 1.5)
+        ok &= check("bad input raises TempoError", False)
+    except tempo.TempoError:
+        ok &= check("bad input raises TempoError", True)
+    return ok
+
+
+if __name__ == "__main__":
+    passed = unit_checks()
+    passed = wsola_checks() and passed
+    passed = engine_checks() and passed
+    passed = mp3_checks() and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -15,7 +15,8 @@ import sys
 
 sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
 
-from tts_server import TICKS_PER_MS, _map_word_offsets
+from tts_server import (TICKS_PER_MS, _map_word_offsets, _split_sentences, _timed_decode,
+                        _timed_encode)
 
 
 def t(ms):
@@ -47,20 +48,49 @@ def unit_checks():
     words = _map_word_offsets(text, b)
     ok &= check("repeated words advance", [w[1] for w in words] == [0, 3, 6], str(words))
 
-    # Normalized token ("2026" spoken as words) is skipped, following words recover.
+    # Normalized token ("2026" spoken as a year) anchors once, following words recover.
     text = "In 2026 we shipped it."
     b = [(t(0), t(100), "In"), (t(150), t(300), "twenty"), (t(450), t(300), "twenty-six"),
          (t(800), t(100), "we"), (t(950), t(200), "shipped"), (t(1200), t(100), "it")]
     words = _map_word_offsets(text, b)
-    ok &= check("normalized number skipped", [w[1] for w in words] == [0, 8, 11, 19], str(words))
+    ok &= check("spoken year anchors the number", words == [[0, 0], [150, 3], [800, 8],
+                                                            [950, 11], [1200, 19]], str(words))
 
-    # A skipped token must not false-match far ahead (window guard).
+    # A spoken word must not false-match far ahead (window guard).
     text = "Price: 100. " + "x" * 300 + " one more thing"
     b = [(t(0), t(100), "Price"), (t(200), t(300), "one hundred"), (t(600), t(100), "one")]
     words = _map_word_offsets(text, b)
-    # "one hundred" isn't in the text; bare "one" appears 300+ chars ahead — outside
-    # the window from cursor (after "Price"), so it must be skipped too.
-    ok &= check("window guard blocks far match", [w[1] for w in words] == [0], str(words))
+    # "one hundred" is the expansion of "100"; the stray bare "one" appears 300+
+    # chars ahead — outside the window from the cursor, so it must be skipped.
+    ok &= check("window guard blocks far match", [w[1] for w in words] == [0, 7], str(words))
+
+    # Expansions: cardinal, ordinal, abbreviation, money, percent, decimal.
+    text = "Dr. Smith paid $5 for 21st-century tools, 50% off 3.5 kg & 1,200 more."
+    spoken = ("Doctor Smith paid five dollars for twenty-first century tools fifty percent "
+              "off three point five kilograms and one thousand two hundred more").split()
+    b = [(t(i * 100), t(90), w) for i, w in enumerate(spoken)]
+    words = _map_word_offsets(text, b)
+    want = ["Dr.", "Smith", "paid", "$5", "for", "21st", "century", "tools", "50%", "off",
+            "3.5", "kg", "&", "1,200", "more"]
+    got = [text[c:c + len(w)] for (_, c), w in zip(words, want)]
+    ok &= check("expansions anchor their source tokens", got == want, str(got))
+    ok &= check("expansion anchors at the first spoken word",
+                [w[0] for w in words[:5]] == [0, 100, 200, 300, 500], str(words[:5]))
+
+    # The source token itself spoken verbatim still matches directly.
+    words = _map_word_offsets("Call 911 now", [(t(0), 1, "Call"), (t(1), 1, "911"),
+                                               (t(2), 1, "now")])
+    ok &= check("verbatim number matches", [w[1] for w in words] == [0, 5, 9], str(words))
+
+    # Unplaceable words cost bounded work: a long miss streak stays linear.
+    import time
+    text = " ".join(["word"] * 100_000)
+    b = [(t(i), 1, "zzz") for i in range(20_000)] + [(t(20_000), 1, "word")]
+    t0 = time.perf_counter()
+    words = _map_word_offsets(text, b)
+    elapsed = time.perf_counter() - t0
+    ok &= check("misses never scan to the end", elapsed < 2.0 and words == [[20_000, 0]],
+                f"{elapsed:.2f}s {words[:2]}")
 
     # Case-insensitive match.
     text = "HELLO world"
@@ -79,6 +109,45 @@ def unit_checks():
     return ok
 
 
+def sentence_checks():
+    print("Unit checks: _split_sentences")
+    ok = True
+
+    text = "The first sentence is long enough on its own. Short one. Another short one, right here at the end!  "
+    spans = _split_sentences(text)
+    ok &= check("spans trimmed and ordered", spans == [(0, 45), (46, 98)], str(spans))
+    ok &= check("spans cover every word", " ".join(text[s:e] for s, e in spans) == text.strip(),
+                str([text[s:e] for s, e in spans]))
+
+    # Abbreviations don't become clipped one-word syntheses.
+    text = "Dr. Smith arrived. Then he left quickly for the airport."
+    spans = _split_sentences(text)
+    ok &= check("short pieces merge forward", all(e - s >= 18 for s, e in spans), str(spans))
+
+    ok &= check("no terminator is one span", _split_sentences("  just words  ") == [(2, 12)])
+    ok &= check("whitespace only is empty", _split_sentences("   ") == [])
+    return ok
+
+
+def binary_checks():
+    print("Unit checks: binary timed format")
+    ok = True
+
+    words = [[0, 0], [250, 4], [500, 10], [490, 9], [70_000, 4_900]]
+    audio = bytes(range(256)) * 40
+    payload = _timed_encode(words, 71_234, audio)
+    w, dur, a = _timed_decode(payload)
+    ok &= check("anchors round-trip (incl. a backwards step)", w == words, str(w))
+    ok &= check("duration round-trips", dur == 71_234, str(dur))
+    ok &= check("audio is the raw tail", bytes(a) == audio)
+    ok &= check("header smaller than the base64 overhead",
+                len(payload) - len(audio) < len(audio) // 3, str(len(payload) - len(audio)))
+
+    _w, dur, a = _timed_decode(_timed_encode([], None, b""))
+    ok &= check("empty + unknown duration", dur is None and len(a) == 0)
+    return ok
+
+
 async def live_check():
     import edge_tts
     print("Live check: real Edge TTS synthesis with word boundaries")
@@ -117,6 +186,8 @@ async def live_check():
 
 if __name__ == "__main__":
     passed = unit_checks()
+    passed = sentence_checks() and passed
+    passed = binary_checks() and passed
     if "--live" in sys.argv:
         passed = asyncio.run(live_check()) and passed
     print("PASS" if passed else "FAIL")
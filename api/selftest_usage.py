@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Self-test for the usage telemetry pipeline (no network, no server).
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_usage.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from usage_rollup import LatencySketch, Rollup, ensure_schema, prune, summary
+from usage_writer import UsageWriter
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def _db():
+    path = os.path.join(tempfile.mkdtemp(prefix="ra-usage-"), "usage.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def writer_checks():
+    print("Unit checks: UsageWriter")
+    ok = True
+
+    path = _db()
+    w = UsageWriter(path, "INSERT INTO t (a, b) VALUES (?, ?)", max_batch=100,
+                    flush_interval_s=0.2)
+    t0 = time.perf_counter()
+    for i in range(1000):
+        w.put((i, "x"))
+    per_put_us = (time.perf_counter() - t0) / 1000 * 1e6
+    ok &= check("put never touches the disk", per_put_us < 200, f"{per_put_us:.1f} us/put")
+    deadline = time.monotonic() + 5
+    while w.written < 1000 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    ok &= check("size-triggered batches land", _count(path) == 1000, str(_count(path)))
+
+    w.put((1, "late"))
+    time.sleep(0.5)
+    ok &= check("time-triggered flush", _count(path) == 1001, str(_count(path)))
+
+    w.put((2, "at-shutdown"))
+    w.close()
+    ok &= check("close flushes the tail", _count(path) == 1002, str(_count(path)))
+
+    # Overload: a writer that cannot keep up drops rows instead of blocking.
+    path = _db()
+    w = UsageWriter(path, "INSERT INTO t (a, b) VALUES (?, ?)", max_queue=10)
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN EXCLUSIVE")  # stall the writer like a wedged disk
+    t0 = time.perf_counter()
+    for i in range(500):
+        w.put((i, "x"))
+    elapsed = time.perf_counter() - t0
+    ok &= check("overload drops, does not block", w.dropped > 0 and elapsed < 0.5,
+                f"dropped={w.dropped} in {elapsed:.2f}s")
+    locker.execute("COMMIT")
+    locker.close()
+    w.close(timeout=10)
+    return ok
+
+
+RAW_SCHEMA = ("CREATE TABLE tts_requests (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, "
+              "voice TEXT NOT NULL, char_count INTEGER NOT NULL, cache_hit INTEGER NOT NULL, "
+              "duration_ms INTEGER NOT NULL, coalesced INTEGER NOT NULL DEFAULT 0)")
+RAW_INSERT = ("INSERT INTO tts_requests (ts, voice, char_count, cache_hit, duration_ms, coalesced) "
+              "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def _rows(n, hours_back=0, seed=1):
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    out = []
+    for _ in range(n):
+        ts = now - timedelta(hours=rnd.uniform(0, hours_back), seconds=1)
+        out.append((ts.isoformat(timespec="seconds"), rnd.choice(["en-US-AriaNeural", "en-GB-RyanNeural"]),
+                    rnd.choice([50, 300, 1200, 4000, 6000]), rnd.random() < 0.4,
+                    int(rnd.lognormvariate(6, 0.8)), rnd.random() < 0.1))
+    return out
+
+
+def rollup_checks():
+    print("Unit checks: LatencySketch / usage rollups")
+    ok = True
+
+    rnd = random.Random(7)
+    values = [rnd.lognormvariate(6, 1) for _ in range(20_000)]
+    a, b = LatencySketch(), LatencySketch()
+    for i, v in enumerate(values):
+        (a if i % 2 else b).add(v)
+    a.merge(b)
+    exact = sorted(values)
+    worst = max(abs(a.quantile(q) - exact[int(q * (len(exact) - 1))]) / exact[int(q * (len(exact) - 1))]
+                for q in (0.5, 0.95, 0.99))
+    ok &= check("merged quantiles within 2%", worst <= 0.021, f"{worst:.3%}")
+    ok &= check("serialization round-trips",
+                LatencySketch.from_bytes(a.to_bytes()).quantile(0.95) == a.quantile(0.95))
+    ok &= check("compact", len(a.to_bytes()) < 4096, f"{len(a.to_bytes())} bytes")
+
+    # Incremental rollups agree with aggregating the raw rows directly.
+    path = os.path.join(tempfile.mkdtemp(prefix="ra-rollup-"), "usage.db")
+    conn = sqlite3.connect(path)
+    conn.execute(RAW_SCHEMA)
+    ensure_schema(conn)
+    conn.commit()
+    conn.close()
+    w = UsageWriter(path, RAW_INSERT, max_batch=50, on_batch=Rollup())
+    rows = _rows(2000, hours_back=30)
+    for r in rows:
+        w.put(r)
+    w.close()
+    conn = sqlite3.connect(path)
+    stats = summary(conn)
+    raw_24h = conn.execute("SELECT COUNT(*), SUM(char_count), SUM(cache_hit) FROM tts_requests "
+                           "WHERE ts > strftime('%Y-%m-%dT%H:00:00', 'now', '-23 hours')").fetchone()
+    ok &= check("all-time totals", stats["all_time"]["reqs"] == 2000
+                and stats["all_time"]["chars"] == sum(r[2] for r in rows), str(stats["all_time"]))
+    ok &= check("last-24h cards match raw rows",
+                (stats["today"]["reqs"], stats["today"]["chars"], stats["today"]["hits"]) == tuple(raw_24h),
+                f"{stats['today']['reqs']} vs {raw_24h}")
+    durs = sorted(r[4] for r in rows)
+    p95 = durs[int(0.95 * (len(durs) - 1))]
+    week_p95 = max(d["p95"] for d in stats["daily"])
+    ok &= check("p95 present", stats["today"]["p95"] > stats["today"]["p50"] > 0
+                and week_p95 >= p95 * 0.9, f"{stats['today']} / raw p95 {p95}")
+    ok &= check("length buckets", sum(b["n"] for b in stats["buckets"]) == 2000,
+                str(stats["buckets"]))
+
+    # A database from before the rollups is backfilled on first start.
+    path2 = os.path.join(tempfile.mkdtemp(prefix="ra-rollup-"), "usage.db")
+    conn2 = sqlite3.connect(path2)
+    conn2.execute(RAW_SCHEMA)
+    conn2.executemany(RAW_INSERT, rows)
+    ensure_schema(conn2)
+    conn2.commit()
+    ok &= check("backfill equals incremental", summary(conn2) == stats)
+
+    # Retention: old raw rows go, the rollups (and so the dashboard) stay.
+    old = [(r[0].replace(r[0][:4], str(int(r[0][:4]) - 1), 1),) + r[1:] for r in rows[:100]]
+    conn.executemany(RAW_INSERT, old)
+    conn.commit()
+    prune(conn, 30)
+    conn.commit()
+    left = conn.execute("SELECT COUNT(*) FROM tts_requests").fetchone()[0]
+    ok &= check("raw rows past retention pruned", left == 2000, str(left))
+    ok &= check("rollups untouched by raw pruning", summary(conn)["all_time"]["reqs"] == 2000)
+    conn.close()
+    conn2.close()
+    return ok
+
+
+if __name__ == "__main__":
+    passed = writer_checks()
+    passed = rollup_checks() and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Self-test for the voice catalog: indexes, prebuilt /api/voices responses
+(same voices as the old per-request filters), the Edge list mapping and the
+refresh guard. No network.
+
+Run from the api/ directory (or repo root) inside the venv:
+
+    python api/selftest_voices.py
+
+Same no-pytest convention as selftest_timed.py.
+"""
+
+import json
+import sys
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0].rsplit("\\", 1)[0])
+
+from voice_catalog import VoiceCatalog, acceptable, from_edge  # noqa: E402
+from tts_server import VOICES  # noqa: E402
+
+EDGE = [
+    {"ShortName": "en-US-AriaNeural", "Locale": "en-US", "Gender": "Female",
+     "VoiceTag": {"VoicePersonalities": ["Positive", "Confident"]}},
+    {"ShortName": "en-NZ-MollyNeural", "Locale": "en-NZ", "Gender": "Female",
+     "VoiceTag": {"VoicePersonalities": ["Friendly"]}},
+    {"ShortName": "sw-KE-ZuriNeural", "Locale": "sw-KE", "Gender": "Female", "VoiceTag": {}},
+    {"Locale": "xx-XX"},
+]
+
+
+def check(name, cond, detail=""):
+    status = "ok  " if cond else "FAIL"
+    print(f"  [{status}] {name}" + (f" — {detail}" if detail and not cond else ""))
+    return cond
+
+
+def _voices(prebuilt):
+    return json.loads(prebuilt[0])["voices"]
+
+
+def catalog_checks():
+    print("Unit checks: catalog")
+    ok = True
+    cat = VoiceCatalog(VOICES)
+    ok &= check("membership and size", "en-US-AriaNeural" in cat and "nope" not in cat
+                and len(cat) == len(VOICES))
+    ok &= check("full list matches VOICES", _voices(cat.response()) == VOICES)
+    same = True
+    for prefix in ("en", "en-US", "en-", "es-M", "zh-CN", "de-DE"):
+        old = {k: v for k, v in VOICES.items() if v["locale"].startswith(prefix)}
+        same &= _voices(cat.response(prefix)) == old
+    ok &= check("?locale= prefixes match the old filter", same)
+    old = {k: v for k, v in VOICES.items()
+           if v["locale"] == "en-GB" or v["locale"].startswith("en")}
+    ok &= check("/{locale} matches the old filter", _voices(cat.response("en")) == old)
+    ok &= check("unknown prefix: None, not memoized",
+                cat.response("qq") is None and "qq" not in cat._responses)
+    ok &= check("responses reused as-is", cat.response("en-US") is cat.response("en-US"))
+    ok &= check("ETag stable across rebuilds, differs per body",
+                VoiceCatalog(dict(VOICES)).response("en")[1] == cat.response("en")[1]
+                and cat.response("en")[1] != cat.response("de")[1])
+    return ok
+
+
+def edge_checks():
+    print("Unit checks: Edge voice list")
+    ok = True
+    voices = from_edge(EDGE, VOICES)
+    ok &= check("curated metadata kept", voices["en-US-AriaNeural"] == VOICES["en-US-AriaNeural"])
+    ok &= check("other voices derived",
+                voices["en-NZ-MollyNeural"] == {"name": "Molly", "gender": "Female",
+                                                "locale": "en-NZ", "style": "friendly"}
+                and voices["sw-KE-ZuriNeural"]["style"] == "standard", str(voices))
+    ok &= check("entries without a name dropped", len(voices) == 3)
+    ok &= check("curated first", next(iter(voices)) == "en-US-AriaNeural")
+    ok &= check("short list rejected", not acceptable(voices, VOICES))
+    full = EDGE + [{"ShortName": k, "Locale": v["locale"], "Gender": v["gender"]}
+                   for k, v in VOICES.items()]
+    ok &= check("full list accepted", acceptable(from_edge(full, VOICES), VOICES))
+    return ok
+
+
+if __name__ == "__main__":
+    passed = catalog_checks()
+    passed = edge_checks() and passed
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-worker launcher for the TTS server (POSIX only).
+
+`uvicorn --workers N` re-imports the app in every worker. This imports
+tts_server once in the parent, switches its per-process state to the shared
+forms (tts_server.enable_multiprocess), binds the listening socket, then
+forks N workers that all accept on it. The workers start with the parent's
+imported modules, voice table and compiled regexes as copy-on-write pages
+instead of N private copies.
+
+Shared between workers, through files in TTS_SHARED_DIR (default: a fresh
+temp dir):
+  - the rate limiter (mmap'd GCRA table), so N workers still enforce one
+    50 req/min budget per IP, not N budgets
+  - the in-flight registry (SQLite), so a segment requested at two workers
+    at once is synthesized once
+  - the disk cache, if TTS_DISK_CACHE_DIR is set
+Each worker's memory cache and upstream concurrency are scaled down by N.
+
+Dead workers are replaced; SIGTERM/SIGINT stop them all.
+
+    python -m api.serve --workers 4 --port 8000        # from the repo root
+    WEB_CONCURRENCY=4 python api/serve.py              # from anywhere
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+try:
+    from . import tts_server                 # python -m api.serve
+except ImportError:
+    import tts_server                        # python api/serve.py
+
+
+def _worker(sock: socket.socket, args) -> None:
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(tts_server.app, log_level=args.log_level,
+                            timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _worker(sock, args)
+        except BaseException as e:
+            print(f"[serve] worker {os.getpid()} crashed: {e}", file=sys.stderr)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Pre-fork multi-worker TTS server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    ap.add_argument("--workers", type=int,
+                    default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--keep-alive", type=int, default=5)
+    args = ap.parse_args()
+    workers = max(1, args.workers)
+
+    shared_dir = os.environ.get("TTS_SHARED_DIR") or tempfile.mkdtemp(prefix="tts-shared-")
+    os.makedirs(shared_dir, exist_ok=True)
+    tts_server.enable_multiprocess(shared_dir, workers)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Everything imported so far lives for the life of the process. Freezing
+    # it keeps the workers' garbage collector from touching (and so copying)
+    # those pages.
+    gc.collect()
+    gc.freeze()
+
+    children = {_spawn(sock, args) for _ in range(workers)}
+    print(f"[serve] {workers} workers on {args.host}:{args.port}, shared state in {shared_dir}")
+
+    stopping = False
+
+    def _stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    last_restart = 0.0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if stopping:
+            continue
+        print(f"[serve] worker {pid} exited ({status}), replacing", file=sys.stderr)
+        # Don't spin if workers die on startup (bad env, port trouble).
+        if time.monotonic() - last_restart < 1.0:
+            time.sleep(1.0)
+        last_restart = time.monotonic()
+        children.add(_spawn(sock, args))
+
+
+if __name__ == "__main__":
+    main()
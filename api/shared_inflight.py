@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Cross-process "is this key already being synthesized" registry for
+multi-worker serving (serve.py).
+
+_SingleFlight in tts_server.py coalesces identical requests within one
+process. With several pre-forked workers, the same segment can still arrive
+at two workers at once and cost two Edge syntheses. This registry is the
+second level: a tiny SQLite table (WAL mode, one row per key) on local disk
+that workers claim keys in and hand finished results through.
+
+  - claim(key): True if this process now owns the synthesis. False if another
+    live worker is already on it, or finished it within the last keep_s.
+  - result(key): ("done", bytes) | ("running", None) | ("gone", None); "gone"
+    means the owner died, abandoned, or overran its lease, and the caller
+    should try to claim the key itself.
+  - finish()/abandon(): publish the result, or release the claim on failure.
+
+Finished rows double as a short-lived shared result cache, so a worker that
+arrives just after the owner finished still skips upstream. Rows past
+keep_s are swept opportunistically.
+
+Blocking sqlite calls; run them from a threadpool. Each process opens its own
+connection lazily, so an instance can be created before fork.
+"""
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Optional
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedInflight:
+    """SQLite-backed claim table shared by the workers of one host."""
+
+    def __init__(self, path: str, lease_s: float = 90.0, keep_s: float = 30.0):
+        self._path = path
+        self.lease_s = lease_s
+        self.keep_s = keep_s
+        self._conn_ = None
+        self._conn_pid = None
+        self._finishes = 0
+        self._lock = Lock()  # one connection per process, shared by threadpool threads
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS inflight ("
+                "key TEXT PRIMARY KEY, pid INTEGER NOT NULL, started REAL NOT NULL, "
+                "done REAL, data BLOB)"
+            )
+            conn.commit()
+        finally:
+            conn.close()  # never carry an open sqlite handle across fork
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._conn_pid != os.getpid():
+            self._conn_ = sqlite3.connect(self._path, timeout=5.0, isolation_level=None,
+                                          check_same_thread=False)
+            self._conn_.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn_
+
+    def _stale(self, pid: int, started: float, done: Optional[float], now: float) -> bool:
+        if done is not None:
+            return now - done > self.keep_s
+        return now - started > self.lease_s or not _alive(pid)
+
+    def claim(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT pid, started, done FROM inflight WHERE key = ?",
+                                   (key,)).fetchone()
+                if row is not None and not self._stale(row[0], row[1], row[2], now):
+                    conn.execute("COMMIT")
+                    return False
+                conn.execute("INSERT OR REPLACE INTO inflight (key, pid, started, done, data) "
+                             "VALUES (?, ?, ?, NULL, NULL)", (key, os.getpid(), now))
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def result(self, key: str) -> tuple:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT pid, started, done, data FROM inflight WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return "gone", None
+        pid, started, done, data = row
+        if done is not None:
+            return "done", data
+        if self._stale(pid, started, done, time.time()):
+            return "gone", None
+        return "running", None
+
+    def finish(self, key: str, data: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("UPDATE inflight SET done = ?, data = ? WHERE key = ? AND pid = ?",
+                         (now, data, key, os.getpid()))
+            self._finishes += 1
+            if self._finishes % 64 == 0:
+                conn.execute("DELETE FROM inflight WHERE done IS NOT NULL AND done < ?",
+                             (now - self.keep_s,))
+
+    def abandon(self, key: str) -> None:
+        with self._lock:
+            self._conn().execute(
+                "DELETE FROM inflight WHERE key = ? AND pid = ? AND done IS NULL",
+                (key, os.getpid()))
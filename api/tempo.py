@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Pitch-preserving tempo change for cached natural-rate MP3.
+
+/api/tts has "rate" in its cache key, so every non-1x request used to be a
+fresh Edge synthesis even when the natural-rate audio for the same text was
+already cached (by /api/tts/timed or a 1x /api/tts). This renders the rate
+locally instead:
+
+    ffmpeg decode (24 kHz mono s16)  ->  WSOLA (NumPy)  ->  ffmpeg encode
+
+The encode matches Edge's own output (48 kbps CBR mono, no ID3/Xing
+header), so stretched segments concatenate with each other byte-wise like
+Edge's do. WSOLA: overlap-add of Hann-windowed frames taken from the input
+at rate x the output hop, each shifted by up to TOLERANCE samples to the
+position that best continues the previous frame (FFT cross-correlation), so
+pitch and formants are untouched and there is no phasiness.
+
+NumPy is imported on first use, not with this module (it would be most of
+the server's cold-start import time otherwise); preload() does it ahead of
+need. ffmpeg is TTS_FFMPEG, else the one on PATH, else the static build the
+imageio-ffmpeg wheel ships (with libmp3lame), which is how a pip-only host
+such as Render gets one. Both are listed in requirements.txt but stay
+optional here. Without NumPy, ffmpeg's atempo filter (the same family of
+algorithm) does the stretch in one ffmpeg run. Without any ffmpeg,
+available() is False and the server keeps asking Edge for the rate.
+"""
+import glob
+import importlib.util
+import os
+import shutil
+import subprocess
+from typing import Optional
+
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None   # the numpy module once _numpy() has imported it
+
+
+def _bundled_ffmpeg() -> Optional[str]:
+    """imageio-ffmpeg's binary, found without importing the package (keeps it
+    off the server's import time) unless its layout has changed."""
+    spec = importlib.util.find_spec("imageio_ffmpeg")
+    if spec is None:
+        return None
+    for base in spec.submodule_search_locations or ():
+        found = sorted(glob.glob(os.path.join(base, "binaries", "ffmpeg-*")))
+        if found and os.access(found[0], os.X_OK):
+            return found[0]
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG: Optional[str] = (os.environ.get("TTS_FFMPEG") or shutil.which("ffmpeg")
+                         or _bundled_ffmpeg())
+SAMPLE_RATE = 24000
+FRAME = 960          # 40 ms analysis/synthesis frame
+TOLERANCE = 240      # +-10 ms search for the best-aligned frame
+MIN_RATE, MAX_RATE = 0.25, 4.0
+_TIMEOUT_S = 60
+_ENCODE = ["-c:a", "libmp3lame", "-b:a", "48k", "-ar", str(SAMPLE_RATE), "-ac", "1",
+           "-write_xing", "0", "-id3v2_version", "0", "-f", "mp3", "pipe:1"]
+
+
+class TempoError(RuntimeError):
+    pass
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def preload() -> None:
+    """Import NumPy now rather than in the first tempo request."""
+    if HAVE_NUMPY:
+        _numpy()
+
+
+def available() -> bool:
+    return FFMPEG is not None
+
+
+def engine() -> Optional[str]:
+    """"wsola", "atempo" or None (tempo rendering unavailable)."""
+    if FFMPEG is None:
+        return None
+    return "wsola" if HAVE_NUMPY else "atempo"
+
+
+def parse_rate(rate: str) -> float:
+    """Edge rate string ("+25%", "-10%") -> speed factor (1.25, 0.9)."""
+    factor = 1 + int(rate.rstrip("%")) / 100
+    if not MIN_RATE <= factor <= MAX_RATE:
+        raise ValueError(f"rate {rate} out of range")
+    return factor
+
+
+def _ffmpeg(args: list, data: bytes) -> bytes:
+    try:
+        proc = subprocess.run([FFMPEG, "-hide_banner", "-loglevel", "error", "-nostdin", *args],
+                              input=data, capture_output=True, timeout=_TIMEOUT_S)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TempoError(f"ffmpeg failed: {e}")
+    if proc.returncode != 0 or not proc.stdout:
+        raise TempoError(f"ffmpeg failed: {proc.stderr.decode(errors='replace').strip()[:200]}")
+    return proc.stdout
+
+
+def decode(mp3: bytes):
+    """MP3 -> float32 mono samples at SAMPLE_RATE."""
+    np = _numpy()
+    pcm = _ffmpeg(["-f", "mp3", "-i", "pipe:0", "-f", "s16le", "-ar", str(SAMPLE_RATE),
+                   "-ac", "1", "pipe:1"], mp3)
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def encode(samples) -> bytes:
+    np = _numpy()
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    return _ffmpeg(["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+                    *_ENCODE], pcm)
+
+
+def wsola(x, rate: float, frame: int = FRAME, tolerance: int = TOLERANCE):
+    """Time-stretch x to len(x) / rate samples, pitch unchanged."""
+    np = _numpy()
+    if rate == 1 or len(x) < 2 * frame:
+        return x.copy()
+    hs = frame // 2                       # synthesis hop (50% overlap)
+    ha = hs * rate                        # analysis hop
+    out_len = int(len(x) / rate)
+    # Periodic Hann: overlapping at hs, the windows sum to exactly 1.
+    win = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    xp = np.concatenate((np.zeros(tolerance, np.float32), x.astype(np.float32),
+                         np.zeros(frame + hs + tolerance, np.float32)))
+    y = np.zeros(out_len + frame, np.float32)
+    nfft = 1 << (frame + 2 * tolerance - 1).bit_length()
+    span = 2 * tolerance + 1
+
+    prev = tolerance
+    y[:frame] += xp[prev:prev + frame] * win
+    k = 1
+    while k * hs < out_len:
+        nominal = tolerance + int(round(k * ha))
+        if nominal + tolerance + frame > len(xp) or prev + hs + frame > len(xp):
+            break
+        # The frame that would naturally follow the previous one...
+        template = xp[prev + hs:prev + hs + frame]
+        # ...and where around the nominal position it fits best.
+        region = xp[nominal - tolerance:nominal + tolerance + frame]
+        corr = np.fft.irfft(np.fft.rfft(region, nfft) * np.conj(np.fft.rfft(template, nfft)),
+                            nfft)[:span]
+        pos = nominal - tolerance + int(np.argmax(corr))
+        y[k * hs:k * hs + frame] += xp[pos:pos + frame] * win
+        prev = pos
+        k += 1
+    return y[:out_len]
+
+
+def _atempo_chain(rate: float) -> str:
+    # Older ffmpeg builds accept 0.5..2.0 per atempo instance.
+    parts = []
+    while rate > 2.0:
+        parts.append(2.0)
+        rate /= 2.0
+    while rate < 0.5:
+        parts.append(0.5)
+        rate /= 0.5
+    parts.append(rate)
+    return ",".join(f"atempo={p:.6f}" for p in parts)
+
+
+def stretch_mp3(mp3: bytes, rate: float) -> bytes:
+    """Natural-rate MP3 -> MP3 played at rate x speed. Blocking (CPU and a
+    subprocess); run it in a threadpool. Raises TempoError."""
+    if FFMPEG is None:
+        raise TempoError("ffmpeg not available")
+    if not HAVE_NUMPY:
+        return _ffmpeg(["-f", "mp3", "-i", "pipe:0", "-filter:a", _atempo_chain(rate),
+                        *_ENCODE], mp3)
+    return encode(wsola(decode(mp3), rate))
@@ -19,23 +19,102 @@ Returns: audio/mpeg stream
 
 import asyncio
 import base64
+import contextlib
+import contextvars
+import gzip
 import hashlib
 import io
 import json
+import math
 import os
+import re
+import secrets
 import sqlite3
 import time
 from collections import OrderedDict
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Optional
+from typing import Annotated, List, Optional
 
-import edge_tts
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.concurrency import run_in_threadpool
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+# Started before the heavy imports so they're measured too (see boot.py).
+try:
+    from . import boot as _boot                  # loaded as the `api` package
+except ImportError:
+    import boot as _boot                         # run directly from the api/ dir
+boot_clock = _boot.BootClock()
+
+import edge_tts  # noqa: E402
+boot_clock.mark("edge_tts")
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse  # noqa: E402
+from pydantic import BaseModel, Field  # noqa: E402
+from starlette.background import BackgroundTask  # noqa: E402
+boot_clock.mark("fastapi")
+
+try:
+    from . import alignment as _alignment       # loaded as the `api` package
+    from . import cache_policy as _cache_policy
+    from . import disk_cache as _disk_cache
+    from . import hedging as _hedging
+    from . import http_cache as _http_cache
+    from . import job_store as _job_store
+    from . import metrics as _metrics
+    from . import rate_limit as _rate_limit
+    from . import scheduler as _scheduler
+    from . import shared_inflight as _shared_inflight
+    from . import tempo as _tempo
+    from . import usage_rollup as _usage_rollup
+    from . import usage_writer as _usage_writer
+    from . import voice_catalog as _voice_catalog
+except ImportError:
+    import alignment as _alignment              # run directly from the api/ dir
+    import cache_policy as _cache_policy
+    import disk_cache as _disk_cache
+    import hedging as _hedging
+    import http_cache as _http_cache
+    import job_store as _job_store
+    import metrics as _metrics
+    import rate_limit as _rate_limit
+    import scheduler as _scheduler
+    import shared_inflight as _shared_inflight
+    import tempo as _tempo
+    import usage_rollup as _usage_rollup
+    import usage_writer as _usage_writer
+    import voice_catalog as _voice_catalog
+boot_clock.mark("api modules")
+
+# ----------------------------------------------------------------------
+# In-process metrics, served at /metrics when TTS_METRICS=1 (see metrics.py).
+# Recording is always on: a histogram observe is one bisect and two adds.
+# Stages are labelled with the endpoint that started the work (a contextvar
+# set by each handler, so it follows coalesced and batched synthesis tasks).
+# ----------------------------------------------------------------------
+METRICS = _metrics.Registry()
+_endpoint = contextvars.ContextVar("tts_endpoint", default="-")
+
+REQUEST_SECONDS = METRICS.histogram(
+    "tts_request_seconds", "Request time until the response (or first audio chunk) is ready.",
+    ("endpoint", "cache"))
+STAGE_SECONDS = METRICS.histogram(
+    "tts_stage_seconds", "Time spent per stage: cache, queue, connect, first_byte, upstream, "
+    "align, encode, compress, tempo.", ("endpoint", "stage"))
+CACHE_LOOKUPS = METRICS.counter(
+    "tts_cache_lookups_total", "Cache lookups by tier (memory, disk, variant, client) and result.",
+    ("tier", "result"))
+UPSTREAM_ERRORS = METRICS.counter(
+    "tts_upstream_errors_total", "Failed upstream syntheses by exception type.", ("type",))
+HEDGES = METRICS.counter(
+    "tts_upstream_hedges_total", "Hedged upstream turns by which stream delivered audio first "
+    "(primary, hedge; none if neither did).", ("winner",))
+RATE_LIMITED = METRICS.counter(
+    "tts_rate_limited_total", "Requests rejected with 429 by the rate limiter.")
+
+
+def _stage(stage: str):
+    """with _stage("align"): ... -- time a block into STAGE_SECONDS."""
+    return STAGE_SECONDS.time(_endpoint.get(), stage)
 
 # ----------------------------------------------------------------------
 # Optional local usage telemetry
@@ -44,7 +123,6 @@ from pydantic import BaseModel, Field
 # stays clean. No PII captured (no IPs, no text content, no user identifiers).
 # ----------------------------------------------------------------------
 USAGE_DB_PATH = os.environ.get("TTS_USAGE_DB")
-_usage_lock = Lock()
 
 if USAGE_DB_PATH:
     try:
@@ -60,6 +138,11 @@ if USAGE_DB_PATH:
             "duration_ms INTEGER NOT NULL)"
         )
         _conn.execute("CREATE INDEX IF NOT EXISTS idx_tts_requests_ts ON tts_requests(ts)")
+        # Migration: requests that joined another reader's in-flight synthesis.
+        _cols = [r[1] for r in _conn.execute("PRAGMA table_info(tts_requests)").fetchall()]
+        if "coalesced" not in _cols:
+            _conn.execute("ALTER TABLE tts_requests ADD COLUMN coalesced INTEGER NOT NULL DEFAULT 0")
+        _usage_rollup.ensure_schema(_conn)
         _conn.commit()
         _conn.close()
     except Exception as _e:
@@ -68,29 +151,38 @@ if USAGE_DB_PATH:
         USAGE_DB_PATH = None
 
 
-def _usage_log(voice: str, char_count: int, cache_hit: bool, duration_ms: int) -> None:
-    if not USAGE_DB_PATH:
+# Rows are queued and written in batches by a background thread (one
+# connection, one transaction per batch); a slow disk never stalls a request.
+# Each batch is also folded into the hourly/daily rollups the dashboard reads
+# (usage_rollup.py); raw rows older than TTS_USAGE_RAW_DAYS are pruned.
+USAGE_RAW_DAYS = int(os.environ.get("TTS_USAGE_RAW_DAYS", "30"))
+usage_writer = None
+if USAGE_DB_PATH:
+    usage_writer = _usage_writer.UsageWriter(
+        USAGE_DB_PATH,
+        "INSERT INTO tts_requests (ts, voice, char_count, cache_hit, duration_ms, coalesced) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        on_batch=_usage_rollup.Rollup(USAGE_RAW_DAYS),
+    )
+
+
+def _usage_log(voice: str, char_count: int, cache_hit: bool, duration_ms: int,
+               coalesced: bool = False) -> None:
+    REQUEST_SECONDS.observe(duration_ms / 1000, _endpoint.get(),
+                            "hit" if cache_hit else "coalesced" if coalesced else "miss")
+    if usage_writer is None:
         return
-    try:
-        with _usage_lock:
-            conn = sqlite3.connect(USAGE_DB_PATH, timeout=2)
-            conn.execute("PRAGMA busy_timeout=2000")
-            conn.execute(
-                "INSERT INTO tts_requests (ts, voice, char_count, cache_hit, duration_ms) "
-                "VALUES (?, ?, ?, ?, ?)",
-                (
-                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
-                    voice,
-                    char_count,
-                    int(bool(cache_hit)),
-                    int(duration_ms),
-                ),
-            )
-            conn.commit()
-            conn.close()
-    except Exception as e:
-        # never let telemetry failure surface to the user
-        print(f"[tts] usage_log error: {e}")
+    usage_writer.put((
+        datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        voice,
+        char_count,
+        int(bool(cache_hit)),
+        int(duration_ms),
+        int(bool(coalesced)),
+    ))
+
+
+boot_clock.mark("usage telemetry")
 
 app = FastAPI(
     title="Read-Aloud TTS API",
@@ -113,27 +205,89 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Chars-Remaining"],
+    expose_headers=["X-Chars-Remaining", "Retry-After", "ETag", "Content-Range"],
 )
 
 ALLOWED_ORIGIN_PREFIXES = tuple(ALLOWED_ORIGINS)
 
 # ----------------------------------------------------------------------
 # Premium billing/licensing (Phase 1). Fully ENV-GATED — the router's
-# endpoints 404 unless Stripe + LICENSE_DB env vars are configured, so this
-# import + include is a no-op on the current free deployment. The free
+# endpoints 404 unless Stripe + LICENSE_DB env vars are configured. The free
 # /api/tts path below is untouched.
+#
+# Loaded lazily to keep it off the cold start (its import and license DB
+# open): by _ColdStart just before the first request for one of its paths,
+# or by the deferred init that runs after the first response, whichever
+# comes first.
 # ----------------------------------------------------------------------
-try:
+BILLING_PATHS = ("/api/billing/", "/api/tts/premium", "/api/event")
+_billing = None
+_billing_loaded = False
+_billing_lock = asyncio.Lock()
+
+
+def _import_billing():
     try:
-        from . import billing as _billing      # loaded as the `api` package (uvicorn api.tts_server:app)
-    except ImportError:
-        import billing as _billing              # run directly from the api/ dir
-    app.include_router(_billing.router)
-except Exception as _be:  # never let billing break the core TTS service
-    print(f"[tts] billing module not loaded: {_be}")
+        try:
+            from . import billing as mod       # loaded as the `api` package (uvicorn api.tts_server:app)
+        except ImportError:
+            import billing as mod               # run directly from the api/ dir
+        return mod
+    except Exception as e:  # never let billing break the core TTS service
+        print(f"[tts] billing module not loaded: {e}")
+        return None
+
+
+async def _ensure_billing():
+    """The billing module, imported and routed on first call (None if it
+    failed to load)."""
+    global _billing, _billing_loaded
+    if _billing_loaded:
+        return _billing
+    async with _billing_lock:
+        if not _billing_loaded:
+            mod = await run_in_threadpool(_import_billing)
+            if mod is not None:
+                app.include_router(mod.router)
+                app.openapi_schema = None   # rebuilt with the billing routes
+            _billing, _billing_loaded = mod, True
+            boot_clock.event("billing")
+    return _billing
+
+
+# Deferred init starts once the first response has gone out (the reader who
+# woke the service is served first), or after TTS_DEFER_S with no traffic.
+# TTS_FAST_START=0 runs it in startup instead, before anything is served.
+FAST_START = os.environ.get("TTS_FAST_START", "1") != "0"
+DEFER_S = float(os.environ.get("TTS_DEFER_S", "5"))
+_first_served = asyncio.Event()
+
+
+class _ColdStart:
+    """Outermost ASGI middleware: loads billing ahead of the first request
+    for one of its paths and notes when the first response is done."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not _billing_loaded and scope["path"].startswith(BILLING_PATHS):
+            await _ensure_billing()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not _first_served.is_set():
+                boot_clock.event("first_response")
+                _first_served.set()
+
+
+app.add_middleware(_ColdStart)
+boot_clock.mark("app")
 
 
 def _origin_allowed(request: Request) -> bool:
@@ -155,71 +309,368 @@ def _client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-# Rate limiting (simple in-memory, use Redis in production)
-from collections import defaultdict
-from datetime import datetime, timedelta
-
-request_counts = defaultdict(list)
+# Rate limiting (in-memory, per process): O(1) GCRA per client IP on both a
+# request budget and a character budget, since a long segment costs Edge far
+# more than a short one. See rate_limit.py.
 RATE_LIMIT = 50  # requests per minute
+RATE_LIMIT_CHARS = int(os.environ.get("TTS_RATE_LIMIT_CHARS", "60000"))  # chars per minute
 RATE_WINDOW = 60  # seconds
-_sweep_counter = 0
-SWEEP_EVERY = 1000
 
+rate_limiter = _rate_limit.RateLimiter(RATE_LIMIT, RATE_LIMIT_CHARS or None, RATE_WINDOW)
 
-def check_rate_limit(ip: str) -> bool:
-    """Simple rate limiting by IP, with amortized sweep of stale buckets."""
-    global _sweep_counter
-    now = datetime.now()
-    cutoff = now - timedelta(seconds=RATE_WINDOW)
 
-    _sweep_counter += 1
-    if _sweep_counter >= SWEEP_EVERY:
-        _sweep_counter = 0
-        for k in list(request_counts.keys()):
-            request_counts[k] = [t for t in request_counts[k] if t > cutoff]
-            if not request_counts[k]:
-                del request_counts[k]
+def check_rate_limit(ip: str, chars: int = 0) -> float:
+    """0.0 if the request is within ip's budgets, else seconds until it would be."""
+    return rate_limiter.check(ip, chars)
 
-    request_counts[ip] = [t for t in request_counts[ip] if t > cutoff]
 
-    if len(request_counts[ip]) >= RATE_LIMIT:
-        return False
+def _enforce_rate_limit(request: Request, chars: int) -> None:
+    wait = check_rate_limit(_client_ip(request), chars)
+    if wait:
+        RATE_LIMITED.inc()
+        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait a moment.",
+                            headers={"Retry-After": str(max(1, math.ceil(wait)))})
 
-    request_counts[ip].append(now)
-    return True
+
+class _CacheSegment:
+    __slots__ = ("budget", "size", "policy")
+
+    def __init__(self, budget: int, policy):
+        self.budget = budget
+        self.size = 0
+        self.policy = policy
 
 
 class _AudioCache:
-    """Thread-safe LRU bytes cache, capped by entry count and total size."""
+    """Thread-safe bytes cache with a byte budget per segment.
+
+    classify(value) puts each entry in a segment (here: timed payloads and
+    plain MP3, so neither kind can crowd out the other); each segment has its
+    own budget and eviction policy, and an admission filter may refuse a new
+    entry that is less popular than what it would displace. Policies and the
+    frequency sketch they share are in cache_policy.py. max_entries, if set,
+    also caps the total count.
+
+    An entry can carry variants (e.g. its JSON rendering, gzipped) stored
+    alongside it: they count toward its segment's bytes, not max_entries,
+    and are dropped with the entry when it is evicted or replaced.
+
+    A fresh synthesis the admission filter refuses is not thrown away: it
+    goes into a small LRU window (window_share of the budgets, on top of
+    them; the newest entry is always kept), so the caller's follow-up
+    requests still find it. A hit in the window is offered to admission
+    again, now with that read counted.
+    """
 
-    def __init__(self, max_entries: int = 100, max_bytes: int = 64 * 1024 * 1024):
-        self._d: "OrderedDict[str, bytes]" = OrderedDict()
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: int = 64 * 1024 * 1024,
+                 policy: str = "lru", budgets: Optional[dict] = None, classify=None,
+                 trace=None, window_share: float = 0.02):
+        self._d: dict = {}
+        self._variants: dict = {}   # key -> {variant name: bytes}
+        self._where: dict = {}      # key -> (segment name, bytes incl. variants)
         self._size = 0
         self._max_entries = max_entries
-        self._max_bytes = max_bytes
+        self._classify = classify or (lambda value: "all")
+        budgets = budgets or {"all": max_bytes}
+        eviction, admission = _cache_policy.POLICIES[policy]
+        self._sketch = None
+        if admission is not None or eviction is _cache_policy.GDSF:
+            # Sized for the entries the budget holds at ~16 KB each.
+            self._sketch = _cache_policy.FrequencySketch(
+                min(1 << 20, max(1024, sum(budgets.values()) // 16384)))
+        self._segments = {name: _CacheSegment(b, eviction(self._sketch))
+                          for name, b in budgets.items()}
+        self._admission = admission(self._sketch) if admission is not None else None
+        self._window: "OrderedDict[str, bytes]" = OrderedDict()
+        self._window_budget = int(sum(budgets.values()) * window_share)
+        self._window_size = 0
+        self._trace = trace
         self._lock = Lock()
+        self.policy = policy
+        self.evictions = 0
+        self.rejections = 0
 
     def get(self, key: str) -> Optional[bytes]:
         with self._lock:
-            if key in self._d:
-                self._d.move_to_end(key)
-                return self._d[key]
-            return None
-
-    def put(self, key: str, value: bytes) -> None:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            data = self._d.get(key)
+            if data is None:
+                data = self._window.get(key)
+                if data is not None:
+                    if self._trace is not None:
+                        self._trace.access(key, len(data), self._classify(data))
+                    self._window.move_to_end(key)
+                    self._store(key, data, fresh=False)
+                return data
+            name, size = self._where[key]
+            self._segments[name].policy.hit(key, size)
+            if self._trace is not None:
+                self._trace.access(key, len(data), name)
+            return data
+
+    def put(self, key: str, value: bytes, fresh: bool = False) -> None:
+        """Store value under key. fresh marks bytes a synthesis just produced
+        for a waiting caller: if admission refuses them they go to the window
+        rather than nowhere, so the caller's follow-up requests (Range/seek,
+        the download after /api/tts/timed) find them. Other puts (disk
+        promotions) that lose admission are dropped."""
         with self._lock:
-            if key in self._d:
-                self._size -= len(self._d[key])
-                del self._d[key]
-            self._d[key] = value
-            self._size += len(value)
-            while (len(self._d) > self._max_entries
-                   or self._size > self._max_bytes) and self._d:
-                _, evicted = self._d.popitem(last=False)
-                self._size -= len(evicted)
+            if self._trace is not None:
+                self._trace.access(key, len(value), self._classify(value))
+            self._store(key, value, fresh)
+
+    def _store(self, key: str, value: bytes, fresh: bool) -> None:
+        name = self._classify(value)
+        seg = self._segments[name]
+        size = len(value)
+        replacing = key in self._d
+        if replacing:
+            self._drop(key)
+        if size > seg.budget:
+            self.rejections += 1
+            return
+        victims = seg.policy.victims(seg.size + size - seg.budget) \
+            if seg.size + size > seg.budget else []
+        # A replacement was already admitted; only newcomers are filtered.
+        if victims and not replacing and self._admission is not None \
+                and not self._admission.admit(key, victims):
+            if key not in self._window:
+                self.rejections += 1
+                if fresh:
+                    self._window_put(key, value)
+            return
+        self._window_drop(key)
+        for victim in victims:
+            self._drop(victim, evicted=True)
+        self._d[key] = value
+        self._where[key] = (name, size)
+        seg.size += size
+        self._size += size
+        seg.policy.add(key, size)
+        self._cap_entries()
+
+    def _window_put(self, key: str, value: bytes) -> None:
+        self._window[key] = value
+        self._window_size += len(value)
+        while self._window_size > self._window_budget and len(self._window) > 1:
+            _old, dropped = self._window.popitem(last=False)
+            self._window_size -= len(dropped)
+
+    def _window_drop(self, key: str) -> None:
+        value = self._window.pop(key, None)
+        if value is not None:
+            self._window_size -= len(value)
+
+    def get_variant(self, key: str, name: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._variants.get(key, {}).get(name)
+            if data is not None:
+                seg_name, size = self._where[key]
+                self._segments[seg_name].policy.hit(key, size)
+            return data
+
+    def put_variant(self, key: str, name: str, value: bytes) -> None:
+        """Attach a variant to key's entry; a no-op if the entry is gone."""
+        with self._lock:
+            if key not in self._d:
+                return
+            variants = self._variants.setdefault(key, {})
+            delta = len(value) - len(variants.get(name, b""))
+            variants[name] = value
+            seg_name, size = self._where[key]
+            seg = self._segments[seg_name]
+            self._where[key] = (seg_name, size + delta)
+            seg.size += delta
+            self._size += delta
+            seg.policy.hit(key, size + delta)
+            while seg.size > seg.budget:
+                victims = seg.policy.victims(seg.size - seg.budget)
+                if not victims:
+                    break
+                for victim in victims:
+                    self._drop(victim, evicted=True)
+
+    def _drop(self, key: str, evicted: bool = False) -> None:
+        del self._d[key]
+        self._variants.pop(key, None)
+        name, size = self._where.pop(key)
+        seg = self._segments[name]
+        seg.size -= size
+        self._size -= size
+        seg.policy.remove(key, evicted)
+        if evicted:
+            self.evictions += 1
+
+    def _cap_entries(self) -> None:
+        while self._max_entries is not None and len(self._d) > self._max_entries:
+            seg = max(self._segments.values(), key=lambda s: s.size)
+            victims = seg.policy.victims(1)
+            if not victims:
+                break
+            self._drop(victims[0], evicted=True)
+
+    def segment_bytes(self) -> dict:
+        return {name: seg.size for name, seg in self._segments.items()}
+
+    def budgets(self) -> dict:
+        return {name: seg.budget for name, seg in self._segments.items()}
+
+    def __len__(self) -> int:
+        return len(self._d) + len(self._window)
+
+    @property
+    def size(self) -> int:
+        return self._size + self._window_size
+
+
+# ----------------------------------------------------------------------
+# Memory cache budget and policy (cache_policy.py). The budget is
+# TTS_CACHE_MB if set, else TTS_CACHE_MEM_FRACTION of the container's cgroup
+# memory limit, else 64 MB; TTS_CACHE_TIMED_SHARE of it holds timed payloads
+# and the rest plain MP3. TTS_CACHE_POLICY picks eviction and admission
+# (lru, gdsf, tinylfu-lru, tinylfu-gdsf). TTS_CACHE_TRACE appends one line
+# per access to a file that bench_cache.py can replay against each policy.
+# ----------------------------------------------------------------------
+MB = 1024 * 1024
+CACHE_POLICY = os.environ.get("TTS_CACHE_POLICY", "tinylfu-gdsf")
+if CACHE_POLICY not in _cache_policy.POLICIES:
+    print(f"[tts] unknown TTS_CACHE_POLICY {CACHE_POLICY!r}, using tinylfu-gdsf")
+    CACHE_POLICY = "tinylfu-gdsf"
+CACHE_TIMED_SHARE = float(os.environ.get("TTS_CACHE_TIMED_SHARE", "0.6"))
+if os.environ.get("TTS_CACHE_MB"):
+    CACHE_BYTES, CACHE_BUDGET_SOURCE = int(os.environ["TTS_CACHE_MB"]) * MB, "TTS_CACHE_MB"
+else:
+    CACHE_BYTES, CACHE_BUDGET_SOURCE = _cache_policy.memory_budget(
+        float(os.environ.get("TTS_CACHE_MEM_FRACTION", "0.25")), 64 * MB)
+cache_trace = None
+
+if os.environ.get("TTS_CACHE_TRACE"):
+    try:
+        cache_trace = _cache_policy.TraceWriter(os.environ["TTS_CACHE_TRACE"])
+    except OSError as _e:
+        print(f"[tts] cache trace disabled — {_e}")
+
+
+def _payload_segment(value: bytes) -> str:
+    return "timed" if value[:4] == _TIMED_MAGIC else "plain"
+
+
+def _new_audio_cache(total_bytes: int) -> _AudioCache:
+    timed = int(total_bytes * CACHE_TIMED_SHARE)
+    return _AudioCache(policy=CACHE_POLICY, budgets={"timed": timed, "plain": total_bytes - timed},
+                       classify=_payload_segment, trace=cache_trace)
+
+
+audio_cache = _new_audio_cache(CACHE_BYTES)
+print(f"[tts] memory cache {CACHE_BYTES // MB} MB ({CACHE_BUDGET_SOURCE}), "
+      f"{CACHE_TIMED_SHARE:.0%} timed, policy {CACHE_POLICY}")
+
+# ----------------------------------------------------------------------
+# Optional persistent second tier behind audio_cache.
+# Activated only when TTS_DISK_CACHE_DIR points at a writeable directory (the
+# mini PC's SSD). Survives restarts/deploys, so a cold process serves every
+# segment it has ever synthesized without another Edge round-trip.
+# ----------------------------------------------------------------------
+DISK_CACHE_DIR = os.environ.get("TTS_DISK_CACHE_DIR")
+DISK_CACHE_MAX_MB = int(os.environ.get("TTS_DISK_CACHE_MB", "1024"))
+disk_cache = None
+
+if DISK_CACHE_DIR:
+    try:
+        disk_cache = _disk_cache.DiskCache(DISK_CACHE_DIR, DISK_CACHE_MAX_MB * 1024 * 1024)
+        print(f"[tts] disk cache at {DISK_CACHE_DIR}: {len(disk_cache)} entries, "
+              f"{disk_cache.size // (1024 * 1024)} MB")
+    except Exception as _e:
+        print(f"[tts] disk cache disabled — init error: {_e}")
+        disk_cache = None
+boot_clock.mark("disk cache")
+
+
+def _promote_from_disk(key: str) -> None:
+    """Background task after a disk hit: pull the entry into the memory LRU."""
+    try:
+        data = disk_cache.read(key)
+        if data is not None:
+            audio_cache.put(key, data)
+    except Exception as e:
+        print(f"[tts] disk cache promote error: {e}")
+
+
+def _persist_to_disk(key: str, data: bytes) -> None:
+    """Executor job after a miss: write the fresh entry through to disk."""
+    try:
+        disk_cache.put(key, data)
+    except Exception as e:
+        print(f"[tts] disk cache write error: {e}")
+
+
+def _cached_response(key: str, media_type: str, headers: dict,
+                     request: Optional[Request] = None):
+    """Response for a cache hit in either tier, or None on a full miss.
+
+    Memory hits stream the cached bytes. Disk hits stream the file itself —
+    never read into a bytes object on the request path — and promote the
+    entry into audio_cache after the response has gone out.
+    With request, the response carries the key's ETag and answers a Range
+    header with 206 (see http_cache.py).
+    """
+    t0 = time.perf_counter()
+    cached = audio_cache.get(key)
+    if cached is not None:
+        CACHE_LOOKUPS.inc("memory", "hit")
+        STAGE_SECONDS.observe(time.perf_counter() - t0, _endpoint.get(), "cache")
+        if request is not None:
+            return _http_cache.bytes_response(request, cached, media_type,
+                                              {**headers, "X-Cache": "hit"},
+                                              _http_cache.strong_etag(key))
+        return StreamingResponse(
+            io.BytesIO(cached), media_type=media_type,
+            headers={**headers, "X-Cache": "hit"},
+        )
+    CACHE_LOOKUPS.inc("memory", "miss")
+    path = None
+    if disk_cache is not None:
+        path = disk_cache.path_for(key)
+        CACHE_LOOKUPS.inc("disk", "miss" if path is None else "hit")
+    STAGE_SECONDS.observe(time.perf_counter() - t0, _endpoint.get(), "cache")
+    if path is not None:
+        if request is not None:
+            try:
+                return _http_cache.file_response(
+                    request, path, media_type, {**headers, "X-Cache": "disk"},
+                    _http_cache.strong_etag(key),
+                    background=BackgroundTask(_promote_from_disk, key))
+            except FileNotFoundError:
+                return None  # evicted since path_for
+        return FileResponse(
+            path, media_type=media_type,
+            headers={**headers, "X-Cache": "disk"},
+            background=BackgroundTask(_promote_from_disk, key),
+        )
+    return None
 
 
-audio_cache = _AudioCache()
+def _cache_store(key: str, data: bytes) -> None:
+    """Put a fresh synthesis in audio_cache and write it through to disk off
+    the event loop (fire-and-forget; the disk tier is best-effort)."""
+    audio_cache.put(key, data, fresh=True)
+    if disk_cache is not None:
+        asyncio.get_running_loop().run_in_executor(None, _persist_to_disk, key, data)
+
+
+async def _cache_read(key: str) -> Optional[bytes]:
+    """Bytes for key from either tier (disk hits are promoted), or None."""
+    t0 = time.perf_counter()
+    data = audio_cache.get(key)
+    CACHE_LOOKUPS.inc("memory", "miss" if data is None else "hit")
+    if data is None and disk_cache is not None:
+        data = await run_in_threadpool(disk_cache.read, key)
+        CACHE_LOOKUPS.inc("disk", "miss" if data is None else "hit")
+        if data is not None:
+            audio_cache.put(key, data)
+    STAGE_SECONDS.observe(time.perf_counter() - t0, _endpoint.get(), "cache")
+    return data
 
 
 # Available voices (curated list of best neural voices)
@@ -286,6 +737,56 @@ VOICES = {
     "ko-KR-InJoonNeural": {"name": "InJoon", "gender": "Male", "locale": "ko-KR", "style": "standard"},
 }
 
+# ----------------------------------------------------------------------
+# Live voice catalog (voice_catalog.py). Starts as the curated VOICES above;
+# every TTS_VOICE_REFRESH_H hours (0 = never) a background task rebuilds it
+# from Edge's voice list and swaps it in whole. Request validation and
+# /api/voices read the current snapshot: a set lookup and prebuilt bytes.
+# ----------------------------------------------------------------------
+VOICE_REFRESH_H = float(os.environ.get("TTS_VOICE_REFRESH_H", "24"))
+VOICE_RETRY_S = 600
+voice_catalog = _voice_catalog.VoiceCatalog(VOICES)
+boot_clock.mark("voices")
+_voice_refresh_task = None
+
+
+async def _refresh_voice_catalog() -> bool:
+    global voice_catalog
+    try:
+        edge_voices = await edge_tts.list_voices()
+    except Exception as e:
+        print(f"[tts] voice list refresh failed: {e}")
+        return False
+    voices = _voice_catalog.from_edge(edge_voices, VOICES)
+    if not _voice_catalog.acceptable(voices, VOICES):
+        print(f"[tts] voice list refresh ignored: only {len(voices)} voices, "
+              "most curated ones missing")
+        return False
+    voice_catalog = _voice_catalog.VoiceCatalog(voices, source="edge")
+    return True
+
+
+async def _voice_refresh_loop():
+    while True:
+        ok = await _refresh_voice_catalog()
+        if ok:
+            print(f"[tts] voice catalog: {len(voice_catalog)} voices from Edge")
+        await asyncio.sleep(VOICE_REFRESH_H * 3600 if ok else min(VOICE_RETRY_S,
+                                                                   VOICE_REFRESH_H * 3600))
+
+
+def _start_voice_refresh():
+    """Part of the deferred init: the first refresh is an upstream call."""
+    global _voice_refresh_task
+    if VOICE_REFRESH_H > 0 and _voice_refresh_task is None:
+        _voice_refresh_task = asyncio.create_task(_voice_refresh_loop())
+
+
+@app.on_event("shutdown")
+async def _stop_voice_refresh():
+    if _voice_refresh_task is not None:
+        _voice_refresh_task.cancel()
+
 
 class TTSRequest(BaseModel):
     """TTS request body."""
@@ -303,13 +804,284 @@ class TimedTTSRequest(BaseModel):
     voice: str = Field(default="en-US-AriaNeural", description="Voice ID")
 
 
+# Batch endpoint bounds: segments per request, and how many of one batch's
+# segments are synthesized at once.
+BATCH_MAX_SEGMENTS = 50
+BATCH_CONCURRENCY = int(os.environ.get("TTS_BATCH_CONCURRENCY", "4"))
+
+
+class BatchTTSRequest(BaseModel):
+    """Batch timed TTS request body: ordered segments, one voice, natural rate."""
+    segments: List[Annotated[str, Field(min_length=1, max_length=5000)]] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_SEGMENTS, description="Texts to convert, in order")
+    voice: str = Field(default="en-US-AriaNeural", description="Voice ID")
+
+
+boot_clock.mark("request models")
+
 # WordBoundary offsets/durations arrive in 100-nanosecond ticks.
 TICKS_PER_MS = 10_000
 
+# Stream /api/tts misses to the client chunk-by-chunk as Edge produces them
+# (time to first audio ~ upstream first byte instead of the whole synthesis).
+# Set TTS_STREAM_AUDIO=0 to go back to buffering the full MP3 first.
+STREAM_AUDIO = os.environ.get("TTS_STREAM_AUDIO", "1") == "1"
+
 # Cap on a single Edge TTS synthesis. A hung upstream websocket otherwise holds
 # the request open until the client's own abort, leaking the server-side task.
 SYNTH_TIMEOUT_S = 60
 
+# Tighter deadlines per phase of an upstream turn (hedging.py), so a socket
+# that stalls fails in seconds rather than at SYNTH_TIMEOUT_S:
+#   connect      TCP + TLS + websocket handshake
+#   first audio  FIRST_AUDIO_S + FIRST_AUDIO_PER_KCHAR_S per 1000 chars (Edge
+#                reads the whole SSML before it speaks)
+#   chunk gap    between audio chunks once they flow
+CONNECT_TIMEOUT_S = int(os.environ.get("TTS_CONNECT_TIMEOUT_S", "5"))
+FIRST_AUDIO_S = float(os.environ.get("TTS_FIRST_AUDIO_S", "8"))
+FIRST_AUDIO_PER_KCHAR_S = float(os.environ.get("TTS_FIRST_AUDIO_PER_KCHAR_S", "2"))
+CHUNK_GAP_S = float(os.environ.get("TTS_CHUNK_GAP_S", "8"))
+
+# Hedged requests: when the first audio chunk is later than the p95 of recent
+# first-byte times (never earlier than TTS_HEDGE_MIN_MS), a second synthesis
+# of the same text starts; the first to deliver audio is used, the other is
+# cancelled. At most TTS_HEDGE_MAX hedges run at once, none while the
+# scheduler is queueing, and bulk work is never hedged. TTS_HEDGE=0 disables.
+HEDGE_ENABLED = os.environ.get("TTS_HEDGE", "1") == "1"
+HEDGE_MIN_S = float(os.environ.get("TTS_HEDGE_MIN_MS", "250")) / 1000
+HEDGE_MAX = int(os.environ.get("TTS_HEDGE_MAX", "2"))
+first_byte_window = _hedging.LatencyWindow()
+_hedges_running = 0
+
+# Every upstream synthesis holds a slot from this scheduler: bounded, adaptive
+# concurrency with priority lanes picked by the client's X-TTS-Priority header
+# (interactive > prefetch > bulk) and 503 + Retry-After load shedding.
+scheduler = _scheduler.SynthScheduler(
+    max_limit=int(os.environ.get("TTS_SYNTH_CONCURRENCY", "16")),
+    max_queue=int(os.environ.get("TTS_SYNTH_QUEUE", "32")),
+    max_wait_s=float(os.environ.get("TTS_SYNTH_MAX_WAIT_S", "20")),
+)
+
+
+# Optional warm upstream websocket pool (edge_pool.py): each synthesis runs as
+# one more turn on an already-open Edge socket instead of paying a fresh
+# TLS + websocket handshake per segment. TTS_EDGE_POOL=<n> keeps n sockets
+# warm (pre-opened at startup, topped up after idle spells).
+#
+# TTS_EDGE_WSS_URL points upstream (pooled or not) at another endpoint, e.g.
+# the offline stand-in fake_edge.py that bench_load.py drives.
+EDGE_POOL_SIZE = int(os.environ.get("TTS_EDGE_POOL", "0"))
+EDGE_WSS_URL = os.environ.get("TTS_EDGE_WSS_URL")
+edge_pool = None
+
+if EDGE_WSS_URL:
+    edge_tts.communicate.WSS_URL = EDGE_WSS_URL
+
+if EDGE_POOL_SIZE > 0:
+    try:
+        try:
+            from . import edge_pool as _edge_pool
+        except ImportError:
+            import edge_pool as _edge_pool
+        edge_pool = _edge_pool.EdgePool(
+            size=EDGE_POOL_SIZE, url=EDGE_WSS_URL, connect_timeout=CONNECT_TIMEOUT_S,
+            on_connect=lambda s: STAGE_SECONDS.observe(s, _endpoint.get(), "connect"))
+    except Exception as _e:  # built on edge_tts internals; fall back to Communicate
+        print(f"[tts] edge pool disabled — init error: {_e}")
+        edge_pool = None
+
+
+def _first_audio_deadline(chars: int) -> float:
+    return FIRST_AUDIO_S + FIRST_AUDIO_PER_KCHAR_S * chars / 1000
+
+
+def _hedge_after() -> Optional[float]:
+    """Seconds without audio before hedging this turn, or None for never."""
+    if not HEDGE_ENABLED or _scheduler.request_priority.get() == "bulk":
+        return None
+    p95 = first_byte_window.quantile()
+    return None if p95 is None else max(HEDGE_MIN_S, p95)
+
+
+def _may_hedge() -> bool:
+    global _hedges_running
+    if _hedges_running >= HEDGE_MAX or scheduler.queued():
+        return False
+    _hedges_running += 1
+    return True
+
+
+async def _edge_stream(text: str, voice: str, **kwargs):
+    """Upstream chunk stream: a pooled socket if the pool is on, else a
+    one-shot edge_tts.Communicate. Same chunk dicts either way, under the
+    phase deadlines above and hedged when the first byte is late.
+
+    Records time to the first audio chunk (connect included when the socket
+    is fresh) and, when the stream ends, the whole upstream turn."""
+    global _hedges_running
+
+    def _open():
+        if edge_pool is not None:
+            return edge_pool.stream(text, voice, **kwargs)
+        return edge_tts.Communicate(text=text, voice=voice, connect_timeout=CONNECT_TIMEOUT_S,
+                                    **kwargs).stream()
+
+    t0 = time.perf_counter()
+    hedged = []
+
+    def _track(outcome: str) -> None:
+        hedged.append(outcome)
+        if outcome != "launched":
+            HEDGES.inc(outcome)
+
+    stream = _hedging.hedged_stream(
+        _open, first_deadline=_first_audio_deadline(len(text)), gap=CHUNK_GAP_S,
+        hedge_after=_hedge_after(), may_hedge=_may_hedge, on_hedge=_track)
+    first = True
+    try:
+        async with contextlib.aclosing(stream):
+            async for chunk in stream:
+                if first and chunk["type"] == "audio":
+                    first = False
+                    elapsed = time.perf_counter() - t0
+                    first_byte_window.observe(elapsed)
+                    STAGE_SECONDS.observe(elapsed, _endpoint.get(), "first_byte")
+                yield chunk
+    finally:
+        if hedged:
+            _hedges_running -= 1
+            if len(hedged) == 1:
+                HEDGES.inc("none")
+    STAGE_SECONDS.observe(time.perf_counter() - t0, _endpoint.get(), "upstream")
+
+
+@contextlib.asynccontextmanager
+async def _upstream_slot(chars: int):
+    """scheduler.slot() plus metrics: queue wait, and failures by type."""
+    t0 = time.perf_counter()
+    async with scheduler.slot(chars):
+        STAGE_SECONDS.observe(time.perf_counter() - t0, _endpoint.get(), "queue")
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(type(e).__name__)
+            raise
+
+
+_edge_pool_warming = None
+
+
+async def _start_edge_pool():
+    await edge_pool.start()
+    boot_clock.event("edge_pool")
+    print(f"[tts] edge pool warm: {edge_pool.idle()} sockets")
+
+
+@app.on_event("startup")
+async def _warm_edge_pool():
+    # With FAST_START the sockets open alongside the first requests (which
+    # share the same top-up) instead of holding up the listening socket.
+    global _edge_pool_warming
+    if edge_pool is None:
+        return
+    if FAST_START:
+        _edge_pool_warming = asyncio.create_task(_start_edge_pool())
+    else:
+        await _start_edge_pool()
+
+
+@app.on_event("shutdown")
+async def _close_edge_pool():
+    if _edge_pool_warming is not None:
+        _edge_pool_warming.cancel()
+    if edge_pool is not None:
+        await edge_pool.close()
+
+
+@app.on_event("shutdown")
+async def _flush_usage_log():
+    if usage_writer is not None:
+        await run_in_threadpool(usage_writer.close)
+
+
+def _set_priority(request: Request, default: str = "interactive") -> None:
+    _scheduler.request_priority.set(
+        _scheduler.parse_priority(request.headers.get("x-tts-priority", ""), default))
+
+
+def _overloaded(e: "_scheduler.Overloaded") -> HTTPException:
+    return HTTPException(status_code=503, detail="TTS is busy — please retry shortly",
+                         headers={"Retry-After": str(e.retry_after)})
+
+
+# Edge always returns audio-24khz-48kbitrate-mono-mp3: constant bitrate, so
+# byte count -> duration is exact integer arithmetic (edge-tts itself relies
+# on this for its multi-chunk offset compensation).
+MP3_BITRATE_BPS = 48_000
+
+# Optional sentence-granular sub-cache. Each request is split into sentences
+# that are looked up / synthesized against their OWN cache entries (the same
+# keys a one-sentence request would use) and stitched back together, so an
+# edited word or a re-segmented document only re-synthesizes the sentences
+# that actually changed. Off by default: every sentence boundary becomes a
+# synthesis boundary, which slightly changes prosody across sentences.
+SENTENCE_CACHE = os.environ.get("TTS_SENTENCE_CACHE") == "1"
+# Sentences shorter than this are merged with the next one so "Dr." or "e.g."
+# don't become their own clipped syntheses.
+SENTENCE_MIN_CHARS = 40
+
+
+def _audio_key(text: str, voice: str, rate: str, pitch: str) -> str:
+    return hashlib.sha256(f"{text}|{voice}|{rate}|{pitch}".encode("utf-8")).hexdigest()
+
+
+def _timed_key(text: str, voice: str) -> str:
+    # "v2": timed entries are stored in the compact binary format below. The
+    # bump keeps old base64-JSON entries on disk from being served as binary;
+    # they simply age out of the LRU.
+    return hashlib.sha256(f"timed|v2|{text}|{voice}".encode("utf-8")).hexdigest()
+
+
+def _mp3_duration_ms(nbytes: int) -> int:
+    return nbytes * 8 * 1000 // MP3_BITRATE_BPS
+
+
+_SENTENCE_RE = re.compile(r"[^.!?]+[.!?]+\s*|[^.!?]+$")
+
+
+def _split_sentences(text: str) -> list:
+    """Split text into [(start, end), ...] sentence spans, whitespace-trimmed.
+
+    Same sentence regex as segmentTextWithOffsets() in readaloud.js, so the
+    server's sentences line up with the client's segment boundaries. Short
+    pieces are merged forward up to SENTENCE_MIN_CHARS.
+    """
+    spans = []
+    start = None
+    for m in _SENTENCE_RE.finditer(text):
+        s, e = m.start(), m.end()
+        if start is None:
+            start = s
+        if e - start >= SENTENCE_MIN_CHARS:
+            spans.append((start, e))
+            start = None
+    if start is not None:
+        if spans:
+            spans[-1] = (spans[-1][0], len(text))
+        else:
+            spans.append((start, len(text)))
+    out = []
+    for s, e in spans:
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if e > s:
+            out.append((s, e))
+    return out
+
 
 def _map_word_offsets(text: str, boundaries: list) -> list:
     """Map spoken WordBoundary events onto character offsets in the source text.
@@ -317,23 +1089,469 @@ def _map_word_offsets(text: str, boundaries: list) -> list:
     boundaries: [(offset_ticks, duration_ticks, spoken_word), ...] in spoken order.
     Returns [[t_ms, char_offset], ...] for every boundary word that could be
     located in the source. Edge TTS normalizes some tokens before speaking them
-    ("123" -> "one hundred twenty-three", "Dr." -> "Doctor"), so those words
-    don't exist in the source; they are skipped and the client interpolates
-    between the surrounding anchors. The 200-char window keeps a normalized
-    token from false-matching far ahead and derailing the cursor.
+    ("123" -> "one hundred twenty-three", "Dr." -> "Doctor"); the first spoken
+    word of such an expansion anchors the source token, and the client only
+    interpolates across words that could not be placed at all. Linear in the
+    length of text and boundaries; see alignment.py.
     """
+    return _alignment.align(text, boundaries, TICKS_PER_MS)
+
+
+# ----------------------------------------------------------------------
+# Compact binary format for /api/tts/timed
+#
+#   b"RAT1"                magic
+#   uint32 big-endian      header length H
+#   H bytes of header      unsigned LEB128 varints:
+#                            duration_ms + 1   (0 = unknown)
+#                            anchor count N
+#                            N x (dt_ms, dchar) zigzag deltas from the previous
+#                            anchor (the first from 0, 0)
+#   raw MP3                the rest of the body
+#
+# This is also the form timed entries take in audio_cache and on disk, so the
+# base64 (+33%) is gone from memory too. Clients opt in with
+# "Accept: application/vnd.readaloud.timed"; everyone else keeps getting the
+# original JSON, rendered from the binary entry on the way out.
+# ----------------------------------------------------------------------
+TIMED_BINARY_TYPE = "application/vnd.readaloud.timed"
+_TIMED_MAGIC = b"RAT1"
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos: int) -> tuple:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -(n >> 1) - 1
+
+
+def _timed_encode(words: list, duration_ms: Optional[int], audio: bytes) -> bytes:
+    header = bytearray()
+    _put_varint(header, 0 if duration_ms is None else duration_ms + 1)
+    _put_varint(header, len(words))
+    prev_t = prev_c = 0
+    for t, c in words:
+        _put_varint(header, _zigzag(t - prev_t))
+        _put_varint(header, _zigzag(c - prev_c))
+        prev_t, prev_c = t, c
+    return b"".join((_TIMED_MAGIC, len(header).to_bytes(4, "big"), header, audio))
+
+
+def _timed_decode(payload: bytes) -> tuple:
+    """Binary timed payload -> (words, duration_ms, audio memoryview)."""
+    if payload[:4] != _TIMED_MAGIC:
+        raise ValueError("not a timed payload")
+    hlen = int.from_bytes(payload[4:8], "big")
+    view = memoryview(payload)
+    pos = 8
+    dur, pos = _get_varint(view, pos)
+    count, pos = _get_varint(view, pos)
     words = []
-    lower = text.lower()
-    cursor = 0
-    for offset_ticks, _duration_ticks, spoken in boundaries:
-        w = (spoken or "").strip().lower()
-        if not w:
-            continue
-        idx = lower.find(w, cursor)
-        if idx != -1 and idx - cursor <= 200:
-            words.append([offset_ticks // TICKS_PER_MS, idx])
-            cursor = idx + len(w)
-    return words
+    t = c = 0
+    for _ in range(count):
+        dt, pos = _get_varint(view, pos)
+        dc, pos = _get_varint(view, pos)
+        t += _unzigzag(dt)
+        c += _unzigzag(dc)
+        words.append([t, c])
+    return words, (dur - 1 if dur else None), view[8 + hlen:]
+
+
+def _timed_json(payload: bytes) -> bytes:
+    """The original JSON rendering of a binary timed payload."""
+    with _stage("encode"):
+        words, duration_ms, audio = _timed_decode(payload)
+        return json.dumps({
+            "words": words,
+            "duration_ms": duration_ms,
+            "audio": base64.b64encode(audio).decode("ascii"),
+        }).encode("utf-8")
+
+
+def _wants_timed_binary(request: Request) -> bool:
+    return TIMED_BINARY_TYPE in request.headers.get("accept", "")
+
+
+# ----------------------------------------------------------------------
+# Precompressed timed JSON. The JSON rendering of a timed payload is mostly
+# base64 plus a long words array; gzip takes it to roughly 75% (the words
+# array almost disappears, base64 gives back most of its 33%). Each encoding
+# is compressed once per cache entry, the first time a client asks for it,
+# and kept in audio_cache next to the binary entry (so the byte budget sees
+# it), then served as-is on every later hit. brotli and zstandard are used
+# when installed; gzip always works.
+# ----------------------------------------------------------------------
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+_COMPRESSORS = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if _zstd is not None:
+    _COMPRESSORS["zstd"] = lambda data: _zstd.ZstdCompressor(level=19).compress(data)
+if _brotli is not None:
+    _COMPRESSORS["br"] = lambda data: _brotli.compress(data, quality=9)
+_ENCODING_PREFERENCE = ("br", "zstd", "gzip")
+
+
+def _negotiate_encoding(request: Request) -> Optional[str]:
+    """Best Accept-Encoding coding we can serve, or None for identity."""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for coding in _ENCODING_PREFERENCE:
+        if coding in _COMPRESSORS and accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def _compressed_timed_json(payload: bytes, coding: str) -> bytes:
+    data = _timed_json(payload)
+    with _stage("compress"):
+        return _COMPRESSORS[coding](data)
+
+
+async def _timed_json_response(request: Request, key: str, payload: bytes, headers: dict):
+    """JSON response for a timed payload, precompressed when the client
+    accepts it; the compressed body is built at most once per cache entry."""
+    coding = _negotiate_encoding(request)
+    if coding is None:
+        return StreamingResponse(io.BytesIO(_timed_json(payload)), media_type="application/json",
+                                 headers=headers)
+    variant = "json+" + coding
+    body = audio_cache.get_variant(key, variant)
+    CACHE_LOOKUPS.inc("variant", "miss" if body is None else "hit")
+    if body is None:
+        body = await run_in_threadpool(_compressed_timed_json, payload, coding)
+        audio_cache.put_variant(key, variant, body)
+    return Response(body, media_type="application/json",
+                    headers={**headers, "Content-Encoding": coding})
+
+
+class _ChunkFeed:
+    """Live tee of one streaming synthesis. Every reader replays the chunks
+    produced so far, then follows new ones as they arrive, so a request that
+    joins mid-synthesis still gets the whole MP3 from byte 0."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._event = asyncio.Event()
+
+    def push(self, data: bytes) -> None:
+        self.chunks.append(data)
+        self._wake()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def _wake(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def follow(self):
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._event.wait()
+
+
+class _SingleFlight:
+    """In-flight registry: concurrent misses for the same cache_key share ONE
+    upstream synthesis instead of each opening its own Edge websocket.
+
+    The first caller starts the work as a task; everyone (first caller
+    included) awaits it through asyncio.shield, so one reader disconnecting
+    doesn't cancel the audio the others are waiting on. Only when every
+    waiter has gone is the upstream task itself cancelled. Errors and
+    timeouts raised by the task reach all waiters.
+    """
+
+    class _Flight:
+        __slots__ = ("task", "waiters", "feed")
+
+        def __init__(self, task, feed):
+            self.task = task
+            self.waiters = 0
+            self.feed = feed
+
+    def __init__(self):
+        self._flights = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def join(self, key: str, factory, feed: Optional[_ChunkFeed] = None) -> tuple:
+        """Register as a waiter on key's flight, starting factory() if none is
+        running. feed is attached to a NEW flight only; followers read the
+        leader's. Returns (flight, coalesced); always pair with leave()."""
+        flight = self._flights.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = self._Flight(asyncio.ensure_future(factory()), feed)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda t, f=flight: self._forget(key, f, t))
+        flight.waiters += 1
+        return flight, coalesced
+
+    def leave(self, flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel()  # every reader gave up; stop the upstream work
+
+    async def do(self, key: str, factory) -> tuple:
+        """Run factory() once per key. Returns (result, coalesced)."""
+        flight, coalesced = self.join(key, factory)
+        try:
+            return await asyncio.shield(flight.task), coalesced
+        finally:
+            self.leave(flight)
+
+    def _forget(self, key: str, flight, task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # streaming readers get errors via the feed, not the task
+
+
+inflight = _SingleFlight()
+
+# ----------------------------------------------------------------------
+# Multi-worker mode (serve.py). The plain `uvicorn api.tts_server:app`
+# deployment never calls this and everything stays per-process. serve.py
+# imports this module once, calls enable_multiprocess() and then forks, so
+# workers share the imported app copy-on-write, one rate-limit table, and a
+# cross-process in-flight registry that sits behind `inflight`.
+# ----------------------------------------------------------------------
+shared_inflight = None
+
+
+def enable_multiprocess(shared_dir: str, workers: int) -> None:
+    """Swap per-process state for its shared form. Call before forking."""
+    global rate_limiter, shared_inflight, audio_cache
+    rate_limiter = _rate_limit.SharedRateLimiter(
+        os.path.join(shared_dir, "ratelimit.bin"), RATE_LIMIT, RATE_LIMIT_CHARS or None,
+        RATE_WINDOW)
+    shared_inflight = _shared_inflight.SharedInflight(os.path.join(shared_dir, "inflight.db"))
+    # Keep total memory flat as workers are added: the disk tier and the
+    # registry's finished rows are what the workers share.
+    audio_cache = _new_audio_cache(max(8 * MB, CACHE_BYTES // workers))
+    # Likewise the upstream budget, unless it was set explicitly per worker.
+    if "TTS_SYNTH_CONCURRENCY" not in os.environ:
+        scheduler.max_limit = max(scheduler.min_limit, scheduler.max_limit // workers)
+        scheduler.limit = min(scheduler.limit, float(scheduler.max_limit))
+
+
+async def _claim_or_wait(key: str) -> Optional[bytes]:
+    """Multi-worker mode: None once this process may synthesize key, or the
+    bytes another worker already produced for it."""
+    if shared_inflight is None:
+        return None
+    for _ in range(3):
+        if await run_in_threadpool(shared_inflight.claim, key):
+            return None
+        delay = 0.05
+        deadline = time.monotonic() + SYNTH_TIMEOUT_S
+        while time.monotonic() < deadline:
+            state, data = await run_in_threadpool(shared_inflight.result, key)
+            if state == "done":
+                return data
+            if state == "gone":
+                break  # owner died or gave up: try to claim it ourselves
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        else:
+            return None  # owner overran the wait; synthesize rather than fail
+    return None
+
+
+def _release_claim(key: str, data: Optional[bytes] = None) -> None:
+    """Publish data to waiting workers, or drop the claim if data is None."""
+    if shared_inflight is None:
+        return
+    job = (shared_inflight.finish, key, data) if data is not None else (shared_inflight.abandon, key)
+    asyncio.get_running_loop().run_in_executor(None, *job)
+
+
+async def _synthesize_audio(key: str, text: str, voice: str, rate: str, pitch: str,
+                            feed: Optional[_ChunkFeed] = None) -> bytes:
+    """One Edge synthesis for /api/tts; caches the MP3 before returning it.
+
+    With a feed, every audio chunk is also pushed to it the moment Edge sends
+    it. The cache is only written once the whole synthesis has succeeded, so
+    a failed or cancelled stream never leaves truncated audio behind.
+    """
+    shared = await _claim_or_wait(key)
+    if shared is not None:
+        audio_cache.put(key, shared, fresh=True)
+        if feed is not None:
+            feed.push(shared)
+            feed.close()
+        return shared
+
+    audio_stream = io.BytesIO()
+
+    async def _synthesize():
+        async for chunk in _edge_stream(text, voice, rate=rate, pitch=pitch):
+            if chunk["type"] == "audio":
+                audio_stream.write(chunk["data"])
+                if feed is not None:
+                    feed.push(chunk["data"])
+
+    try:
+        async with _upstream_slot(len(text)):
+            await asyncio.wait_for(_synthesize(), timeout=SYNTH_TIMEOUT_S)
+    except BaseException as e:
+        _release_claim(key)
+        if feed is not None:
+            feed.close(e)
+        raise
+
+    audio_bytes = audio_stream.getvalue()
+    _cache_store(key, audio_bytes)
+    _release_claim(key, audio_bytes)
+    if feed is not None:
+        feed.close()
+    return audio_bytes
+
+
+async def _synthesize_timed(key: str, text: str, voice: str) -> bytes:
+    """One Edge synthesis for /api/tts/timed; caches the binary timed payload
+    before returning it."""
+    shared = await _claim_or_wait(key)
+    if shared is not None:
+        audio_cache.put(key, shared, fresh=True)
+        return shared
+
+    try:
+        payload = await _timed_upstream(text, voice)
+    except BaseException:
+        _release_claim(key)
+        raise
+    _cache_store(key, payload)
+    _release_claim(key, payload)
+    return payload
+
+
+async def _timed_upstream(text: str, voice: str) -> bytes:
+    audio_stream = io.BytesIO()
+    boundaries = []
+
+    async def _synthesize():
+        # boundary="WordBoundary" is required on edge-tts 7.x — the default is
+        # SentenceBoundary, which emits no per-word events at all.
+        async for chunk in _edge_stream(text, voice, boundary="WordBoundary"):
+            if chunk["type"] == "audio":
+                audio_stream.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                boundaries.append(
+                    (chunk.get("offset", 0), chunk.get("duration", 0), chunk.get("text", ""))
+                )
+
+    async with _upstream_slot(len(text)):
+        await asyncio.wait_for(_synthesize(), timeout=SYNTH_TIMEOUT_S)
+
+    audio_bytes = audio_stream.getvalue()
+    if not audio_bytes:
+        raise HTTPException(status_code=500, detail="TTS produced no audio")
+
+    with _stage("align"):
+        words = _map_word_offsets(text, boundaries)
+    duration_ms = (
+        (boundaries[-1][0] + boundaries[-1][1]) // TICKS_PER_MS if boundaries else None
+    )
+    with _stage("encode"):
+        return _timed_encode(words, duration_ms, audio_bytes)
+
+
+async def _sentence_part(key: str, factory) -> bytes:
+    data = await _cache_read(key)
+    if data is None:
+        data, _ = await inflight.do(key, factory)
+    return data
+
+
+async def _synthesize_audio_by_sentence(key: str, text: str, voice: str, rate: str,
+                                        pitch: str) -> bytes:
+    """SENTENCE_CACHE miss path for /api/tts: per-sentence entries, MP3 frames
+    concatenated (Edge's CBR frames have no container to rewrite)."""
+    spans = _split_sentences(text)
+    keys = [_audio_key(text[s:e], voice, rate, pitch) for s, e in spans]
+    parts = await asyncio.gather(*[
+        _sentence_part(k, lambda k=k, s=s, e=e: _synthesize_audio(k, text[s:e], voice, rate, pitch))
+        for k, (s, e) in zip(keys, spans)
+    ])
+    audio_bytes = b"".join(parts)
+    _cache_store(key, audio_bytes)
+    return audio_bytes
+
+
+async def _synthesize_timed_by_sentence(key: str, text: str, voice: str) -> bytes:
+    """SENTENCE_CACHE miss path for /api/tts/timed. Each sentence's anchors
+    are shifted onto the combined audio: char offsets by the sentence's start
+    in text, times by the (exact, CBR) duration of the audio before it."""
+    spans = _split_sentences(text)
+    keys = [_timed_key(text[s:e], voice) for s, e in spans]
+    parts = await asyncio.gather(*[
+        _sentence_part(k, lambda k=k, s=s, e=e: _synthesize_timed(k, text[s:e], voice))
+        for k, (s, e) in zip(keys, spans)
+    ])
+
+    words, audio, nbytes, duration_ms = [], [], 0, None
+    for (start, _end), payload in zip(spans, parts):
+        part_words, part_duration, part_audio = _timed_decode(payload)
+        t_off = _mp3_duration_ms(nbytes)
+        words.extend([t + t_off, c + start] for t, c in part_words)
+        if part_duration is not None:
+            duration_ms = t_off + part_duration
+        audio.append(part_audio)
+        nbytes += len(part_audio)
+
+    payload = _timed_encode(words, duration_ms, b"".join(audio))
+    _cache_store(key, payload)
+    return payload
 
 
 @app.get("/")
@@ -342,22 +1560,99 @@ async def root():
     return {"status": "ok", "service": "Read-Aloud TTS API"}
 
 
+# ----------------------------------------------------------------------
+# Cold start: work that no first request needs runs after it (see
+# _ColdStart), and /ready says when it's done. / stays the cheap liveness
+# check render.yaml points at; /ready is for probes and bench_startup.py.
+# ----------------------------------------------------------------------
+_deferred_task = None
+
+
+async def _deferred_init():
+    try:
+        await _ensure_billing()
+        _start_voice_refresh()
+        if job_store is not None:
+            await run_in_threadpool(job_store.sweep)
+        if TEMPO_ENABLED:
+            await run_in_threadpool(_tempo.preload)
+    except Exception as e:
+        print(f"[tts] deferred init error: {e}")
+    boot_clock.event("deferred_init")
+
+
+async def _init_after_first_response():
+    try:
+        await asyncio.wait_for(_first_served.wait(), DEFER_S)
+    except asyncio.TimeoutError:
+        pass
+    await _deferred_init()
+
+
+@app.on_event("startup")
+async def _schedule_deferred_init():
+    global _deferred_task
+    boot_clock.event("startup")
+    if FAST_START:
+        _deferred_task = asyncio.create_task(_init_after_first_response())
+    else:
+        await _deferred_init()
+
+
+@app.on_event("shutdown")
+async def _stop_deferred_init():
+    if _deferred_task is not None:
+        _deferred_task.cancel()
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the deferred init has run and the edge pool (if
+    on) has made its first warm-up, else 503. Reports the boot timeline
+    either way."""
+    checks = {
+        "deferred_init": boot_clock.since("deferred_init") is not None,
+        "edge_pool": edge_pool is None or boot_clock.since("edge_pool") is not None,
+    }
+    ok = all(checks.values())
+    return JSONResponse({
+        "ready": ok,
+        "checks": checks,
+        "edge_pool_idle": edge_pool.idle() if edge_pool is not None else None,
+        "disk_cache_entries": len(disk_cache) if disk_cache is not None else None,
+        "voices": {"count": len(voice_catalog), "source": voice_catalog.source},
+        "billing": None if not _billing_loaded else _billing is not None,
+        "boot": boot_clock.report(),
+    }, status_code=200 if ok else 503, headers={"Cache-Control": "no-store"})
+
+
+VOICES_HEADERS = {"Cache-Control": "public, max-age=86400, stale-while-revalidate=604800"}
+
+
+def _voices_response(request: Request, prebuilt: tuple) -> Response:
+    body, etag = prebuilt
+    unchanged = _http_cache.not_modified(request, etag, VOICES_HEADERS)
+    if unchanged is not None:
+        return unchanged
+    return Response(body, media_type="application/json", headers={**VOICES_HEADERS, "ETag": etag})
+
+
 @app.get("/api/voices")
-async def list_voices(locale: Optional[str] = None):
-    """List available voices, optionally filtered by locale."""
-    if locale:
-        filtered = {k: v for k, v in VOICES.items() if v["locale"].startswith(locale)}
-        return {"voices": filtered}
-    return {"voices": VOICES}
+async def list_voices(request: Request, locale: Optional[str] = None):
+    """List available voices, optionally filtered by locale prefix."""
+    prebuilt = voice_catalog.response(locale or "")
+    if prebuilt is None:
+        return {"voices": {}}
+    return _voices_response(request, prebuilt)
 
 
 @app.get("/api/voices/{locale}")
-async def get_voices_by_locale(locale: str):
-    """Get voices for a specific locale (e.g., en-US, es-ES)."""
-    filtered = {k: v for k, v in VOICES.items() if v["locale"] == locale or v["locale"].startswith(locale.split("-")[0])}
-    if not filtered:
+async def get_voices_by_locale(request: Request, locale: str):
+    """Get voices for a specific locale (e.g., en-US, es-ES) — every locale of its language."""
+    prebuilt = voice_catalog.response(locale.split("-")[0])
+    if prebuilt is None:
         raise HTTPException(status_code=404, detail=f"No voices found for locale: {locale}")
-    return {"voices": filtered}
+    return _voices_response(request, prebuilt)
 
 
 @app.post("/api/tts")
@@ -370,11 +1665,22 @@ async def text_to_speech(request: Request, body: TTSRequest):
     if not _origin_allowed(request):
         raise HTTPException(status_code=403, detail="origin not allowed")
 
-    if not check_rate_limit(_client_ip(request)):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait a moment.")
+    _endpoint.set("tts")
+    cache_key = _audio_key(body.text, body.voice, body.rate, body.pitch)
+    headers = {"Content-Disposition": "inline", "Cache-Control": "public, max-age=3600"}
+    etag = _http_cache.strong_etag(cache_key)
+    # Revalidation of a clip the client already holds: no cache, no budget.
+    unchanged = _http_cache.not_modified(request, etag, headers)
+    if unchanged is not None:
+        CACHE_LOOKUPS.inc("client", "hit")
+        return unchanged
+
+    _enforce_rate_limit(request, len(body.text))
+
+    _set_priority(request)
 
     # Validate voice
-    if body.voice not in VOICES:
+    if body.voice not in voice_catalog:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid voice: {body.voice}. Use GET /api/voices to see available options."
@@ -387,60 +1693,150 @@ async def text_to_speech(request: Request, body: TTSRequest):
     _t0 = time.time()
     char_count = len(body.text)
 
-    cache_key = hashlib.sha256(
-        f"{body.text}|{body.voice}|{body.rate}|{body.pitch}".encode("utf-8")
-    ).hexdigest()
-    cached = audio_cache.get(cache_key)
-    if cached is not None:
+    hit = _cached_response(cache_key, "audio/mpeg", headers, request)
+    if hit is not None:
         _usage_log(body.voice, char_count, True, int((time.time() - _t0) * 1000))
-        return StreamingResponse(
-            io.BytesIO(cached),
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline",
-                "Cache-Control": "public, max-age=3600",
-                "X-Cache": "hit",
-            },
-        )
+        return hit
+
+    by_sentence = SENTENCE_CACHE and len(_split_sentences(body.text)) > 1
+    factor = _tempo_factor(body)
 
-    # Generate audio
+    # Generate audio (or join an identical synthesis already in flight)
     try:
-        communicate = edge_tts.Communicate(
-            text=body.text,
-            voice=body.voice,
-            rate=body.rate,
-            pitch=body.pitch
+        if factor is not None:
+            try:
+                audio_bytes, coalesced = await inflight.do(
+                    cache_key, lambda: _synthesize_tempo(cache_key, body, factor))
+            except _tempo.TempoError as e:
+                print(f"[tts] tempo render failed, asking Edge for the rate: {e}")
+            else:
+                _usage_log(body.voice, char_count, False, int((time.time() - _t0) * 1000),
+                           coalesced=coalesced)
+                return _http_cache.bytes_response(
+                    request, audio_bytes, "audio/mpeg",
+                    {**headers, "X-Cache": "coalesced" if coalesced else "tempo"}, etag,
+                )
+
+        # A seek into a clip we do not hold yet waits for the whole clip.
+        if STREAM_AUDIO and not by_sentence and not _http_cache.wants_tail(request):
+            streamed = await _stream_miss(cache_key, body,
+                                         {**headers, "ETag": etag, "Accept-Ranges": "bytes"}, _t0)
+            if streamed is not None:
+                return streamed
+
+        synth = _synthesize_audio_by_sentence if by_sentence else _synthesize_audio
+        audio_bytes, coalesced = await inflight.do(
+            cache_key,
+            lambda: synth(cache_key, body.text, body.voice, body.rate, body.pitch),
         )
+        _usage_log(body.voice, char_count, False, int((time.time() - _t0) * 1000),
+                   coalesced=coalesced)
 
-        audio_stream = io.BytesIO()
-
-        async def _synthesize():
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_stream.write(chunk["data"])
-
-        await asyncio.wait_for(_synthesize(), timeout=SYNTH_TIMEOUT_S)
-
-        audio_bytes = audio_stream.getvalue()
-        audio_cache.put(cache_key, audio_bytes)
-        _usage_log(body.voice, char_count, False, int((time.time() - _t0) * 1000))
-
-        return StreamingResponse(
-            io.BytesIO(audio_bytes),
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline",
-                "Cache-Control": "public, max-age=3600",
-                "X-Cache": "miss",
-            },
+        return _http_cache.bytes_response(
+            request, audio_bytes, "audio/mpeg",
+            {**headers, "X-Cache": "coalesced" if coalesced else "miss"}, etag,
         )
 
+    except HTTPException:
+        raise
+    except _scheduler.Overloaded as e:
+        raise _overloaded(e)
     except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="TTS generation timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
 
 
+# ----------------------------------------------------------------------
+# Server-side tempo (tempo.py). A non-1x /api/tts miss is rendered from the
+# natural-rate audio of the same text — the 1x /api/tts entry or the timed
+# payload /api/tts/timed cached, synthesizing that once if neither exists —
+# then cached under its own (rate-keyed) cache key. So a reader's MP3 download
+# at 1.5x costs CPU here, not a second Edge round trip per segment.
+# TTS_TEMPO=0 turns it off; without ffmpeg it is off anyway.
+# ----------------------------------------------------------------------
+TEMPO_ENABLED = os.environ.get("TTS_TEMPO", "1") == "1" and _tempo.available()
+_tempo_slots = asyncio.Semaphore(int(os.environ.get("TTS_TEMPO_CONCURRENCY",
+                                                    str(os.cpu_count() or 2))))
+if TEMPO_ENABLED:
+    print(f"[tts] tempo rendering on ({_tempo.engine()})")
+
+
+def _tempo_factor(body: TTSRequest) -> Optional[float]:
+    """Speed factor if this request can be rendered locally, else None."""
+    if not TEMPO_ENABLED or body.rate == "+0%" or body.pitch != "+0Hz":
+        return None
+    try:
+        return _tempo.parse_rate(body.rate)
+    except ValueError:
+        return None  # out of range: let Edge decide
+
+
+async def _synthesize_tempo(key: str, body: TTSRequest, factor: float) -> bytes:
+    natural = await _cache_read(_audio_key(body.text, body.voice, "+0%", body.pitch))
+    if natural is None:
+        payload, _state = await _timed_payload(body.text, body.voice)
+        natural = bytes(_timed_decode(payload)[2])
+    async with _tempo_slots:
+        with _stage("tempo"):
+            audio_bytes = await run_in_threadpool(_tempo.stretch_mp3, natural, factor)
+    _cache_store(key, audio_bytes)
+    return audio_bytes
+
+
+async def _stream_miss(cache_key: str, body: TTSRequest, headers: dict, t0: float):
+    """Miss path for STREAM_AUDIO: forward Edge's MP3 chunks as they arrive.
+
+    Waits for the first chunk before answering, so an upstream failure that
+    happens before any audio still surfaces as a proper 5xx. After that the
+    status is committed; a mid-stream failure aborts the body (and nothing is
+    cached). Returns None when the key is already being synthesized by a
+    buffered (non-streaming) request — the caller then just joins that.
+    """
+    feed = _ChunkFeed()
+    flight, coalesced = inflight.join(
+        cache_key,
+        lambda: _synthesize_audio(cache_key, body.text, body.voice, body.rate, body.pitch,
+                                  feed=feed),
+        feed=feed,
+    )
+    if flight.feed is None:
+        inflight.leave(flight)
+        return None
+
+    async def _read():
+        completed = False
+        try:
+            async for data in flight.feed.follow():
+                yield data
+            completed = True
+        finally:
+            inflight.leave(flight)
+            if completed:
+                _usage_log(body.voice, len(body.text), False, int((time.time() - t0) * 1000),
+                           coalesced=coalesced)
+
+    chunks = _read()
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="TTS produced no audio")
+    except BaseException:
+        await chunks.aclose()
+        raise
+
+    async def _body():
+        yield first
+        async for data in chunks:
+            yield data
+
+    return StreamingResponse(
+        _body(),
+        media_type="audio/mpeg",
+        headers={**headers, "X-Cache": "coalesced" if coalesced else "stream"},
+    )
+
+
 @app.post("/api/tts/timed")
 async def text_to_speech_timed(request: Request, body: TimedTTSRequest):
     """
@@ -452,15 +1848,20 @@ async def text_to_speech_timed(request: Request, body: TimedTTSRequest):
                      submitted text, for timestamp-accurate highlighting/seeking
         duration_ms  approximate audio duration from the last word boundary
 
+    Clients sending "Accept: application/vnd.readaloud.timed" get the same
+    data in the compact binary format instead (see _timed_encode).
+
     Always synthesized at natural rate; clients change speed via playbackRate.
     """
     if not _origin_allowed(request):
         raise HTTPException(status_code=403, detail="origin not allowed")
 
-    if not check_rate_limit(_client_ip(request)):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait a moment.")
+    _endpoint.set("timed")
+    _enforce_rate_limit(request, len(body.text))
+
+    _set_priority(request)
 
-    if body.voice not in VOICES:
+    if body.voice not in voice_catalog:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid voice: {body.voice}. Use GET /api/voices to see available options."
@@ -469,68 +1870,550 @@ async def text_to_speech_timed(request: Request, body: TimedTTSRequest):
     _t0 = time.time()
     char_count = len(body.text)
 
-    cache_key = hashlib.sha256(
-        f"timed|{body.text}|{body.voice}".encode("utf-8")
-    ).hexdigest()
-    cached = audio_cache.get(cache_key)
-    if cached is not None:
+    cache_key = _timed_key(body.text, body.voice)
+    binary = _wants_timed_binary(request)
+    headers = {"Cache-Control": "public, max-age=3600", "Vary": "Accept, Accept-Encoding"}
+    if binary:
+        hit = _cached_response(cache_key, TIMED_BINARY_TYPE, headers)
+    else:
+        cached = await _cache_read(cache_key)
+        hit = None if cached is None else await _timed_json_response(
+            request, cache_key, cached, {**headers, "X-Cache": "hit"})
+    if hit is not None:
         _usage_log(body.voice, char_count, True, int((time.time() - _t0) * 1000))
-        return StreamingResponse(
-            io.BytesIO(cached),
-            media_type="application/json",
-            headers={"Cache-Control": "public, max-age=3600", "X-Cache": "hit"},
-        )
+        return hit
+
+    by_sentence = SENTENCE_CACHE and len(_split_sentences(body.text)) > 1
 
     try:
-        # boundary="WordBoundary" is required on edge-tts 7.x — the default is
-        # SentenceBoundary, which emits no per-word events at all.
-        communicate = edge_tts.Communicate(
-            text=body.text, voice=body.voice, boundary="WordBoundary"
+        synth = _synthesize_timed_by_sentence if by_sentence else _synthesize_timed
+        payload, coalesced = await inflight.do(
+            cache_key, lambda: synth(cache_key, body.text, body.voice),
         )
+        _usage_log(body.voice, char_count, False, int((time.time() - _t0) * 1000),
+                   coalesced=coalesced)
 
-        audio_stream = io.BytesIO()
-        boundaries = []
+        headers["X-Cache"] = "coalesced" if coalesced else "miss"
+        if not binary:
+            return await _timed_json_response(request, cache_key, payload, headers)
+        return StreamingResponse(io.BytesIO(payload), media_type=TIMED_BINARY_TYPE,
+                                 headers=headers)
 
-        async def _synthesize():
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_stream.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    boundaries.append(
-                        (chunk.get("offset", 0), chunk.get("duration", 0), chunk.get("text", ""))
-                    )
+    except HTTPException:
+        raise
+    except _scheduler.Overloaded as e:
+        raise _overloaded(e)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="TTS generation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
 
-        await asyncio.wait_for(_synthesize(), timeout=SYNTH_TIMEOUT_S)
 
-        audio_bytes = audio_stream.getvalue()
-        if not audio_bytes:
-            raise HTTPException(status_code=500, detail="TTS produced no audio")
+async def _timed_payload(text: str, voice: str) -> tuple:
+    """Binary timed payload for (text, voice) from cache or a (coalesced)
+    synthesis. Returns (payload, "hit" | "miss" | "coalesced")."""
+    key = _timed_key(text, voice)
+    cached = await _cache_read(key)
+    if cached is not None:
+        return cached, "hit"
+    by_sentence = SENTENCE_CACHE and len(_split_sentences(text)) > 1
+    synth = _synthesize_timed_by_sentence if by_sentence else _synthesize_timed
+    payload, coalesced = await inflight.do(key, lambda: synth(key, text, voice))
+    return payload, "coalesced" if coalesced else "miss"
+
+
+async def _timed_payload_retrying(text: str, voice: str, attempts: int = 3) -> tuple:
+    """_timed_payload for background work (jobs, prerender.py): each attempt
+    bounded by SYNTH_TIMEOUT_S, Overloaded waited out for its retry_after,
+    other failures retried with backoff. Raises the last error."""
+    for attempt in range(attempts):
+        try:
+            return await asyncio.wait_for(_timed_payload(text, voice), timeout=SYNTH_TIMEOUT_S)
+        except _scheduler.Overloaded as e:
+            if attempt + 1 == attempts:
+                raise
+            delay = e.retry_after
+        except Exception:
+            if attempt + 1 == attempts:
+                raise
+            delay = 2 ** attempt
+        await asyncio.sleep(delay)
 
-        words = _map_word_offsets(body.text, boundaries)
-        duration_ms = (
-            (boundaries[-1][0] + boundaries[-1][1]) // TICKS_PER_MS if boundaries else None
-        )
-        payload = json.dumps({
-            "words": words,
-            "duration_ms": duration_ms,
-            "audio": base64.b64encode(audio_bytes).decode("ascii"),
-        }).encode("utf-8")
 
-        audio_cache.put(cache_key, payload)
-        _usage_log(body.voice, char_count, False, int((time.time() - _t0) * 1000))
+def _synthesis_error(e: Exception) -> str:
+    """Client-facing message for a failed synthesis."""
+    if isinstance(e, _scheduler.Overloaded):
+        return "TTS is busy"
+    if isinstance(e, asyncio.TimeoutError):
+        return "TTS generation timed out"
+    if isinstance(e, HTTPException):
+        return e.detail
+    return f"TTS generation failed: {e}"
 
-        return StreamingResponse(
-            io.BytesIO(payload),
-            media_type="application/json",
-            headers={"Cache-Control": "public, max-age=3600", "X-Cache": "miss"},
+
+TIMED_BATCH_TYPE = "application/vnd.readaloud.timed-batch"
+
+
+def _batch_frame(i: int, status: int, data: bytes) -> bytes:
+    """One framed-binary batch record: uint32 index, uint8 status, uint32 length."""
+    return i.to_bytes(4, "big") + bytes((status,)) + len(data).to_bytes(4, "big") + data
+
+
+@app.post("/api/tts/batch")
+async def text_to_speech_batch(request: Request, body: BatchTTSRequest):
+    """
+    Timed TTS for many segments in ONE request (one preflight, one origin
+    check, one rate-limit slot instead of one per segment).
+
+    Segments are synthesized concurrently, at most BATCH_CONCURRENCY at a
+    time, and results are streamed back strictly in order as soon as each
+    one (and everything before it) is ready. Every segment goes through the
+    same cache, in-flight registry and _map_word_offsets alignment as
+    /api/tts/timed.
+
+    Default response is NDJSON, one line per segment:
+        {"index": i, "words": [...], "duration_ms": n, "audio": base64, "cache": "hit"}
+        {"index": i, "error": "..."}                      (that segment failed)
+    With "Accept: application/vnd.readaloud.timed-batch" it is a framed binary
+    stream instead: uint32 index, uint8 status (0 ok / 1 error), uint32 length,
+    then that many bytes — a binary timed payload, or a UTF-8 error message.
+    """
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+
+    _endpoint.set("batch")
+    _enforce_rate_limit(request, sum(len(t) for t in body.segments))
+
+    _set_priority(request, default="bulk")
+
+    if body.voice not in voice_catalog:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid voice: {body.voice}. Use GET /api/voices to see available options."
         )
 
-    except HTTPException:
+    framed = TIMED_BATCH_TYPE in request.headers.get("accept", "")
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _one(text: str) -> tuple:
+        async with sem:
+            t0 = time.time()
+            payload, state = await asyncio.wait_for(
+                _timed_payload(text, body.voice), timeout=SYNTH_TIMEOUT_S)
+            _usage_log(body.voice, len(text), state == "hit", int((time.time() - t0) * 1000),
+                       coalesced=state == "coalesced")
+            return payload, state
+
+    tasks = [asyncio.ensure_future(_one(t)) for t in body.segments]
+    _frame = _batch_frame
+
+    async def _results():
+        try:
+            for i, task in enumerate(tasks):
+                try:
+                    payload, state = await task
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    err = "TTS generation timed out"
+                    yield _frame(i, 1, err.encode()) if framed else (
+                        json.dumps({"index": i, "error": err}) + "\n").encode()
+                    continue
+                except Exception as e:
+                    if isinstance(e, _scheduler.Overloaded):
+                        e = _overloaded(e)
+                    err = e.detail if isinstance(e, HTTPException) else f"TTS generation failed: {e}"
+                    yield _frame(i, 1, err.encode()) if framed else (
+                        json.dumps({"index": i, "error": err}) + "\n").encode()
+                    continue
+                if framed:
+                    yield _frame(i, 0, payload)
+                else:
+                    with _stage("encode"):
+                        words, duration_ms, audio = _timed_decode(payload)
+                        line = (json.dumps({
+                            "index": i,
+                            "words": words,
+                            "duration_ms": duration_ms,
+                            "audio": base64.b64encode(audio).decode("ascii"),
+                            "cache": state,
+                        }) + "\n").encode()
+                    yield line
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()  # client went away mid-batch: stop the rest
+                elif not task.cancelled():
+                    task.exception()
+
+    return StreamingResponse(
+        _results(),
+        media_type=TIMED_BATCH_TYPE if framed else "application/x-ndjson",
+        headers={"Cache-Control": "no-store", "Vary": "Accept"},
+    )
+
+
+boot_clock.mark("tts routes")
+
+# ----------------------------------------------------------------------
+# Long-document jobs. The client submits a whole document once; the server
+# segments it (absolute offsets preserved), synthesizes the segments in
+# parallel on the bulk lane, and keeps the results in a local SQLite job
+# store (job_store.py) for TTS_JOB_TTL_H hours. Clients poll the job and
+# fetch segments, or stream them in order as they become ready.
+# Disabled (404) unless TTS_JOB_DB points at a writeable SQLite path.
+# ----------------------------------------------------------------------
+JOB_DB_PATH = os.environ.get("TTS_JOB_DB")
+JOB_MAX_CHARS = int(os.environ.get("TTS_JOB_MAX_CHARS", "200000"))
+# Same segment size as SEGMENT_CHARS in readaloud.js, so a job's segments are
+# the cache entries the reader itself would have asked for.
+JOB_SEGMENT_CHARS = int(os.environ.get("TTS_JOB_SEGMENT_CHARS", "1200"))
+JOB_CONCURRENCY = int(os.environ.get("TTS_JOB_CONCURRENCY", "6"))
+JOB_TTL_H = float(os.environ.get("TTS_JOB_TTL_H", "24"))
+job_store = None
+
+if JOB_DB_PATH:
+    try:
+        job_store = _job_store.JobStore(JOB_DB_PATH, ttl_s=JOB_TTL_H * 3600)
+    except Exception as _e:
+        print(f"[tts] job API disabled — init error: {_e}")
+        job_store = None
+boot_clock.mark("job store")
+
+_jobs: dict = {}          # job id -> task running it in this process
+_job_progress: dict = {}  # job id -> Event set (and dropped) when a segment finishes
+_job_last_sweep = 0.0
+
+
+class JobRequest(BaseModel):
+    """Long-document job body: the whole text, one voice, natural rate."""
+    text: str = Field(..., min_length=1, max_length=JOB_MAX_CHARS, description="Document text")
+    voice: str = Field(default="en-US-AriaNeural", description="Voice ID")
+
+
+def _segment_document(text: str, max_len: int) -> list:
+    """[(start, end), ...] segments of at most max_len chars, whitespace-trimmed.
+
+    Port of segmentTextWithOffsets() in readaloud.js: whole sentences packed
+    up to max_len; an oversized sentence is split at whitespace, or hard-cut
+    where there is none (CJK, long URLs). Offsets index the original text.
+    """
+    out = []
+    seg = [None, None]
+
+    def push(s, e):
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if e > s:
+            out.append((s, e))
+
+    def add_piece(ps, pe):
+        if seg[0] is None:
+            seg[0], seg[1] = ps, pe
+            return
+        if pe - seg[0] > max_len:
+            push(seg[0], seg[1])
+            seg[0] = ps
+        seg[1] = pe
+
+    for m in _SENTENCE_RE.finditer(text):
+        ps, pe = m.start(), m.end()
+        if pe - ps <= max_len:
+            add_piece(ps, pe)
+            continue
+        cur = ps
+        while pe - cur > max_len:
+            cut = text.rfind(" ", cur, cur + max_len + 1)
+            if cut <= cur:
+                cut = cur + max_len
+            add_piece(cur, cut)
+            cur = cut
+        if cur < pe:
+            add_piece(cur, pe)
+    if seg[0] is not None:
+        push(seg[0], seg[1])
+    return out
+
+
+def _job_notify(job_id: str) -> None:
+    event = _job_progress.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+async def _run_job(job_id: str, text: str, spans: list, voice: str) -> None:
+    """Synthesize every segment of a job, JOB_CONCURRENCY at a time, in order
+    of position so streaming readers get the start of the document first."""
+    _endpoint.set("jobs")
+    _scheduler.request_priority.set("bulk")
+    sem = asyncio.Semaphore(JOB_CONCURRENCY)
+
+    async def _one(i: int, start: int, end: int) -> bool:
+        async with sem:
+            # DELETE may have come in at another worker.
+            job = await run_in_threadpool(job_store.job, job_id)
+            if job is None or job["state"] != _job_store.RUNNING:
+                return False
+            t0 = time.time()
+            try:
+                payload, state = await _timed_payload_retrying(text[start:end], voice)
+            except Exception as e:
+                await run_in_threadpool(job_store.fail_segment, job_id, i, _synthesis_error(e))
+                _job_notify(job_id)
+                return False
+            _usage_log(voice, end - start, state == "hit", int((time.time() - t0) * 1000),
+                       coalesced=state == "coalesced")
+            await run_in_threadpool(job_store.finish_segment, job_id, i, payload)
+            _job_notify(job_id)
+            return True
+
+    try:
+        results = await asyncio.gather(*(_one(i, s, e) for i, (s, e) in enumerate(spans)))
+        final = _job_store.DONE if all(results) else _job_store.FAILED
+        await run_in_threadpool(job_store.set_state, job_id, final, _job_store.RUNNING)
+    except asyncio.CancelledError:
+        # Cancelled by DELETE (already marked) or by shutdown (mark it now).
+        await run_in_threadpool(job_store.set_state, job_id, _job_store.INTERRUPTED,
+                                _job_store.RUNNING)
         raise
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=504, detail="TTS generation timed out")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
+    finally:
+        _jobs.pop(job_id, None)
+        _job_notify(job_id)
+
+
+async def _current_job(job_id: str) -> Optional[dict]:
+    """The job's row, or None once it is deleted or expired. Safe inside a
+    response that has already started, unlike _job_or_404."""
+    job = await run_in_threadpool(job_store.job, job_id)
+    if job is None:
+        return None
+    if (job["state"] == _job_store.RUNNING and job_id not in _jobs
+            and not _shared_inflight._alive(job["pid"])):
+        # The worker running it died (serve.py replaces it, the job is lost).
+        await run_in_threadpool(job_store.set_state, job_id, _job_store.INTERRUPTED,
+                                _job_store.RUNNING)
+        job["state"] = _job_store.INTERRUPTED
+    return job
+
+
+async def _job_or_404(job_id: str) -> dict:
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    job = await _current_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+def _job_segment_payload(payload: bytes, start: int) -> bytes:
+    """Stored (segment-relative) timed payload with anchors made absolute."""
+    words, duration_ms, audio = _timed_decode(payload)
+    return _timed_encode([[t, c + start] for t, c in words], duration_ms, audio)
+
+
+def _job_segment_json(i: int, start: int, end: int, payload: bytes) -> dict:
+    words, duration_ms, audio = _timed_decode(payload)
+    return {"index": i, "start": start, "end": end,
+            "words": [[t, c + start] for t, c in words], "duration_ms": duration_ms,
+            "audio": base64.b64encode(audio).decode("ascii")}
+
+
+@app.on_event("startup")
+async def _recover_jobs():
+    # Expired-job sweep waits for the deferred init; orphans are marked now
+    # so no reader polls a job nobody is running.
+    if job_store is not None:
+        await run_in_threadpool(job_store.interrupt_orphans, _shared_inflight._alive)
+
+
+@app.on_event("shutdown")
+async def _stop_jobs():
+    tasks = list(_jobs.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@app.post("/api/tts/jobs", status_code=202)
+async def create_tts_job(request: Request, body: JobRequest):
+    """
+    Submit a whole document for synthesis (up to JOB_MAX_CHARS characters).
+
+    Returns immediately with the job id and its segments:
+        {"id": ..., "state": "running",
+         "segments": [{"index": i, "start": s, "end": e}, ...]}
+    start/end are absolute offsets into the submitted text, and so are the
+    char offsets in every segment's word anchors.
+    Then either poll GET /api/tts/jobs/{id} and fetch finished segments from
+    /api/tts/jobs/{id}/segments/{i}, or read /api/tts/jobs/{id}/stream.
+    """
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+
+    _endpoint.set("jobs")
+    # One request; a document over the whole character budget is admitted on
+    # a full bucket and drains it (see rate_limit.py).
+    _enforce_rate_limit(request, len(body.text))
+
+    if body.voice not in voice_catalog:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid voice: {body.voice}. Use GET /api/voices to see available options."
+        )
+
+    spans = _segment_document(body.text, JOB_SEGMENT_CHARS)
+    if not spans:
+        raise HTTPException(status_code=400, detail="No text to synthesize")
+
+    global _job_last_sweep
+    if time.time() - _job_last_sweep > 3600:
+        _job_last_sweep = time.time()
+        await run_in_threadpool(job_store.sweep)
+
+    job_id = secrets.token_urlsafe(16)
+    await run_in_threadpool(job_store.create, job_id, body.voice, len(body.text), spans)
+    _jobs[job_id] = asyncio.create_task(_run_job(job_id, body.text, spans, body.voice))
+    return {
+        "id": job_id,
+        "state": _job_store.RUNNING,
+        "segments": [{"index": i, "start": s, "end": e} for i, (s, e) in enumerate(spans)],
+    }
+
+
+@app.get("/api/tts/jobs/{job_id}")
+async def get_tts_job(request: Request, job_id: str):
+    """Job progress: state, done/failed counts and every segment's state."""
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+    job = await _job_or_404(job_id)
+    rows = await run_in_threadpool(job_store.segments, job_id)
+    return {
+        "id": job_id,
+        "state": job["state"],
+        "voice": job["voice"],
+        "chars": job["chars"],
+        "done": job["done"],
+        "failed": job["failed"],
+        "segments": [
+            {"index": i, "start": s, "end": e, "state": st, **({"error": err} if err else {})}
+            for i, s, e, st, err in rows
+        ],
+    }
+
+
+@app.get("/api/tts/jobs/{job_id}/segments/{index}")
+async def get_tts_job_segment(request: Request, job_id: str, index: int):
+    """One finished segment, in the /api/tts/timed formats (JSON, or binary
+    with "Accept: application/vnd.readaloud.timed"), anchors absolute.
+    202 + Retry-After while it is still pending."""
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+    job = await _job_or_404(job_id)
+    row = await run_in_threadpool(job_store.segment, job_id, index)
+    if row is None:
+        raise HTTPException(status_code=404, detail="No such segment")
+    start, end, state, error, payload = row
+    if state == "failed":
+        raise HTTPException(status_code=502, detail=error or "TTS generation failed")
+    if state != "done":
+        if job["state"] != _job_store.RUNNING:
+            raise HTTPException(status_code=410, detail=f"Job {job['state']}")
+        return Response(json.dumps({"index": index, "state": state}).encode("utf-8"),
+                        status_code=202, media_type="application/json",
+                        headers={"Retry-After": "1", "Cache-Control": "no-store"})
+    headers = {"Cache-Control": "private, max-age=3600", "Vary": "Accept"}
+    if _wants_timed_binary(request):
+        return Response(_job_segment_payload(payload, start), media_type=TIMED_BINARY_TYPE,
+                        headers=headers)
+    return Response(json.dumps(_job_segment_json(index, start, end, payload)).encode("utf-8"),
+                    media_type="application/json", headers=headers)
+
+
+@app.get("/api/tts/jobs/{job_id}/stream")
+async def stream_tts_job(request: Request, job_id: str, start_index: int = 0):
+    """
+    Every segment from start_index on, in order, each as soon as it (and
+    everything before it) is ready — the /api/tts/batch formats: NDJSON lines
+    {"index", "start", "end", "words", "duration_ms", "audio"} or {"index",
+    "error"}; framed binary with "Accept: application/vnd.readaloud.timed-batch".
+    A dropped stream can be resumed with ?start_index=<next index>.
+    """
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+    job = await _job_or_404(job_id)
+    framed = TIMED_BATCH_TYPE in request.headers.get("accept", "")
+    total = job["segments"]
+
+    def _error(i: int, err: str) -> bytes:
+        return _batch_frame(i, 1, err.encode()) if framed else (
+            json.dumps({"index": i, "error": err}) + "\n").encode()
+
+    async def _results():
+        # The 200 is already sent by the time anything here runs: a job that
+        # disappears (expired, swept) ends the stream with error records.
+        i = max(0, start_index)
+        gone = False
+        while i < total:
+            # Registered before reading, so a segment finishing in between
+            # still wakes us; other workers' jobs are picked up by polling.
+            progress = _job_progress.setdefault(job_id, asyncio.Event())
+            for idx, start, end, state, error in await run_in_threadpool(
+                    job_store.segments, job_id, i):
+                if state == "pending":
+                    break
+                if state == "failed":
+                    yield _error(idx, error or "TTS generation failed")
+                else:
+                    row = await run_in_threadpool(job_store.segment, job_id, idx)
+                    if row is None:
+                        gone = True
+                        break
+                    payload = row[4]
+                    if framed:
+                        yield _batch_frame(idx, 0, _job_segment_payload(payload, start))
+                    else:
+                        yield (json.dumps(_job_segment_json(idx, start, end, payload))
+                               + "\n").encode()
+                i = idx + 1
+            if i >= total:
+                break
+            current = None if gone else await _current_job(job_id)
+            if current is None:
+                for idx in range(i, total):
+                    yield _error(idx, "job gone")
+                break
+            if current["state"] != _job_store.RUNNING:
+                for idx in range(i, total):
+                    yield _error(idx, f"job {current['state']}")
+                break
+            try:
+                await asyncio.wait_for(progress.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+
+    return StreamingResponse(
+        _results(),
+        media_type=TIMED_BATCH_TYPE if framed else "application/x-ndjson",
+        headers={"Cache-Control": "no-store", "Vary": "Accept"},
+    )
+
+
+@app.delete("/api/tts/jobs/{job_id}")
+async def cancel_tts_job(request: Request, job_id: str):
+    """Stop a running job. Finished segments stay fetchable until it expires."""
+    if not _origin_allowed(request):
+        raise HTTPException(status_code=403, detail="origin not allowed")
+    await _job_or_404(job_id)
+    await run_in_threadpool(job_store.set_state, job_id, _job_store.CANCELLED, _job_store.RUNNING)
+    task = _jobs.get(job_id)
+    if task is not None:
+        task.cancel()
+    return {"id": job_id, "state": (await _job_or_404(job_id))["state"]}
 
 
 @app.get("/api/tts")
@@ -546,6 +2429,62 @@ async def text_to_speech_get(
     return await text_to_speech(request, body)
 
 
+# ----------------------------------------------------------------------
+# Prometheus scrape endpoint. 404 unless TTS_METRICS=1; if TTS_ADMIN_TOKEN is
+# set, the scraper must send it (Authorization: Bearer, X-Admin-Token or
+# ?token=). Under serve.py each worker reports its own process only.
+# ----------------------------------------------------------------------
+METRICS_ENABLED = os.environ.get("TTS_METRICS") == "1"
+
+# Values that already live elsewhere are read at scrape time, not mirrored.
+METRICS.gauge("tts_audio_cache_bytes", "Resident bytes in the in-memory audio cache.",
+              lambda: audio_cache.size)
+METRICS.gauge("tts_audio_cache_entries", "Entries in the in-memory audio cache.",
+              lambda: len(audio_cache))
+METRICS.gauge("tts_audio_cache_evictions_total", "Entries evicted from the in-memory audio cache.",
+              lambda: audio_cache.evictions, kind="counter")
+METRICS.gauge("tts_audio_cache_rejections_total",
+              "New entries the in-memory audio cache declined to admit.",
+              lambda: audio_cache.rejections, kind="counter")
+METRICS.gauge("tts_audio_cache_segment_bytes", "Resident bytes per memory cache segment.",
+              lambda: {(k,): v for k, v in audio_cache.segment_bytes().items()}, ("segment",))
+METRICS.gauge("tts_audio_cache_budget_bytes", "Byte budget per memory cache segment.",
+              lambda: {(k,): v for k, v in audio_cache.budgets().items()}, ("segment",))
+METRICS.gauge("tts_disk_cache_bytes", "Bytes in the disk cache tier.",
+              lambda: disk_cache.size if disk_cache is not None else None)
+METRICS.gauge("tts_inflight_syntheses", "Distinct syntheses in flight in this process.",
+              lambda: len(inflight))
+METRICS.gauge("tts_synth_active", "Upstream synthesis slots in use.", lambda: scheduler.active)
+METRICS.gauge("tts_synth_queued", "Syntheses waiting for a slot, by lane.",
+              lambda: {(p,): scheduler.queued(p) for p in _scheduler.PRIORITIES}, ("lane",))
+METRICS.gauge("tts_synth_limit", "Current adaptive upstream concurrency limit.",
+              lambda: scheduler.limit)
+METRICS.gauge("tts_synth_shed_total", "Syntheses rejected with 503 by the scheduler, by lane.",
+              lambda: {(p,): n for p, n in scheduler.shed.items()}, ("lane",), kind="counter")
+METRICS.gauge("tts_edge_pool_idle", "Warm upstream sockets in the pool.",
+              lambda: edge_pool.idle() if edge_pool is not None else None)
+METRICS.gauge("tts_edge_pool_events_total", "Edge pool connects, reuses, stale and failed turns.",
+              lambda: ({(k,): v for k, v in edge_pool.stats.items()}
+                       if edge_pool is not None else None), ("event",), kind="counter")
+METRICS.gauge("tts_usage_dropped_total", "Usage rows dropped because the writer queue was full.",
+              lambda: usage_writer.dropped if usage_writer is not None else None, kind="counter")
+
+
+@app.get("/metrics")
+async def metrics(request: Request, token: Optional[str] = None):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+    admin_token = os.environ.get("TTS_ADMIN_TOKEN")
+    if admin_token:
+        import hmac
+        auth = request.headers.get("authorization", "")
+        supplied = (token or request.headers.get("x-admin-token", "")
+                    or (auth[7:] if auth.lower().startswith("bearer ") else ""))
+        if not hmac.compare_digest(supplied, admin_token):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ----------------------------------------------------------------------
 # Local-only usage dashboard
 # Disabled unless both TTS_USAGE_DB and TTS_ADMIN_TOKEN env vars are set.
@@ -564,51 +2503,21 @@ async def admin_stats(request: Request, token: Optional[str] = None):
     if not hmac.compare_digest(supplied, ADMIN_TOKEN):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    conn = sqlite3.connect(USAGE_DB_PATH, timeout=2)
-    conn.row_factory = sqlite3.Row
-
-    def q(sql, *args):
-        return [dict(r) for r in conn.execute(sql, args).fetchall()]
-
-    today = q(
-        "SELECT COUNT(*) AS reqs, COALESCE(SUM(char_count),0) AS chars, "
-        "COALESCE(SUM(cache_hit),0) AS hits, COALESCE(AVG(duration_ms),0) AS avg_ms "
-        "FROM tts_requests WHERE ts >= datetime('now','-24 hours')"
-    )[0]
-    all_time = q(
-        "SELECT COUNT(*) AS reqs, COALESCE(SUM(char_count),0) AS chars, "
-        "MIN(ts) AS first_seen FROM tts_requests"
-    )[0]
-    daily = q(
-        "SELECT date(ts) AS d, COUNT(*) AS n, SUM(char_count) AS chars "
-        "FROM tts_requests WHERE ts >= datetime('now','-14 days') "
-        "GROUP BY date(ts) ORDER BY d"
-    )
-    voices = q(
-        "SELECT voice, COUNT(*) AS n, SUM(char_count) AS chars "
-        "FROM tts_requests WHERE ts >= datetime('now','-7 days') "
-        "GROUP BY voice ORDER BY n DESC LIMIT 12"
-    )
-    buckets = q(
-        "SELECT CASE "
-        "  WHEN char_count < 100 THEN '<100' "
-        "  WHEN char_count < 500 THEN '100-500' "
-        "  WHEN char_count < 2000 THEN '500-2k' "
-        "  WHEN char_count < 5000 THEN '2k-5k' "
-        "  ELSE '5k+' END AS bucket, COUNT(*) AS n "
-        "FROM tts_requests WHERE ts >= datetime('now','-7 days') "
-        "GROUP BY bucket ORDER BY MIN(char_count)"
-    )
-    hourly = q(
-        "SELECT strftime('%H', ts) AS h, COUNT(*) AS n "
-        "FROM tts_requests WHERE ts >= datetime('now','-24 hours') "
-        "GROUP BY h ORDER BY h"
-    )
-    conn.close()
+    def _summary():
+        conn = sqlite3.connect(USAGE_DB_PATH, timeout=2)
+        try:
+            return _usage_rollup.summary(conn)
+        finally:
+            conn.close()
+
+    # Rollups only: cost is bounded by voices x days shown, not by traffic.
+    stats = await run_in_threadpool(_summary)
+    today, all_time = stats["today"], stats["all_time"]
+    daily, voices, buckets, hourly = stats["daily"], stats["voices"], stats["buckets"], stats["hourly"]
 
     # Live financials section, embedded from the billing module (admin-only page).
     finance_html = ""
-    _b = globals().get("_billing")
+    _b = await _ensure_billing()
     if _b is not None:
         try:
             finance_html = await run_in_threadpool(_b.finance_section_or_empty)
@@ -630,9 +2539,9 @@ async def admin_stats(request: Request, token: Optional[str] = None):
             f'<td class="num">{extra}</td></tr>'
         )
 
-    daily_rows = "".join(bar_row(d["d"], d["n"], None, max_daily, f"{d['chars']:,} ch") for d in daily) or '<tr><td colspan="4" class="muted">No data yet.</td></tr>'
+    daily_rows = "".join(bar_row(d["d"], d["n"], None, max_daily, f"{d['chars']:,} ch · p95 {d['p95']:,.0f}ms") for d in daily) or '<tr><td colspan="4" class="muted">No data yet.</td></tr>'
     voice_rows = "".join(bar_row(v["voice"], v["n"], None, max_voice, f"{v['chars']:,} ch") for v in voices) or '<tr><td colspan="4" class="muted">No data yet.</td></tr>'
-    bucket_rows = "".join(bar_row(b["bucket"], b["n"], None, max_bucket) for b in buckets) or '<tr><td colspan="3" class="muted">No data yet.</td></tr>'
+    bucket_rows = "".join(bar_row(b["bucket"], b["n"], None, max_bucket, f"p50 {b['p50']:,.0f} · p95 {b['p95']:,.0f}ms") for b in buckets) or '<tr><td colspan="3" class="muted">No data yet.</td></tr>'
     hour_rows = "".join(bar_row(h["h"] + ":00", h["n"], None, max_hourly) for h in hourly) or '<tr><td colspan="3" class="muted">No data yet.</td></tr>'
 
     html = f"""<!DOCTYPE html>
@@ -691,8 +2600,8 @@ table td {{padding:6px 10px;border-bottom:1px dotted var(--rule-soft);}}
 <div class="cards">
   <div class="card"><p class="lbl">Last 24 hrs</p><p class="val">{today['reqs']:,}</p><p class="sub">requests</p></div>
   <div class="card"><p class="lbl">Characters</p><p class="val">{today['chars']:,}</p><p class="sub">read aloud</p></div>
-  <div class="card"><p class="lbl">Cache hit</p><p class="val">{hit_pct:.0f}%</p><p class="sub">{today['hits']:,} of {today['reqs']:,}</p></div>
-  <div class="card"><p class="lbl">Avg latency</p><p class="val">{int(today['avg_ms']):,}<span style="font-size:.5em">ms</span></p><p class="sub">end to end</p></div>
+  <div class="card"><p class="lbl">Cache hit</p><p class="val">{hit_pct:.0f}%</p><p class="sub">{today['hits']:,} of {today['reqs']:,} · {today['coalesced']:,} coalesced</p></div>
+  <div class="card"><p class="lbl">Latency p50</p><p class="val">{today['p50']:,.0f}<span style="font-size:.5em">ms</span></p><p class="sub">p95 {today['p95']:,.0f} · p99 {today['p99']:,.0f} · avg {today['avg_ms']:,.0f}</p></div>
 </div>
 
 {finance_html}
@@ -710,13 +2619,18 @@ table td {{padding:6px 10px;border-bottom:1px dotted var(--rule-soft);}}
 <table><tbody>{bucket_rows}</tbody></table>
 
 <p class="foot">All-time: {all_time['reqs']:,} requests, {all_time['chars']:,} characters
-since {all_time['first_seen'] or 'never'}. Local mini-PC telemetry; no IPs, no text content.</p>
+since {all_time['first_seen'] or 'never'}. Local mini-PC telemetry; no IPs, no text content.
+Raw rows kept {USAGE_RAW_DAYS} days; charts read the hourly/daily rollups.</p>
 </body></html>"""
 
     from fastapi.responses import HTMLResponse
     return HTMLResponse(content=html)
 
 
+boot_clock.mark("routes")
+print(f"[tts] {boot_clock.summary()}")
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Incremental rollups of the usage telemetry for /admin/stats.
+
+The raw tts_requests table grows by one row per request forever. The
+dashboard used to aggregate it on every load, so it got slower every week
+and could only show an average latency. Instead, the usage writer thread
+folds every batch it inserts into two small aggregate tables, in the same
+transaction:
+
+  tts_rollup_hourly  (hour, voice, len_bucket) -> counts + latency sketch
+  tts_rollup_daily   (day,  voice, len_bucket) -> counts + latency sketch
+  tts_rollup_totals  one row: all-time requests, characters, first seen
+
+Latency is kept as a LatencySketch: a log-bucketed histogram (relative
+error ~2%) whose merge is bucket-wise addition, so hourly cells merge into a
+24-hour p50/p95/p99 and daily cells into a weekly one without the raw rows.
+
+The dashboard reads only the rollups, so its cost depends on the number of
+voices and days shown, not on traffic. Raw rows past TTS_USAGE_RAW_DAYS
+(default 30) and hourly cells past 7 days are pruned by the writer about
+once an hour; daily cells are kept.
+"""
+import math
+import sqlite3
+import struct
+import time
+from collections import defaultdict
+from typing import Optional
+
+LEN_BUCKETS = ("<100", "100-500", "500-2k", "2k-5k", "5k+")
+HOURLY_KEEP_DAYS = 7
+PRUNE_EVERY_S = 3600
+
+
+def len_bucket(chars: int) -> str:
+    if chars < 100:
+        return "<100"
+    if chars < 500:
+        return "100-500"
+    if chars < 2000:
+        return "500-2k"
+    if chars < 5000:
+        return "2k-5k"
+    return "5k+"
+
+
+class LatencySketch:
+    """Mergeable log-bucketed histogram of positive values (milliseconds).
+
+    Bucket i holds values in (gamma^(i-1), gamma^i]; quantiles are answered
+    with the bucket's midpoint, within `accuracy` relative error.
+    """
+
+    _PAIR = struct.Struct("<HI")
+
+    def __init__(self, accuracy: float = 0.02):
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.counts: dict = {}
+        self.count = 0
+
+    def add(self, value: float, n: int = 1) -> None:
+        i = 0 if value <= 1 else int(math.ceil(math.log(value) / self._log_gamma))
+        self.counts[i] = self.counts.get(i, 0) + n
+        self.count += n
+
+    def merge(self, other: "LatencySketch") -> None:
+        for i, n in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + n
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen > rank:
+                return 1.0 if i == 0 else 2 * self._gamma ** i / (self._gamma + 1)
+        return None
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self._PAIR.pack(i, n) for i, n in sorted(self.counts.items()))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "LatencySketch":
+        sk = cls()
+        if data:
+            for i, n in cls._PAIR.iter_unpack(data):
+                sk.counts[i] = n
+                sk.count += n
+        return sk
+
+
+_CELL_COLS = ("reqs", "chars", "hits", "coalesced", "dur_sum")
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create the rollup tables; on first creation, backfill them from the raw rows."""
+    fresh = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tts_rollup_totals'"
+    ).fetchone() is None
+    for table, key in (("tts_rollup_hourly", "hour"), ("tts_rollup_daily", "day")):
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"{key} TEXT NOT NULL, voice TEXT NOT NULL, len_bucket TEXT NOT NULL, "
+            "reqs INTEGER NOT NULL, chars INTEGER NOT NULL, hits INTEGER NOT NULL, "
+            "coalesced INTEGER NOT NULL, dur_sum INTEGER NOT NULL, sketch BLOB, "
+            f"PRIMARY KEY ({key}, voice, len_bucket))"
+        )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS tts_rollup_totals ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), reqs INTEGER NOT NULL, "
+        "chars INTEGER NOT NULL, first_seen TEXT)"
+    )
+    if fresh:
+        cur = conn.execute(
+            "SELECT ts, voice, char_count, cache_hit, duration_ms, coalesced FROM tts_requests")
+        while True:
+            rows = cur.fetchmany(5000)
+            if not rows:
+                break
+            apply(conn, rows)
+
+
+def apply(conn: sqlite3.Connection, rows: list) -> None:
+    """Fold usage rows (ts, voice, char_count, cache_hit, duration_ms,
+    coalesced) into the rollups. Run inside the transaction that inserts them."""
+    cells = defaultdict(lambda: [0, 0, 0, 0, 0, LatencySketch()])
+    first_seen = None
+    for ts, voice, chars, hit, dur, coalesced in rows:
+        # ts is ISO-8601 UTC ("2025-01-31T14:05:09+00:00"); keys use sqlite's
+        # datetime() text format so they compare against datetime('now', ...).
+        hour = ts[:13].replace("T", " ") + ":00:00"
+        bucket = len_bucket(chars)
+        for cell in (("tts_rollup_hourly", hour, voice, bucket),
+                     ("tts_rollup_daily", ts[:10], voice, bucket)):
+            c = cells[cell]
+            c[0] += 1
+            c[1] += chars
+            c[2] += hit
+            c[3] += coalesced
+            c[4] += dur
+            c[5].add(dur)
+        if first_seen is None or ts < first_seen:
+            first_seen = ts
+
+    for (table, key, voice, bucket), c in cells.items():
+        key_col = "hour" if table == "tts_rollup_hourly" else "day"
+        old = conn.execute(
+            f"SELECT reqs, chars, hits, coalesced, dur_sum, sketch FROM {table} "
+            f"WHERE {key_col} = ? AND voice = ? AND len_bucket = ?", (key, voice, bucket)
+        ).fetchone()
+        if old is not None:
+            for j in range(5):
+                c[j] += old[j]
+            c[5].merge(LatencySketch.from_bytes(old[5]))
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({key_col}, voice, len_bucket, "
+            f"{', '.join(_CELL_COLS)}, sketch) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, voice, bucket, *c[:5], c[5].to_bytes()),
+        )
+
+    conn.execute(
+        "INSERT INTO tts_rollup_totals (id, reqs, chars, first_seen) VALUES (1, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET reqs = reqs + excluded.reqs, "
+        "chars = chars + excluded.chars, "
+        "first_seen = MIN(COALESCE(first_seen, excluded.first_seen), excluded.first_seen)",
+        (len(rows), sum(r[2] for r in rows), first_seen),
+    )
+
+
+def prune(conn: sqlite3.Connection, raw_days: int) -> None:
+    conn.execute("DELETE FROM tts_requests WHERE ts < strftime('%Y-%m-%dT%H:%M:%S', 'now', ?)",
+                 (f"-{int(raw_days)} days",))
+    conn.execute("DELETE FROM tts_rollup_hourly WHERE hour < datetime('now', ?)",
+                 (f"-{HOURLY_KEEP_DAYS} days",))
+
+
+class Rollup:
+    """on_batch hook for UsageWriter: fold each batch in, prune now and then."""
+
+    def __init__(self, raw_days: int = 30):
+        self.raw_days = raw_days
+        self._last_prune = 0.0
+
+    def __call__(self, conn: sqlite3.Connection, rows: list) -> None:
+        apply(conn, rows)
+        now = time.monotonic()
+        if now - self._last_prune > PRUNE_EVERY_S:
+            self._last_prune = now
+            prune(conn, self.raw_days)
+
+
+def _merged(rows) -> dict:
+    out = {"reqs": 0, "chars": 0, "hits": 0, "coalesced": 0, "dur_sum": 0}
+    sk = LatencySketch()
+    for r in rows:
+        for col in out:
+            out[col] += r[col]
+        sk.merge(LatencySketch.from_bytes(r["sketch"]))
+    out["avg_ms"] = out["dur_sum"] / out["reqs"] if out["reqs"] else 0
+    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        out[name] = sk.quantile(q) or 0
+    return out
+
+
+def summary(conn: sqlite3.Connection) -> dict:
+    """Everything /admin/stats shows, from the rollup tables only."""
+    conn.row_factory = sqlite3.Row
+
+    def q(sql, *args):
+        return conn.execute(sql, args).fetchall()
+
+    last_day = q("SELECT * FROM tts_rollup_hourly WHERE hour > datetime('now', '-24 hours')")
+    today = _merged(last_day)
+
+    hours = defaultdict(int)
+    for r in last_day:
+        hours[r["hour"][11:13]] += r["reqs"]
+    hourly = [{"h": h, "n": n} for h, n in sorted(hours.items())]
+
+    totals = q("SELECT reqs, chars, first_seen FROM tts_rollup_totals WHERE id = 1")
+    all_time = dict(totals[0]) if totals else {"reqs": 0, "chars": 0, "first_seen": None}
+
+    daily_rows = q("SELECT * FROM tts_rollup_daily WHERE day >= date('now', '-14 days') ORDER BY day")
+    by_day = defaultdict(list)
+    for r in daily_rows:
+        by_day[r["day"]].append(r)
+    daily = [{"d": d, "n": m["reqs"], "chars": m["chars"], "p95": m["p95"]}
+             for d, m in ((d, _merged(rs)) for d, rs in sorted(by_day.items()))]
+
+    week = [r for r in daily_rows if r["day"] >= time.strftime("%Y-%m-%d",
+                                                               time.gmtime(time.time() - 7 * 86400))]
+    by_voice = defaultdict(lambda: [0, 0])
+    by_bucket = defaultdict(list)
+    for r in week:
+        by_voice[r["voice"]][0] += r["reqs"]
+        by_voice[r["voice"]][1] += r["chars"]
+        by_bucket[r["len_bucket"]].append(r)
+    voices = sorted(({"voice": v, "n": n, "chars": c} for v, (n, c) in by_voice.items()),
+                    key=lambda v: -v["n"])[:12]
+    buckets = []
+    for b in LEN_BUCKETS:
+        if b in by_bucket:
+            m = _merged(by_bucket[b])
+            buckets.append({"bucket": b, "n": m["reqs"], "p50": m["p50"], "p95": m["p95"]})
+
+    return {"today": today, "all_time": all_time, "daily": daily, "voices": voices,
+            "buckets": buckets, "hourly": hourly}
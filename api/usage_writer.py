@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Background batched writer for the usage telemetry table.
+
+Request handlers only append a tuple to a bounded in-memory queue; a daemon
+thread owns one long-lived SQLite connection and drains the queue, inserting
+everything it has in one transaction (executemany + a single commit, so one
+fsync per batch instead of one per request). A batch is flushed when it
+reaches max_batch rows or when the oldest queued row is flush_interval_s
+old, and once more on close().
+
+Telemetry is best-effort by design: when the queue is full (disk stalled,
+writer wedged) new rows are dropped and counted, never waited for.
+
+The thread is started lazily by the first put() in each process, so a writer
+created before serve.py forks still gets one thread per worker.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+_STOP = object()
+
+
+class UsageWriter:
+    """Queue + writer thread for one INSERT statement."""
+
+    def __init__(self, path: str, insert_sql: str, max_batch: int = 256,
+                 flush_interval_s: float = 1.0, max_queue: int = 10_000,
+                 on_batch: Optional[Callable[[sqlite3.Connection, list], None]] = None):
+        self._path = path
+        self._sql = insert_sql
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # Extra work in the same transaction as each batch (usage_rollup.Rollup).
+        self._on_batch = on_batch
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def put(self, row: tuple) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's thread and queued rows don't exist here.
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._thread = threading.Thread(target=self._run, name="usage-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+        self._pid = None
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self._path, timeout=5)
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = [first]
+                deadline = time.monotonic() + self.flush_interval_s
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if row is _STOP:
+                        stop = True
+                        break
+                    batch.append(row)
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: list) -> None:
+        try:
+            with conn:  # one transaction per batch
+                conn.executemany(self._sql, batch)
+                if self._on_batch is not None:
+                    self._on_batch(conn, batch)
+            self.written += len(batch)
+        except Exception as e:
+            # never let telemetry failure surface to the user
+            self.errors += 1
+            print(f"[tts] usage_log error: {e} ({len(batch)} rows lost)")
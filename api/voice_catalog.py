@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Voice catalog: the voices the server accepts and lists, as an immutable
+snapshot with its indexes and serialized responses built once.
+
+tts_server starts from its curated VOICES table and, in the background,
+swaps in a catalog built from edge_tts.list_voices() (curated metadata kept
+for the curated voices, the rest derived from Edge's own). Every snapshot
+is complete on construction, so swapping is a single reference assignment
+and readers never see a half-built catalog. If Edge's list cannot be fetched
+or looks wrong, the current catalog stays.
+
+Lookups:
+  voice in catalog                    O(1) dict lookup (request validation)
+  catalog.response(prefix)            (body, etag) for /api/voices?locale=
+                                      and /api/voices/{locale}: built once per
+                                      locale prefix, then served as bytes
+"""
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+# A fetched list must contain at least this share of the curated voices to
+# replace the current catalog (guards against a truncated or foreign list).
+MIN_CURATED_SHARE = 0.5
+
+
+def _serialize(voices: dict) -> Tuple[bytes, str]:
+    body = json.dumps({"voices": voices}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+class VoiceCatalog:
+    def __init__(self, voices: Dict[str, dict], source: str = "builtin"):
+        self.voices = voices
+        self.source = source
+        self.by_locale: Dict[str, dict] = {}
+        self.by_language: Dict[str, dict] = {}
+        for voice_id, meta in voices.items():
+            locale = meta["locale"]
+            self.by_locale.setdefault(locale, {})[voice_id] = meta
+            self.by_language.setdefault(locale.split("-")[0], {})[voice_id] = meta
+        self._responses: Dict[str, Optional[Tuple[bytes, str]]] = {"": _serialize(voices)}
+        for key, group in list(self.by_locale.items()) + list(self.by_language.items()):
+            self._responses[key] = _serialize(group)
+
+    def __contains__(self, voice_id: str) -> bool:
+        return voice_id in self.voices
+
+    def __len__(self) -> int:
+        return len(self.voices)
+
+    def response(self, prefix: str = "") -> Optional[Tuple[bytes, str]]:
+        """(JSON body, ETag) of {"voices": ...} for every voice whose locale
+        starts with prefix; None if there are none. Exact locales and
+        languages are prebuilt; any other prefix is built on first use and
+        kept only if it matched something (so the memo is bounded by the
+        catalog, not by what clients send)."""
+        try:
+            return self._responses[prefix]
+        except KeyError:
+            pass
+        matched = {k: v for k, v in self.voices.items() if v["locale"].startswith(prefix)}
+        if not matched:
+            return None
+        result = self._responses[prefix] = _serialize(matched)
+        return result
+
+
+def from_edge(edge_voices: list, curated: Dict[str, dict]) -> Dict[str, dict]:
+    """Catalog entries from edge_tts.list_voices(): curated voices first, with
+    their curated metadata, then every other voice Edge offers."""
+    live = {}
+    for v in edge_voices:
+        short, locale = v.get("ShortName"), v.get("Locale")
+        if not short or not locale:
+            continue
+        name = short[len(locale) + 1:] if short.startswith(locale + "-") else short
+        if name.endswith("Neural"):
+            name = name[:-len("Neural")]
+        personalities = (v.get("VoiceTag") or {}).get("VoicePersonalities") or []
+        live[short] = {"name": name, "gender": v.get("Gender", ""), "locale": locale,
+                       "style": personalities[0].lower() if personalities else "standard"}
+    voices = {k: meta for k, meta in curated.items() if k in live}
+    for k in sorted(live):
+        voices.setdefault(k, live[k])
+    return voices
+
+
+def acceptable(voices: Dict[str, dict], curated: Dict[str, dict]) -> bool:
+    kept = sum(1 for k in curated if k in voices)
+    return kept >= MIN_CURATED_SHARE * len(curated)
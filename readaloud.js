@@ -588,10 +588,41 @@ function segmentTextWithOffsets(text, maxLen) {
   return out;
 }
 
-// Fetch one timed segment: audio (base64 MP3) + word anchors. Throws with
+// Compact binary /api/tts/timed response (see _timed_encode in tts_server.py):
+// "RAT1", uint32 BE header length, then LEB128 varints — duration_ms+1, anchor
+// count, zigzag [dt_ms, dchar] deltas — followed by the raw MP3. No base64, so
+// no atob + per-byte copy: the MP3 is a zero-copy view of the response.
+const TIMED_BINARY_TYPE = 'application/vnd.readaloud.timed';
+
+function decodeTimedBinary(buf) {
+  const u8 = new Uint8Array(buf);
+  if (u8.length < 8 || u8[0] !== 0x52 || u8[1] !== 0x41 || u8[2] !== 0x54 || u8[3] !== 0x31) {
+    throw new Error('bad timed payload');
+  }
+  const hlen = new DataView(buf).getUint32(4);
+  let pos = 8;
+  const varint = () => {
+    let n = 0, mul = 1, b;
+    do { b = u8[pos++]; n += (b & 0x7f) * mul; mul *= 128; } while (b & 0x80);
+    return n;
+  };
+  const unzigzag = (n) => (n % 2 ? -(n + 1) / 2 : n / 2);
+  const dur = varint();
+  const count = varint();
+  const words = new Array(count);
+  let t = 0, c = 0;
+  for (let i = 0; i < count; i++) {
+    t += unzigzag(varint());
+    c += unzigzag(varint());
+    words[i] = [t, c];
+  }
+  return { words, duration_ms: dur ? dur - 1 : null, bytes: u8.subarray(8 + hlen) };
+}
+
+// Fetch one timed segment: audio (binary or base64 MP3) + word anchors. Throws with
 // .legacy=true on 404 so the caller can fall back to the old endpoint while
 // a fresh server deploy is still rolling out.
-async function fetchTimedSegment(seg, voiceId, label) {
+async function fetchTimedSegment(seg, voiceId, label, priority = 'interactive') {
   // Try the last-known-good endpoint first, then any other configured endpoint —
   // so a mini-PC outage fails over to Render instead of dropping to a browser voice
   // (which can't be downloaded). Only if EVERY endpoint 404s do we fall back to the
@@ -607,7 +638,9 @@ async function fetchTimedSegment(seg, voiceId, label) {
         const timeout = setTimeout(() => controller.abort(), 45000);
         const r = await fetch(`${url}/api/tts/timed`, {
           method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
+          headers: { 'Content-Type': 'application/json',
+                     'Accept': `${TIMED_BINARY_TYPE}, application/json;q=0.9`,
+                     'X-TTS-Priority': priority },
           body: JSON.stringify({ text: seg.text, voice: voiceId }),
           signal: controller.signal
         });
@@ -621,10 +654,15 @@ async function fetchTimedSegment(seg, voiceId, label) {
           const err = await r.json().catch(() => ({}));
           throw new Error(err.detail || `API error ${r.status}`);
         }
-        const d = await r.json();
-        const bin = atob(d.audio || '');
-        const bytes = new Uint8Array(bin.length);
-        for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+        const d = (r.headers.get('content-type') || '').startsWith(TIMED_BINARY_TYPE)
+          ? decodeTimedBinary(await r.arrayBuffer())
+          : await r.json();
+        let bytes = d.bytes;
+        if (!bytes) { // JSON from a server that predates the binary format
+          const bin = atob(d.audio || '');
+          bytes = new Uint8Array(bin.length);
+          for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+        }
         if (bytes.length < 100) throw new Error('audio too small');
         seg.blob = new Blob([bytes], { type: 'audio/mpeg' });
         seg.words = (d.words || []).map(w => [w[0] / 1000, w[1] + seg.start]);
@@ -651,6 +689,102 @@ async function fetchTimedSegment(seg, voiceId, label) {
   throw lastErr || new Error('segment fetch failed');
 }
 
+// Fetch many timed segments in ONE request via /api/tts/batch (one preflight
+// and rate-limit slot instead of one per part). Results stream back in order
+// as framed binary: uint32 index, uint8 status, uint32 length, payload.
+// Fills seg.blob/seg.words for every part that succeeded; returns false when
+// the server predates the endpoint so the caller falls back to per-part.
+// A batch is charged its total characters against the per-minute rate limit
+// (60000 by default), so groups stay well under that, and a 429 between
+// groups waits out Retry-After instead of giving up on the batch.
+const TIMED_BATCH_TYPE = 'application/vnd.readaloud.timed-batch';
+const BATCH_MAX_SEGMENTS = 50;
+const BATCH_MAX_CHARS = 20000;
+const BATCH_MAX_WAITS = 3;
+
+// [start index, parts] groups, each within both batch limits (at least one part).
+function batchGroups(segs) {
+  const groups = [];
+  let start = 0, chars = 0;
+  for (let i = 0; i < segs.length; i++) {
+    const n = segs[i].text.length;
+    if (i > start && (i - start >= BATCH_MAX_SEGMENTS || chars + n > BATCH_MAX_CHARS)) {
+      groups.push([start, segs.slice(start, i)]);
+      start = i;
+      chars = 0;
+    }
+    chars += n;
+  }
+  if (segs.length) groups.push([start, segs.slice(start)]);
+  return groups;
+}
+
+async function fetchTimedBatch(segs, voiceId, onProgress) {
+  let done = 0;
+  for (const [b, group] of batchGroups(segs)) {
+    let r;
+    for (let waits = 0; ; waits++) {
+      r = await fetch(`${activeTtsUrl}/api/tts/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': TIMED_BATCH_TYPE,
+                   'X-TTS-Priority': 'bulk' },
+        body: JSON.stringify({ segments: group.map(sg => sg.text), voice: voiceId })
+      });
+      if (r.status !== 429 || waits === BATCH_MAX_WAITS) break;
+      const wait = Math.min(60, Number(r.headers.get('Retry-After')) || 5);
+      console.log(`Batch parts ${b + 1}-${b + group.length} rate limited; retrying in ${wait}s`);
+      await new Promise(res => setTimeout(res, wait * 1000));
+    }
+    if (r.status === 404) return false;
+    if (!r.ok) {
+      const err = await r.json().catch(() => ({}));
+      throw new Error(err.detail || `API error ${r.status}`);
+    }
+    // Chunks are queued as received; take() copies each byte once, into its frame.
+    const reader = r.body.getReader();
+    const chunks = [];
+    let have = 0, head = null;
+    const take = (n) => {
+      const out = new Uint8Array(n);
+      for (let off = 0; off < n;) {
+        const c = chunks[0], k = Math.min(c.length, n - off);
+        out.set(k === c.length ? c : c.subarray(0, k), off);
+        off += k;
+        if (k === c.length) chunks.shift(); else chunks[0] = c.subarray(k);
+      }
+      have -= n;
+      return out;
+    };
+    for (;;) {
+      const { value, done: end } = await reader.read();
+      if (value && value.length) { chunks.push(value); have += value.length; }
+      for (;;) {
+        if (!head) {
+          if (have < 9) break;
+          head = new DataView(take(9).buffer);
+        }
+        const idx = head.getUint32(0), status = head.getUint8(4), len = head.getUint32(5);
+        if (have < len) break;
+        const body = take(len);
+        head = null;
+        const seg = group[idx];
+        if (status === 0 && seg) {
+          const d = decodeTimedBinary(body.buffer);
+          if (d.bytes.length >= 100) {
+            seg.blob = new Blob([d.bytes], { type: 'audio/mpeg' });
+            seg.words = d.words.map(w => [w[0] / 1000, w[1] + seg.start]);
+          }
+        } else {
+          console.warn(`Batch part ${b + idx + 1} failed:`, new TextDecoder().decode(body));
+        }
+        if (onProgress) onProgress(++done);
+      }
+      if (end) break;
+    }
+  }
+  return true;
+}
+
 function segIndexForChar(ch) {
   if (!timed) return -1;
   const segs = timed.segments;
@@ -781,7 +915,7 @@ async function useTimedNeuralSpeech(voiceId) {
       // Prefetch the next un-fetched segment while this one plays.
       const nxt = segments[timed.i + 1];
       if (nxt && !nxt.blob && !nxt.fetching) {
-        nxt.fetching = fetchTimedSegment(nxt, voiceId, `${timed.i + 2}/${segments.length}`)
+        nxt.fetching = fetchTimedSegment(nxt, voiceId, `${timed.i + 2}/${segments.length}`, 'prefetch')
           .catch(() => { nxt.fetching = null; }); // errors re-surface on demand
       }
 
@@ -915,7 +1049,7 @@ function playTimedSegment(seg, startAtSec) {
 // Fetch a single chunk with retry/backoff. Tries activeTtsUrl twice, then any other
 // configured endpoint twice. Updates activeTtsUrl when fallback succeeds so the next
 // chunk goes straight to the working URL. Returns an audio Blob or throws.
-async function fetchChunkWithRetry(text, voiceId, chunkIndex) {
+async function fetchChunkWithRetry(text, voiceId, chunkIndex, priority = 'interactive') {
   const urlOrder = [activeTtsUrl, ...TTS_ENDPOINTS.filter(u => u !== activeTtsUrl)];
   let lastErr;
   for (const url of urlOrder) {
@@ -927,7 +1061,7 @@ async function fetchChunkWithRetry(text, voiceId, chunkIndex) {
         console.log(`Fetching TTS chunk ${chunkIndex + 1} via ${url} (attempt ${attempt})`);
         const response = await fetch(`${url}/api/tts`, {
           method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
+          headers: { 'Content-Type': 'application/json', 'X-TTS-Priority': priority },
           body: JSON.stringify({
             text,
             voice: voiceId,
@@ -1682,17 +1816,28 @@ async function downloadMp3() {
           const out = [];
           for (let i = 0; i < segs.length; i++) {
             setStatus(`Preparing MP3 at ${rate}x — part ${i + 1} of ${segs.length}...`);
-            out.push(await fetchChunkWithRetry(segs[i].text, lastRead.voiceId, i));
+            out.push(await fetchChunkWithRetry(segs[i].text, lastRead.voiceId, i, 'bulk'));
           }
           blobs = out;
         } else {
+          // Parts nobody is fetching yet come down in batch requests;
+          // anything still missing afterwards goes through the per-part loop.
+          const missing = segs.filter(sg => !sg.blob && !sg.fetching);
+          if (missing.length > 1) {
+            try {
+              await fetchTimedBatch(missing, lastRead.voiceId, (n) =>
+                setStatus(`Preparing MP3 — ${segs.length - missing.length + n} of ${segs.length} parts...`));
+            } catch (e) {
+              console.warn('Batch download failed, fetching parts one by one:', e.message);
+            }
+          }
           for (let i = 0; i < segs.length; i++) {
             const seg = segs[i];
             if (seg.blob) continue;
             setStatus(`Preparing MP3 — part ${i + 1} of ${segs.length}...`);
             // A playback prefetch may already be in flight for this segment.
             if (seg.fetching) { try { await seg.fetching; } catch (e) {} }
-            if (!seg.blob) await fetchTimedSegment(seg, lastRead.voiceId, `${i + 1}/${segs.length} (download)`);
+            if (!seg.blob) await fetchTimedSegment(seg, lastRead.voiceId, `${i + 1}/${segs.length} (download)`, 'bulk');
           }
           blobs = segs.map(s => s.blob);
           if (blobs.some(b => !b)) throw new Error('missing audio parts');